@@ -287,6 +287,53 @@ class TTS(nn.Module):
         )
         return wav
 
+    def tts_stream(
+        self,
+        text: str,
+        speaker: str = None,
+        language: str = None,
+        speaker_wav: str = None,
+        split_sentences: bool = True,
+        crossfade: int = 0,
+        dtype: str = "float32",
+        **kwargs,
+    ):
+        """Convert text to speech and yield the audio of each sentence as soon as it is synthesized.
+
+        Args:
+            text (str):
+                Input text to synthesize.
+            speaker (str, optional):
+                Speaker name for multi-speaker. Defaults to None.
+            language (str, optional):
+                Language code for multi-lingual models. Defaults to None.
+            speaker_wav (str, optional):
+                Path to a reference wav file to use for voice cloning with supporting models like YourTTS.
+                Defaults to None.
+            split_sentences (bool, optional):
+                Split text into sentences and yield each one separately. Defaults to True.
+            crossfade (int, optional):
+                Number of samples over which consecutive chunks are blended. Defaults to 0.
+            dtype (str, optional):
+                "float32" or "int16" chunks. Defaults to "float32".
+            kwargs (dict, optional):
+                Additional arguments for the model.
+
+        Yields:
+            np.ndarray: audio chunks at `self.synthesizer.output_sample_rate`.
+        """
+        self._check_arguments(speaker=speaker, language=language, speaker_wav=speaker_wav, **kwargs)
+        yield from self.synthesizer.tts_stream(
+            text=text,
+            speaker_name=speaker,
+            language_name=language,
+            speaker_wav=speaker_wav,
+            split_sentences=split_sentences,
+            crossfade=crossfade,
+            dtype=dtype,
+            **kwargs,
+        )
+
     def tts_to_file(
         self,
         text: str,
@@ -0,0 +1,259 @@
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List
+
+import numpy as np
+
+from TTS.server.worker_pool import PoolFullError, PoolUnavailableError, SynthesizerPool
+
+
+class _BatchItem:
+    __slots__ = ("text", "key", "tokens", "future", "enqueued")
+
+    def __init__(self, text: str, key: tuple):
+        self.text = text
+        self.key = key
+        self.tokens = len(text)
+        self.future = Future()
+        self.enqueued = time.monotonic()
+
+
+class BatchScheduler:
+    """Gather concurrent requests into padded batches before they reach the model replicas.
+
+    The first waiting request opens a collection window of `window` seconds. Requests arriving within it
+    with the same speaker and language join its batch, which is sent to the pool as soon as it holds
+    `max_batch_size` requests or `max_batch_tokens` characters, or when the window closes. A replica
+    synthesizes the whole batch with `Synthesizer.tts_batch` and every waiting caller gets its own waveform.
+    When a batch fails, its requests are retried one at a time so a bad input fails only its own request.
+
+    A longer window fills batches better under load (throughput) at the cost of up to `window` seconds of
+    extra latency per request. `metrics()` reports the batch fill ratio and queueing delay to tune it.
+
+    Admission control matches `SynthesizerPool`: `PoolFullError` when `max_queue` requests are waiting to be
+    batched or the pool queue is full, `PoolUnavailableError` on timeout or shutdown.
+
+    Args:
+        pool (SynthesizerPool): replicas that run the batches. Their model must support batching.
+        window (float): seconds to wait for more requests after the first one. Defaults to 0.02.
+        max_batch_size (int): maximum requests per batch. Defaults to 8.
+        max_batch_tokens (int, optional): maximum characters per batch. Defaults to None (no limit).
+        max_queue (int, optional): maximum requests waiting to be batched. Defaults to
+            `pool.max_queue * max_batch_size`.
+    """
+
+    def __init__(
+        self,
+        pool: SynthesizerPool,
+        window: float = 0.02,
+        max_batch_size: int = 8,
+        max_batch_tokens: int = None,
+        max_queue: int = None,
+    ):
+        if max_batch_size < 1:
+            raise ValueError(" [!] The batch size must be at least 1.")
+        self.pool = pool
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_queue = max_queue or pool.max_queue * max_batch_size
+
+        self._queue = queue.Queue()
+        # requests waiting to be batched; unlike `qsize()`, this leaves out requests cancelled after a timeout
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {"requests": 0, "batches": 0, "rejected": 0, "timed_out": 0, "retried_batches": 0}
+        self._fill_ratio_sum = 0.0
+        # time from submission until a replica starts the request, for the most recent requests, in seconds
+        self._delays = collections.deque(maxlen=1024)
+        self._thread = threading.Thread(target=self._collect, name="tts-batcher", daemon=True)
+        self._thread.start()
+
+    @property
+    def queued(self) -> int:
+        return self._pending
+
+    def submit(self, text: str, speaker_name: str = "", language_name: str = "") -> Future:
+        """Queue `text` for the next batch and return a future with its waveform.
+
+        Raises:
+            PoolFullError: when `max_queue` requests are already waiting.
+            PoolUnavailableError: when the scheduler is closed.
+        """
+        with self._lock:
+            if self._closed:
+                raise PoolUnavailableError("Server is shutting down", self.pool.retry_after())
+            if self.queued >= self.max_queue:
+                self.stats["rejected"] += 1
+                raise PoolFullError(self.pool.retry_after())
+            item = _BatchItem(text, (speaker_name or "", language_name or ""))
+            self._pending += 1
+            self._queue.put(item)
+        return item.future
+
+    def run(self, text: str, speaker_name: str = "", language_name: str = "", timeout: float = None) -> np.ndarray:
+        """Synthesize `text` as part of the next batch and wait for its waveform.
+
+        Raises:
+            PoolFullError: when the queue is full.
+            PoolUnavailableError: when the result is not ready within the timeout (`pool.timeout` by default).
+        """
+        timeout = self.pool.timeout if timeout is None else timeout
+        future = self.submit(text, speaker_name, language_name)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError as e:
+            # a request not batched yet is dropped; one already in a batch finishes unseen
+            cancelled = future.cancel()
+            with self._lock:
+                if cancelled:
+                    self._pending -= 1
+                self.stats["timed_out"] += 1
+            raise PoolUnavailableError(f"Request timed out after {timeout:.0f}s", self.pool.retry_after()) from e
+
+    def _is_full(self, batch: List[_BatchItem]) -> bool:
+        if len(batch) >= self.max_batch_size:
+            return True
+        return self.max_batch_tokens is not None and sum(item.tokens for item in batch) >= self.max_batch_tokens
+
+    def _fits(self, batch: List[_BatchItem], item: _BatchItem) -> bool:
+        if self.max_batch_tokens is None:
+            return True
+        return sum(other.tokens for other in batch) + item.tokens <= self.max_batch_tokens
+
+    def _collect(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            open_batches = {}  # (speaker, language) -> requests
+            self._add(open_batches, item)
+            deadline = item.enqueued + self.window
+            while open_batches:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                self._add(open_batches, item)
+            for batch in open_batches.values():
+                self._dispatch(batch)
+
+    def _add(self, open_batches: Dict[tuple, List[_BatchItem]], item: _BatchItem):
+        batch = open_batches.get(item.key)
+        if batch and not self._fits(batch, item):
+            self._dispatch(open_batches.pop(item.key))
+            batch = None
+        if batch is None:
+            batch = open_batches[item.key] = []
+        batch.append(item)
+        if self._is_full(batch):
+            self._dispatch(open_batches.pop(item.key))
+
+    def _dispatch(self, batch: List[_BatchItem]):
+        # skip requests whose caller stopped waiting; those were already taken off `_pending`
+        batch = [item for item in batch if item.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        with self._lock:
+            self._pending -= len(batch)
+        fill_ratio = len(batch) / self.max_batch_size
+        if self.max_batch_tokens:
+            fill_ratio = max(fill_ratio, sum(item.tokens for item in batch) / self.max_batch_tokens)
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["requests"] += len(batch)
+            self._fill_ratio_sum += min(1.0, fill_ratio)
+
+        texts = [item.text for item in batch]
+        speaker_name, language_name = batch[0].key
+
+        def run(replica):
+            started = time.monotonic()
+            with self._lock:
+                self._delays.extend(started - item.enqueued for item in batch)
+            try:
+                return replica.tts_batch(texts, speaker_name=speaker_name, language_name=language_name)
+            except Exception:  # pylint: disable=broad-except
+                if len(texts) == 1:
+                    raise
+            with self._lock:
+                self.stats["retried_batches"] += 1
+            # one text at a time, so only the requests that fail on their own get the error
+            results = []
+            for text in texts:
+                try:
+                    results.append(replica.tts_batch([text], speaker_name=speaker_name, language_name=language_name)[0])
+                except Exception as e:  # pylint: disable=broad-except
+                    results.append(e)
+            return results
+
+        try:
+            future = self.pool.submit(run)
+        except (PoolFullError, PoolUnavailableError) as e:
+            for item in batch:
+                item.future.set_exception(e)
+            return
+        future.add_done_callback(lambda done: self._scatter(batch, done))
+
+    @staticmethod
+    def _scatter(batch: List[_BatchItem], done: Future):
+        error = done.exception()
+        if error is not None:
+            for item in batch:
+                item.future.set_exception(error)
+            return
+        wavs = list(done.result())
+        for item, wav in zip(batch, wavs):
+            if isinstance(wav, Exception):
+                item.future.set_exception(wav)
+            else:
+                item.future.set_result(wav)
+        # never leave a caller waiting on an output the model did not return
+        if len(wavs) < len(batch):
+            error = RuntimeError(f" [!] The model returned {len(wavs)} outputs for a batch of {len(batch)} texts.")
+            for item in batch[len(wavs) :]:
+                item.future.set_exception(error)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Batch fill ratio (mean share of `max_batch_size` or `max_batch_tokens` used) and queueing delay
+        (from submission until a replica starts the batch)."""
+        with self._lock:
+            metrics = dict(self.stats)
+            delays = np.array(self._delays) * 1000
+            batches = self.stats["batches"]
+            fill_ratio = self._fill_ratio_sum / batches if batches else None
+        metrics.update(
+            {
+                "queued": self.queued,
+                "window_ms": self.window * 1000,
+                "max_batch_size": self.max_batch_size,
+                "max_batch_tokens": self.max_batch_tokens,
+                "mean_batch_size": metrics["requests"] / batches if batches else None,
+                "batch_fill_ratio": fill_ratio,
+                "queue_delay_ms": {
+                    "mean": float(delays.mean()) if len(delays) else None,
+                    "p50": float(np.percentile(delays, 50)) if len(delays) else None,
+                    "p95": float(np.percentile(delays, 95)) if len(delays) else None,
+                    "max": float(delays.max()) if len(delays) else None,
+                },
+            }
+        )
+        return metrics
+
+    def close(self, wait: bool = True):
+        """Stop accepting requests; the ones already queued are still batched and sent to the pool."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
@@ -5,13 +5,14 @@ import json
 import os
 import sys
 from pathlib import Path
-from threading import Lock
 from typing import Union
 from urllib.parse import parse_qs
 
-from flask import Flask, render_template, render_template_string, request, send_file
+from flask import Flask, jsonify, render_template, render_template_string, request, send_file
 
 from TTS.config import load_config
+from TTS.server.batch_scheduler import BatchScheduler
+from TTS.server.worker_pool import PoolFullError, PoolUnavailableError, SynthesizerPool
 from TTS.utils.manage import ModelManager
 from TTS.utils.synthesizer import Synthesizer
 
@@ -57,6 +58,37 @@ def create_argparser():
     parser.add_argument("--use_cuda", type=convert_boolean, default=False, help="true to use CUDA.")
     parser.add_argument("--debug", type=convert_boolean, default=False, help="true to enable Flask debug mode.")
     parser.add_argument("--show_details", type=convert_boolean, default=False, help="Generate model detail page.")
+    parser.add_argument(
+        "--replicas",
+        type=int,
+        default=1,
+        help="Number of model replicas serving requests in parallel. Each replica loads its own copy of the model.",
+    )
+    parser.add_argument(
+        "--threads_per_replica",
+        type=int,
+        default=None,
+        help="PyTorch threads per replica. Defaults to the number of CPU cores divided by the replicas.",
+    )
+    parser.add_argument(
+        "--max_queue", type=int, default=16, help="Requests allowed to wait for a replica before answering 429."
+    )
+    parser.add_argument(
+        "--request_timeout",
+        type=float,
+        default=60.0,
+        help="Seconds a request may take, queueing included, before answering 503.",
+    )
+    parser.add_argument(
+        "--batch_window_ms",
+        type=float,
+        default=0,
+        help="Milliseconds to gather concurrent requests into one batch (e.g. 10-30). 0 disables batching. VITS only.",
+    )
+    parser.add_argument("--max_batch_size", type=int, default=8, help="Maximum requests per batch.")
+    parser.add_argument(
+        "--max_batch_tokens", type=int, default=None, help="Maximum input characters per batch. Defaults to no limit."
+    )
     return parser
 
 
@@ -100,18 +132,44 @@ if args.vocoder_path is not None:
     vocoder_path = args.vocoder_path
     vocoder_config_path = args.vocoder_config_path
 
-# load models
-synthesizer = Synthesizer(
-    tts_checkpoint=model_path,
-    tts_config_path=config_path,
-    tts_speakers_file=speakers_file_path,
-    tts_languages_file=None,
-    vocoder_checkpoint=vocoder_path,
-    vocoder_config=vocoder_config_path,
-    encoder_checkpoint="",
-    encoder_config="",
-    use_cuda=args.use_cuda,
+
+def create_synthesizer():
+    return Synthesizer(
+        tts_checkpoint=model_path,
+        tts_config_path=config_path,
+        tts_speakers_file=speakers_file_path,
+        tts_languages_file=None,
+        vocoder_checkpoint=vocoder_path,
+        vocoder_config=vocoder_config_path,
+        encoder_checkpoint="",
+        encoder_config="",
+        use_cuda=args.use_cuda,
+        max_batch_tokens=args.max_batch_tokens,
+    )
+
+
+# load models, one copy per replica
+pool = SynthesizerPool(
+    create_synthesizer,
+    replicas=args.replicas,
+    max_queue=args.max_queue,
+    timeout=args.request_timeout,
+    threads_per_replica=args.threads_per_replica,
 )
+synthesizer = pool.replicas[0]
+
+# gather concurrent requests into batches when the model supports it
+scheduler = None
+if args.batch_window_ms > 0:
+    if synthesizer.supports_batching():
+        scheduler = BatchScheduler(
+            pool,
+            window=args.batch_window_ms / 1000,
+            max_batch_size=args.max_batch_size,
+            max_batch_tokens=args.max_batch_tokens,
+        )
+    else:
+        print(" > The model does not support batched inference; requests are served one at a time.")
 
 use_multi_speaker = hasattr(synthesizer.tts_model, "num_speakers") and (
     synthesizer.tts_model.num_speakers > 1 or synthesizer.tts_speakers_file is not None
@@ -185,25 +243,57 @@ def details():
     )
 
 
-lock = Lock()
+def _busy_response(message: str, status: int, retry_after: float):
+    response = jsonify({"error": message})
+    response.status_code = status
+    response.headers["Retry-After"] = str(int(retry_after))
+    return response
+
+
+def synthesize_wav(text: str, speaker_name: str = "", language_name: str = "", style_wav=None):
+    """Synthesize on the next free replica, batched with concurrent requests when enabled, and return the
+    response: the wav file, or 429/503 with `Retry-After` when the server is overloaded or the request timed out."""
+    try:
+        if scheduler is not None and text and style_wav is None:
+            wav = scheduler.run(text, speaker_name=speaker_name, language_name=language_name)
+        else:
+            wav = pool.run(
+                lambda replica: replica.tts(
+                    text=text, speaker_name=speaker_name, language_name=language_name, style_wav=style_wav
+                )
+            )
+    except PoolFullError as e:
+        return _busy_response(str(e), 429, e.retry_after)
+    except PoolUnavailableError as e:
+        return _busy_response(str(e), 503, e.retry_after)
+    out = io.BytesIO()
+    synthesizer.save_wav(wav, out)
+    out.seek(0)
+    return send_file(out, mimetype="audio/wav")
 
 
 @app.route("/api/tts", methods=["GET", "POST"])
 def tts():
-    with lock:
-        text = request.headers.get("text") or request.values.get("text", "")
-        speaker_idx = request.headers.get("speaker-id") or request.values.get("speaker_id", "")
-        language_idx = request.headers.get("language-id") or request.values.get("language_id", "")
-        style_wav = request.headers.get("style-wav") or request.values.get("style_wav", "")
-        style_wav = style_wav_uri_to_dict(style_wav)
-
-        print(f" > Model input: {text}")
-        print(f" > Speaker Idx: {speaker_idx}")
-        print(f" > Language Idx: {language_idx}")
-        wavs = synthesizer.tts(text, speaker_name=speaker_idx, language_name=language_idx, style_wav=style_wav)
-        out = io.BytesIO()
-        synthesizer.save_wav(wavs, out)
-    return send_file(out, mimetype="audio/wav")
+    text = request.headers.get("text") or request.values.get("text", "")
+    speaker_idx = request.headers.get("speaker-id") or request.values.get("speaker_id", "")
+    language_idx = request.headers.get("language-id") or request.values.get("language_id", "")
+    style_wav = request.headers.get("style-wav") or request.values.get("style_wav", "")
+    style_wav = style_wav_uri_to_dict(style_wav)
+
+    print(f" > Model input: {text}")
+    print(f" > Speaker Idx: {speaker_idx}")
+    print(f" > Language Idx: {language_idx}")
+    return synthesize_wav(text=text, speaker_name=speaker_idx, language_name=language_idx, style_wav=style_wav)
+
+
+@app.route("/api/stats", methods=["GET"])
+def stats():
+    """Worker pool counters: completed, failed, rejected and timed out requests, queue length.
+    With batching enabled, also the batch fill ratio and queueing delay."""
+    metrics = pool.metrics()
+    if scheduler is not None:
+        metrics["batching"] = scheduler.metrics()
+    return jsonify(metrics)
 
 
 # Basic MaryTTS compatibility layer
@@ -236,22 +326,18 @@ def mary_tts_api_voices():
 @app.route("/process", methods=["GET", "POST"])
 def mary_tts_api_process():
     """MaryTTS-compatible /process endpoint"""
-    with lock:
-        if request.method == "POST":
-            data = parse_qs(request.get_data(as_text=True))
-            # NOTE: we ignore param. LOCALE and VOICE for now since we have only one active model
-            text = data.get("INPUT_TEXT", [""])[0]
-        else:
-            text = request.args.get("INPUT_TEXT", "")
-        print(f" > Model input: {text}")
-        wavs = synthesizer.tts(text)
-        out = io.BytesIO()
-        synthesizer.save_wav(wavs, out)
-    return send_file(out, mimetype="audio/wav")
+    if request.method == "POST":
+        data = parse_qs(request.get_data(as_text=True))
+        # NOTE: we ignore param. LOCALE and VOICE for now since we have only one active model
+        text = data.get("INPUT_TEXT", [""])[0]
+    else:
+        text = request.args.get("INPUT_TEXT", "")
+    print(f" > Model input: {text}")
+    return synthesize_wav(text=text)
 
 
 def main():
-    app.run(debug=args.debug, host="::", port=args.port)
+    app.run(debug=args.debug, host="::", port=args.port, threaded=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict
+
+
+class PoolFullError(Exception):
+    """The request queue is full; the client should retry later (HTTP 429)."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Server busy, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class PoolUnavailableError(Exception):
+    """The request could not be served in time or the pool is shutting down (HTTP 503)."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Request:
+    __slots__ = ("func", "future", "deadline")
+
+    def __init__(self, func: Callable, deadline: float):
+        self.func = func
+        self.future = Future()
+        self.deadline = deadline
+
+
+def default_threads_per_replica(replicas: int) -> int:
+    """Split the CPU cores evenly between replicas."""
+    return max(1, (os.cpu_count() or 1) // max(1, replicas))
+
+
+class SynthesizerPool:
+    """Serve requests with several model replicas, each on its own worker thread.
+
+    Every replica is a separate `Synthesizer` built by `factory`, so requests never share model state and
+    up to `replicas` requests are synthesized at the same time. PyTorch is limited to
+    `threads_per_replica` intra-op threads, so the replicas together use about one thread per core.
+
+    Requests wait in a bounded queue. When `max_queue` requests are already waiting, `run` raises
+    `PoolFullError` immediately instead of letting the backlog grow (admission control). A request that
+    is not finished within `timeout` seconds raises `PoolUnavailableError`; if it is still queued by then
+    it is dropped without running. Both errors carry a `retry_after` estimate in seconds, derived from the
+    backlog and the recent service time.
+
+    Args:
+        factory (Callable[[], Synthesizer]): builds one replica.
+        replicas (int): number of replicas and worker threads. Defaults to 1.
+        max_queue (int): maximum number of waiting requests. Defaults to 16.
+        timeout (float): per-request time limit in seconds, queueing included. Defaults to 60.
+        threads_per_replica (int, optional): PyTorch threads per replica. Defaults to cores / replicas.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        replicas: int = 1,
+        max_queue: int = 16,
+        timeout: float = 60.0,
+        threads_per_replica: int = None,
+    ):
+        if replicas < 1:
+            raise ValueError(" [!] The worker pool needs at least one replica.")
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.threads_per_replica = threads_per_replica or default_threads_per_replica(replicas)
+        self._set_torch_threads(self.threads_per_replica)
+
+        self.replicas = [factory() for _ in range(replicas)]
+        self._queue = queue.Queue()
+        # requests waiting for a replica; unlike `qsize()`, this leaves out requests cancelled after a timeout
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        # exponentially weighted mean of the time a request spends on a replica
+        self._service_time = None
+        self.stats = {"completed": 0, "failed": 0, "rejected": 0, "timed_out": 0, "active": 0}
+        self._workers = [
+            threading.Thread(target=self._worker, args=(replica,), name=f"tts-replica-{idx}", daemon=True)
+            for idx, replica in enumerate(self.replicas)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @staticmethod
+    def _set_torch_threads(num_threads: int):
+        try:
+            import torch  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            return
+        torch.set_num_threads(num_threads)
+
+    @property
+    def queued(self) -> int:
+        return self._pending
+
+    def retry_after(self) -> float:
+        """Seconds until the current backlog is expected to clear, at least 1."""
+        service_time = self._service_time or 1.0
+        backlog = self.queued + self.stats["active"]
+        return max(1.0, round(service_time * backlog / len(self.replicas)))
+
+    def submit(self, func: Callable[[Any], Any], timeout: float = None) -> Future:
+        """Queue `func(replica)` and return a future with its result.
+
+        Raises:
+            PoolFullError: when `max_queue` requests are already waiting.
+            PoolUnavailableError: when the pool is closed.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            if self._closed:
+                raise PoolUnavailableError("Server is shutting down", self.retry_after())
+            if self.queued >= self.max_queue:
+                self.stats["rejected"] += 1
+                raise PoolFullError(self.retry_after())
+            request = _Request(func, time.monotonic() + timeout)
+            self._pending += 1
+            self._queue.put(request)
+        return request.future
+
+    def run(self, func: Callable[[Any], Any], timeout: float = None) -> Any:
+        """Run `func(replica)` on the next free replica and wait for its result.
+
+        Raises:
+            PoolFullError: when the queue is full.
+            PoolUnavailableError: when the result is not ready within the timeout.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        future = self.submit(func, timeout)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError as e:
+            # a request still in the queue is skipped by the workers; one already running finishes unseen
+            cancelled = future.cancel()
+            with self._lock:
+                if cancelled:
+                    self._pending -= 1
+                self.stats["timed_out"] += 1
+            raise PoolUnavailableError(f"Request timed out after {timeout:.0f}s", self.retry_after()) from e
+
+    def _worker(self, replica):
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+            if not request.future.set_running_or_notify_cancel():
+                continue  # the caller stopped waiting; already taken off `_pending`
+            with self._lock:
+                self._pending -= 1
+            if time.monotonic() > request.deadline:
+                with self._lock:
+                    self.stats["timed_out"] += 1
+                request.future.set_exception(PoolUnavailableError("Request expired in the queue", self.retry_after()))
+                continue
+            with self._lock:
+                self.stats["active"] += 1
+            start = time.monotonic()
+            try:
+                result = request.func(replica)
+            except Exception as e:  # pylint: disable=broad-except
+                request.future.set_exception(e)
+                outcome = "failed"
+            else:
+                request.future.set_result(result)
+                outcome = "completed"
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self.stats["active"] -= 1
+                self.stats[outcome] += 1
+                self._service_time = elapsed if self._service_time is None else 0.8 * self._service_time + 0.2 * elapsed
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters and queue state, for monitoring."""
+        with self._lock:
+            metrics = dict(self.stats)
+        metrics.update(
+            {
+                "replicas": len(self.replicas),
+                "threads_per_replica": self.threads_per_replica,
+                "queued": self.queued,
+                "max_queue": self.max_queue,
+                "service_time": self._service_time,
+            }
+        )
+        return metrics
+
+    def close(self, wait: bool = True):
+        """Stop accepting requests; workers finish the queued ones and exit."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for _ in self._workers:
+            self._queue.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join()
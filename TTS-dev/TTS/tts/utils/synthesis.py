@@ -252,6 +252,135 @@ def synthesis(
     return return_dict
 
 
+def length_buckets(lengths, batch_size, max_tokens=None):
+    """Group items into batches of similar length to keep padding small.
+
+    Items are sorted by length and cut into consecutive batches of at most `batch_size` items whose padded
+    size (items x longest item) stays within `max_tokens`.
+
+    Args:
+        lengths (List[int]): length of every item.
+        batch_size (int): maximum number of items per batch.
+        max_tokens (int, optional): maximum padded tokens per batch. Defaults to None (no limit).
+
+    Returns:
+        List[List[int]]: batches of item indices, shortest items first.
+    """
+    order = sorted(range(len(lengths)), key=lambda idx: lengths[idx])
+    buckets = []
+    bucket = []
+    for idx in order:
+        # items are sorted, so the newest item is the longest in the bucket
+        padded = (len(bucket) + 1) * lengths[idx]
+        if bucket and (len(bucket) >= batch_size or (max_tokens is not None and padded > max_tokens)):
+            buckets.append(bucket)
+            bucket = []
+        bucket.append(idx)
+    if bucket:
+        buckets.append(bucket)
+    return buckets
+
+
+def synthesis_batch(
+    model,
+    texts,
+    CONFIG,
+    use_cuda,
+    speaker_id=None,
+    do_trim_silence=False,
+    d_vector=None,
+    language_id=None,
+):
+    """Synthesize several texts in one padded forward pass of a model that supports batch inference
+    through `x_lengths` and outputs waveforms (e.g. VITS).
+
+    The texts are tokenized and right-padded to the longest one, the model runs once for the whole batch
+    and every output waveform is cut back to the length the model decoded for it.
+
+    Args:
+        model (TTS.tts.models):
+            The TTS model to synthesize audio with.
+
+        texts (List[str]):
+            The input texts.
+
+        CONFIG (Coqpit):
+            Model configuration.
+
+        use_cuda (bool):
+            Enable/disable CUDA.
+
+        speaker_id (int):
+            Speaker ID used for every text of the batch. Defaults to None.
+
+        do_trim_silence (bool):
+            trim silence after synthesis. Defaults to False.
+
+        d_vector (torch.Tensor):
+            d-vector used for every text of the batch, in shape :math:`[1, D]`. Defaults to None.
+
+        language_id (int):
+            Language ID used for every text of the batch. Defaults to None.
+
+    Returns:
+        List[np.ndarray]: one waveform per text, in input order.
+    """
+    device = next(model.parameters()).device
+    if use_cuda:
+        device = "cuda"
+
+    language_name = None
+    if language_id is not None:
+        language = [k for k, v in model.language_manager.name_to_id.items() if v == language_id]
+        assert len(language) == 1, "language_id must be a valid language"
+        language_name = language[0]
+
+    ids = [model.tokenizer.text_to_ids(text, language=language_name) for text in texts]
+    batch_size = len(ids)
+    lengths = [len(seq) for seq in ids]
+    text_inputs = np.zeros((batch_size, max(lengths)), dtype=np.int64)
+    for idx, seq in enumerate(ids):
+        text_inputs[idx, : len(seq)] = seq
+    text_inputs = numpy_to_torch(text_inputs, torch.long, device=device)
+    x_lengths = numpy_to_torch(lengths, torch.long, device=device)
+
+    if speaker_id is not None:
+        speaker_id = id_to_torch(speaker_id, device=device).reshape(-1).expand(batch_size)
+    if d_vector is not None:
+        d_vector = embedding_to_torch(d_vector, device=device).expand(batch_size, -1)
+    if language_id is not None:
+        language_id = id_to_torch(language_id, device=device).reshape(-1).expand(batch_size)
+
+    _func = model.module.inference if hasattr(model, "module") else model.inference
+    outputs = _func(
+        text_inputs,
+        aux_input={
+            "x_lengths": x_lengths,
+            "speaker_ids": speaker_id,
+            "d_vectors": d_vector,
+            "language_ids": language_id,
+        },
+    )
+    # [B, 1, T_wav] -> [B, T_wav]
+    model_outputs = outputs["model_outputs"].data.cpu().numpy().reshape(batch_size, -1)
+    # samples per decoder frame; frames past each item's length are padding
+    y_mask = outputs["y_mask"]
+    decoded_frames = y_mask.shape[-1]
+    max_inference_len = getattr(model, "max_inference_len", None)
+    if max_inference_len:
+        decoded_frames = min(decoded_frames, max_inference_len)
+    frame_size = model_outputs.shape[1] // max(decoded_frames, 1)
+    frames = y_mask.reshape(batch_size, -1).sum(1).long().cpu().numpy()
+
+    wavs = []
+    for idx in range(batch_size):
+        wav = model_outputs[idx, : min(int(frames[idx]) * frame_size, model_outputs.shape[1])]
+        if do_trim_silence:
+            wav = trim_silence(wav, model.ap)
+        wavs.append(wav)
+    return wavs
+
+
 def transfer_voice(
     model,
     CONFIG,
@@ -1,6 +1,6 @@
 import os
 import time
-from typing import List
+from typing import Iterable, Iterator, List
 
 import numpy as np
 import pysbd
@@ -14,7 +14,7 @@ from TTS.tts.models.vits import Vits
 
 # pylint: disable=unused-wildcard-import
 # pylint: disable=wildcard-import
-from TTS.tts.utils.synthesis import synthesis, transfer_voice, trim_silence
+from TTS.tts.utils.synthesis import length_buckets, synthesis, synthesis_batch, transfer_voice, trim_silence
 from TTS.utils.audio import AudioProcessor
 from TTS.utils.audio.numpy_transforms import save_wav
 from TTS.vc.models import setup_model as setup_vc_model
@@ -22,6 +22,70 @@ from TTS.vocoder.models import setup_model as setup_vocoder_model
 from TTS.vocoder.utils.generic_utils import interpolate_vocoder_input
 
 
+def concat_with_silence(chunks: List[np.ndarray], silence: int) -> np.ndarray:
+    """Join waveform chunks into one float32 array with `silence` zero samples after each chunk.
+
+    The output buffer is allocated once and every chunk is copied into place, instead of growing a
+    Python list sample by sample.
+
+    Args:
+        chunks (List[np.ndarray]): 1D waveforms.
+        silence (int): number of zero samples to insert after each chunk.
+
+    Returns:
+        np.ndarray: the joined float32 waveform.
+    """
+    chunks = [np.ravel(chunk) for chunk in chunks]
+    total = sum(len(chunk) for chunk in chunks) + silence * len(chunks)
+    out = np.zeros(total, dtype=np.float32)
+    offset = 0
+    for chunk in chunks:
+        out[offset : offset + len(chunk)] = chunk
+        offset += len(chunk) + silence
+    return out
+
+
+def crossfade_chunks(chunks: Iterable[np.ndarray], crossfade: int) -> Iterator[np.ndarray]:
+    """Blend consecutive waveform chunks with a linear crossfade of `crossfade` samples.
+
+    The last `crossfade` samples of every chunk are held back and mixed into the start of the next one, so
+    each chunk is yielded as soon as the one after it is known to need them (the final tail is yielded at
+    the end). With `crossfade=0` chunks pass through unchanged.
+
+    Args:
+        chunks (Iterable[np.ndarray]): 1D float waveforms.
+        crossfade (int): overlap in samples.
+
+    Yields:
+        np.ndarray: float32 chunks.
+    """
+    pending = None
+    for chunk in chunks:
+        chunk = np.array(chunk, dtype=np.float32).reshape(-1)
+        if pending is not None:
+            if len(chunk) >= len(pending):
+                ramp = np.linspace(0.0, 1.0, len(pending), dtype=np.float32)
+                chunk[: len(pending)] = pending * (1.0 - ramp) + chunk[: len(pending)] * ramp
+            else:
+                yield pending
+            pending = None
+        if crossfade > 0 and len(chunk) > crossfade:
+            pending = chunk[-crossfade:]
+            chunk = chunk[:-crossfade]
+        if len(chunk):
+            yield chunk
+    if pending is not None:
+        yield pending
+
+
+def float_to_int16(wav: np.ndarray) -> np.ndarray:
+    """Convert a float waveform in [-1, 1] to 16-bit PCM, clipping anything outside the range.
+
+    Unlike `save_wav`, which normalizes by the peak of the whole file, this works chunk by chunk.
+    """
+    return (np.clip(wav, -1.0, 1.0) * 32767).astype(np.int16)
+
+
 class Synthesizer(nn.Module):
     def __init__(
         self,
@@ -38,6 +102,9 @@ class Synthesizer(nn.Module):
         model_dir: str = "",
         voice_dir: str = None,
         use_cuda: bool = False,
+        sentence_silence: int = 10000,
+        batch_size: int = 1,
+        max_batch_tokens: int = None,
     ) -> None:
         """General 🐸 TTS interface for inference. It takes a tts and a vocoder
         model and synthesize speech from the provided text.
@@ -60,6 +127,11 @@ class Synthesizer(nn.Module):
             vc_checkpoint (str, optional): path to the voice conversion model file. Defaults to `""`,
             vc_config (str, optional): path to the voice conversion config file. Defaults to `""`,
             use_cuda (bool, optional): enable/disable cuda. Defaults to False.
+            sentence_silence (int, optional): number of silent samples inserted after each sentence. Defaults to 10000.
+            batch_size (int, optional): synthesize up to this many sentences in one forward pass when the model
+                supports batch inference (VITS). Defaults to 1 (one sentence at a time).
+            max_batch_tokens (int, optional): limit on padded input size per batch, counted in characters.
+                Defaults to None.
         """
         super().__init__()
         self.tts_checkpoint = tts_checkpoint
@@ -73,6 +145,9 @@ class Synthesizer(nn.Module):
         self.vc_checkpoint = vc_checkpoint
         self.vc_config = vc_config
         self.use_cuda = use_cuda
+        self.sentence_silence = sentence_silence
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
 
         self.tts_model = None
         self.vocoder_model = None
@@ -235,11 +310,11 @@ class Synthesizer(nn.Module):
         """
         return self.seg.segment(text)
 
-    def save_wav(self, wav: List[int], path: str, pipe_out=None) -> None:
+    def save_wav(self, wav: np.ndarray, path: str, pipe_out=None) -> None:
         """Save the waveform as a file.
 
         Args:
-            wav (List[int]): waveform as a list of values.
+            wav (np.ndarray): waveform as an array (lists and tensors are converted).
             path (str): output path to save the waveform.
             pipe_out (BytesIO, optional): Flag to stdout the generated TTS wav file for shell pipe.
         """
@@ -250,24 +325,105 @@ class Synthesizer(nn.Module):
             wav = np.array(wav)
         save_wav(wav=wav, path=path, sample_rate=self.output_sample_rate, pipe_out=pipe_out)
 
+    def supports_batching(self) -> bool:
+        """Whether the loaded model can synthesize a padded batch of sentences in one pass.
+
+        Only models that take `x_lengths` at inference and output waveforms directly qualify (VITS).
+        """
+        return (
+            isinstance(self.tts_model, Vits)
+            and not hasattr(self.tts_model, "synthesize")
+            and self.vocoder_model is None
+        )
+
+    def _tts_batched(
+        self, sens: List[str], batch_size: int, speaker_id=None, speaker_embedding=None, language_id=None
+    ) -> List[np.ndarray]:
+        """Synthesize sentences in length-bucketed batches and return their waveforms in input order."""
+        # character counts stand in for token counts, so sentences are only tokenized once
+        lengths = [len(sen) for sen in sens]
+        wavs = [None] * len(sens)
+        for bucket in length_buckets(lengths, batch_size, self.max_batch_tokens):
+            bucket_wavs = synthesis_batch(
+                model=self.tts_model,
+                texts=[sens[idx] for idx in bucket],
+                CONFIG=self.tts_config,
+                use_cuda=self.use_cuda,
+                speaker_id=speaker_id,
+                do_trim_silence="do_trim_silence" in self.tts_config.audio
+                and self.tts_config.audio["do_trim_silence"],
+                d_vector=speaker_embedding,
+                language_id=language_id,
+            )
+            for idx, wav in zip(bucket, bucket_wavs):
+                wavs[idx] = wav
+        return wavs
+
+    def tts_batch(
+        self,
+        texts: List[str],
+        speaker_name: str = "",
+        language_name: str = "",
+        split_sentences: bool = True,
+        sentence_silence: int = None,
+        batch_size: int = None,
+    ) -> List[np.ndarray]:
+        """Synthesize several independent texts together and return one waveform per text.
+
+        The sentences of all texts are pooled and run through the model in padded batches, so short requests
+        share forward passes. All texts use the same speaker and language. Requires `supports_batching()`.
+
+        Args:
+            texts (List[str]): input texts.
+            speaker_name (str, optional): speaker id for multi-speaker models. Defaults to "".
+            language_name (str, optional): language id for multi-language models. Defaults to "".
+            split_sentences (bool, optional): split each text into sentences. Defaults to True.
+            sentence_silence (int, optional): silent samples after each sentence. Defaults to `self.sentence_silence`.
+            batch_size (int, optional): sentences per forward pass. Defaults to all sentences in one pass,
+                within `self.max_batch_tokens`.
+
+        Returns:
+            List[np.ndarray]: float32 waveforms, in input order.
+        """
+        if not self.supports_batching():
+            raise RuntimeError(" [!] The loaded model does not support batched inference.")
+        if sentence_silence is None:
+            sentence_silence = self.sentence_silence
+        sens_per_text = [self.split_into_sentences(text) if split_sentences else [text] for text in texts]
+        sens = [sen for text_sens in sens_per_text for sen in text_sens]
+        speaker_id, speaker_embedding, language_id = self._resolve_speaker_and_language(
+            speaker_name, language_name, None, {}
+        )
+        wavs = self._tts_batched(sens, batch_size or len(sens), speaker_id, speaker_embedding, language_id)
+        outputs = []
+        offset = 0
+        for text_sens in sens_per_text:
+            outputs.append(concat_with_silence(wavs[offset : offset + len(text_sens)], sentence_silence))
+            offset += len(text_sens)
+        return outputs
+
     def voice_conversion(self, source_wav: str, target_wav: str) -> List[int]:
         output_wav = self.vc_model.voice_conversion(source_wav, target_wav)
         return output_wav
 
-    def tts(
+    def tts_stream(
         self,
-        text: str = "",
+        text: str,
         speaker_name: str = "",
         language_name: str = "",
         speaker_wav=None,
         style_wav=None,
         style_text=None,
-        reference_wav=None,
-        reference_speaker_name=None,
         split_sentences: bool = True,
+        sentence_silence: int = None,
+        crossfade: int = 0,
+        dtype: str = "float32",
         **kwargs,
-    ) -> List[int]:
-        """🐸 TTS magic. Run all the models and generate speech.
+    ) -> Iterator[np.ndarray]:
+        """Synthesize text sentence by sentence, yielding each sentence's audio as soon as it is ready.
+
+        Playback or a chunked HTTP response can start after the first sentence instead of after the whole
+        text. With `crossfade=0` the concatenated chunks equal the output of `tts()` for the same text.
 
         Args:
             text (str): input text.
@@ -276,28 +432,54 @@ class Synthesizer(nn.Module):
             speaker_wav (Union[str, List[str]], optional): path to the speaker wav for voice cloning. Defaults to None.
             style_wav ([type], optional): style waveform for GST. Defaults to None.
             style_text ([type], optional): transcription of style_wav for Capacitron. Defaults to None.
-            reference_wav ([type], optional): reference waveform for voice conversion. Defaults to None.
-            reference_speaker_name ([type], optional): speaker id of reference waveform. Defaults to None.
             split_sentences (bool, optional): split the input text into sentences. Defaults to True.
+            sentence_silence (int, optional): silent samples after each sentence. Defaults to `self.sentence_silence`.
+            crossfade (int, optional): samples over which consecutive chunks are blended. Defaults to 0.
+            dtype (str, optional): "float32" or "int16" (16-bit PCM, clipped). Defaults to "float32".
             **kwargs: additional arguments to pass to the TTS model.
-        Returns:
-            List[int]: [description]
+
+        Yields:
+            np.ndarray: audio chunks in `dtype`.
         """
-        start_time = time.time()
-        wavs = []
+        if not text:
+            raise ValueError("You need to define `text` to use the streaming synthesis.")
+        if dtype not in ("float32", "int16"):
+            raise ValueError(f" [!] Unsupported stream dtype {dtype}. Use 'float32' or 'int16'.")
+        if sentence_silence is None:
+            sentence_silence = self.sentence_silence
+
+        sens = self.split_into_sentences(text) if split_sentences else [text]
+        speaker_id, speaker_embedding, language_id = self._resolve_speaker_and_language(
+            speaker_name, language_name, speaker_wav, kwargs
+        )
+        use_gl, vocoder_device = self._vocoder_device()
+
+        def sentence_chunks():
+            for sen in sens:
+                waveform = self._synthesize_sentence(
+                    sen,
+                    speaker_name=speaker_name,
+                    language_name=language_name,
+                    speaker_wav=speaker_wav,
+                    style_wav=style_wav,
+                    style_text=style_text,
+                    speaker_id=speaker_id,
+                    speaker_embedding=speaker_embedding,
+                    language_id=language_id,
+                    use_gl=use_gl,
+                    vocoder_device=vocoder_device,
+                    **kwargs,
+                )
+                yield concat_with_silence([waveform], sentence_silence)
 
-        if not text and not reference_wav:
-            raise ValueError(
-                "You need to define either `text` (for sythesis) or a `reference_wav` (for voice conversion) to use the Coqui TTS API."
-            )
+        for chunk in crossfade_chunks(sentence_chunks(), crossfade):
+            yield float_to_int16(chunk) if dtype == "int16" else chunk
 
-        if text:
-            sens = [text]
-            if split_sentences:
-                print(" > Text splitted to sentences.")
-                sens = self.split_into_sentences(text)
-            print(sens)
+    def _resolve_speaker_and_language(self, speaker_name, language_name, speaker_wav, kwargs):
+        """Resolve the speaker id or embedding and the language id for a synthesis call.
 
+        `kwargs` are the extra model arguments of the call; a `voice_dir` entry is taken out of it.
+        """
         # handle multi-speaker
         if "voice_dir" in kwargs:
             self.voice_dir = kwargs["voice_dir"]
@@ -372,73 +554,182 @@ class Synthesizer(nn.Module):
             and self.tts_model.speaker_manager.encoder_ap is not None
         ):
             speaker_embedding = self.tts_model.speaker_manager.compute_embedding_from_clip(speaker_wav)
+        return speaker_id, speaker_embedding, language_id
 
+    def _vocoder_device(self):
+        """Return whether Griffin-Lim is used instead of a vocoder model, and the vocoder device."""
         vocoder_device = "cpu"
         use_gl = self.vocoder_model is None
         if not use_gl:
             vocoder_device = next(self.vocoder_model.parameters()).device
         if self.use_cuda:
             vocoder_device = "cuda"
+        return use_gl, vocoder_device
 
-        if not reference_wav:  # not voice conversion
+    def _synthesize_sentence(
+        self,
+        sen: str,
+        speaker_name=None,
+        language_name=None,
+        speaker_wav=None,
+        style_wav=None,
+        style_text=None,
+        speaker_id=None,
+        speaker_embedding=None,
+        language_id=None,
+        use_gl=True,
+        vocoder_device="cpu",
+        **kwargs,
+    ) -> np.ndarray:
+        """Run the TTS model (and the vocoder) on one sentence and return its waveform."""
+        if hasattr(self.tts_model, "synthesize"):
+            outputs = self.tts_model.synthesize(
+                text=sen,
+                config=self.tts_config,
+                speaker_id=speaker_name,
+                voice_dirs=self.voice_dir,
+                d_vector=speaker_embedding,
+                speaker_wav=speaker_wav,
+                language=language_name,
+                **kwargs,
+            )
+        else:
+            # synthesize voice
+            outputs = synthesis(
+                model=self.tts_model,
+                text=sen,
+                CONFIG=self.tts_config,
+                use_cuda=self.use_cuda,
+                speaker_id=speaker_id,
+                style_wav=style_wav,
+                style_text=style_text,
+                use_griffin_lim=use_gl,
+                d_vector=speaker_embedding,
+                language_id=language_id,
+            )
+        waveform = outputs["wav"]
+        if not use_gl:
+            mel_postnet_spec = outputs["outputs"]["model_outputs"][0].detach().cpu().numpy()
+            # denormalize tts output based on tts audio config
+            mel_postnet_spec = self.tts_model.ap.denormalize(mel_postnet_spec.T).T
+            # renormalize spectrogram based on vocoder config
+            vocoder_input = self.vocoder_ap.normalize(mel_postnet_spec.T)
+            # compute scale factor for possible sample rate mismatch
+            scale_factor = [
+                1,
+                self.vocoder_config["audio"]["sample_rate"] / self.tts_model.ap.sample_rate,
+            ]
+            if scale_factor[1] != 1:
+                print(" > interpolating tts model output.")
+                vocoder_input = interpolate_vocoder_input(scale_factor, vocoder_input)
+            else:
+                vocoder_input = torch.tensor(vocoder_input).unsqueeze(0)  # pylint: disable=not-callable
+            # run vocoder model
+            # [1, T, C]
+            waveform = self.vocoder_model.inference(vocoder_input.to(vocoder_device))
+        if torch.is_tensor(waveform) and waveform.device != torch.device("cpu") and not use_gl:
+            waveform = waveform.cpu()
+        if not use_gl:
+            waveform = waveform.numpy()
+        waveform = waveform.squeeze()
+
+        # trim silence
+        if "do_trim_silence" in self.tts_config.audio and self.tts_config.audio["do_trim_silence"]:
+            waveform = trim_silence(waveform, self.tts_model.ap)
+        return waveform
+
+    def tts(
+        self,
+        text: str = "",
+        speaker_name: str = "",
+        language_name: str = "",
+        speaker_wav=None,
+        style_wav=None,
+        style_text=None,
+        reference_wav=None,
+        reference_speaker_name=None,
+        split_sentences: bool = True,
+        sentence_silence: int = None,
+        return_list: bool = False,
+        batch_size: int = None,
+        **kwargs,
+    ) -> np.ndarray:
+        """🐸 TTS magic. Run all the models and generate speech.
+
+        Args:
+            text (str): input text.
+            speaker_name (str, optional): speaker id for multi-speaker models. Defaults to "".
+            language_name (str, optional): language id for multi-language models. Defaults to "".
+            speaker_wav (Union[str, List[str]], optional): path to the speaker wav for voice cloning. Defaults to None.
+            style_wav ([type], optional): style waveform for GST. Defaults to None.
+            style_text ([type], optional): transcription of style_wav for Capacitron. Defaults to None.
+            reference_wav ([type], optional): reference waveform for voice conversion. Defaults to None.
+            reference_speaker_name ([type], optional): speaker id of reference waveform. Defaults to None.
+            split_sentences (bool, optional): split the input text into sentences. Defaults to True.
+            sentence_silence (int, optional): silent samples after each sentence. Defaults to `self.sentence_silence`.
+            return_list (bool, optional): return a list of floats as older versions did. Only kept for
+                compatibility; it costs a Python object per sample. Defaults to False.
+            batch_size (int, optional): sentences per forward pass for models that support batching.
+                Defaults to `self.batch_size`.
+            **kwargs: additional arguments to pass to the TTS model.
+        Returns:
+            np.ndarray: float32 waveform (a list if `return_list`).
+        """
+        start_time = time.time()
+        wavs = []
+        if sentence_silence is None:
+            sentence_silence = self.sentence_silence
+        if batch_size is None:
+            batch_size = self.batch_size
+
+        if not text and not reference_wav:
+            raise ValueError(
+                "You need to define either `text` (for sythesis) or a `reference_wav` (for voice conversion) to use the Coqui TTS API."
+            )
+
+        if text:
+            sens = [text]
+            if split_sentences:
+                print(" > Text splitted to sentences.")
+                sens = self.split_into_sentences(text)
+            print(sens)
+
+        speaker_id, speaker_embedding, language_id = self._resolve_speaker_and_language(
+            speaker_name, language_name, speaker_wav, kwargs
+        )
+
+        use_gl, vocoder_device = self._vocoder_device()
+
+        use_batches = (
+            not reference_wav
+            and batch_size > 1
+            and len(sens) > 1
+            and style_wav is None
+            and not kwargs
+            and self.supports_batching()
+        )
+
+        if use_batches:
+            wavs = self._tts_batched(sens, batch_size, speaker_id, speaker_embedding, language_id)
+            wavs = concat_with_silence(wavs, sentence_silence)
+        elif not reference_wav:  # not voice conversion
             for sen in sens:
-                if hasattr(self.tts_model, "synthesize"):
-                    outputs = self.tts_model.synthesize(
-                        text=sen,
-                        config=self.tts_config,
-                        speaker_id=speaker_name,
-                        voice_dirs=self.voice_dir,
-                        d_vector=speaker_embedding,
-                        speaker_wav=speaker_wav,
-                        language=language_name,
-                        **kwargs,
-                    )
-                else:
-                    # synthesize voice
-                    outputs = synthesis(
-                        model=self.tts_model,
-                        text=sen,
-                        CONFIG=self.tts_config,
-                        use_cuda=self.use_cuda,
-                        speaker_id=speaker_id,
-                        style_wav=style_wav,
-                        style_text=style_text,
-                        use_griffin_lim=use_gl,
-                        d_vector=speaker_embedding,
-                        language_id=language_id,
-                    )
-                waveform = outputs["wav"]
-                if not use_gl:
-                    mel_postnet_spec = outputs["outputs"]["model_outputs"][0].detach().cpu().numpy()
-                    # denormalize tts output based on tts audio config
-                    mel_postnet_spec = self.tts_model.ap.denormalize(mel_postnet_spec.T).T
-                    # renormalize spectrogram based on vocoder config
-                    vocoder_input = self.vocoder_ap.normalize(mel_postnet_spec.T)
-                    # compute scale factor for possible sample rate mismatch
-                    scale_factor = [
-                        1,
-                        self.vocoder_config["audio"]["sample_rate"] / self.tts_model.ap.sample_rate,
-                    ]
-                    if scale_factor[1] != 1:
-                        print(" > interpolating tts model output.")
-                        vocoder_input = interpolate_vocoder_input(scale_factor, vocoder_input)
-                    else:
-                        vocoder_input = torch.tensor(vocoder_input).unsqueeze(0)  # pylint: disable=not-callable
-                    # run vocoder model
-                    # [1, T, C]
-                    waveform = self.vocoder_model.inference(vocoder_input.to(vocoder_device))
-                if torch.is_tensor(waveform) and waveform.device != torch.device("cpu") and not use_gl:
-                    waveform = waveform.cpu()
-                if not use_gl:
-                    waveform = waveform.numpy()
-                waveform = waveform.squeeze()
-
-                # trim silence
-                if "do_trim_silence" in self.tts_config.audio and self.tts_config.audio["do_trim_silence"]:
-                    waveform = trim_silence(waveform, self.tts_model.ap)
-
-                wavs += list(waveform)
-                wavs += [0] * 10000
+                waveform = self._synthesize_sentence(
+                    sen,
+                    speaker_name=speaker_name,
+                    language_name=language_name,
+                    speaker_wav=speaker_wav,
+                    style_wav=style_wav,
+                    style_text=style_text,
+                    speaker_id=speaker_id,
+                    speaker_embedding=speaker_embedding,
+                    language_id=language_id,
+                    use_gl=use_gl,
+                    vocoder_device=vocoder_device,
+                    **kwargs,
+                )
+                wavs.append(waveform)
+            wavs = concat_with_silence(wavs, sentence_silence)
         else:
             # get the speaker embedding or speaker id for the reference wav file
             reference_speaker_embedding = None
@@ -495,11 +786,13 @@ class Synthesizer(nn.Module):
                 waveform = waveform.cpu()
             if not use_gl:
                 waveform = waveform.numpy()
-            wavs = waveform.squeeze()
+            wavs = np.asarray(waveform.squeeze(), dtype=np.float32)
 
         # compute stats
         process_time = time.time() - start_time
         audio_time = len(wavs) / self.tts_config.audio["sample_rate"]
         print(f" > Processing time: {process_time}")
         print(f" > Real-time factor: {process_time / audio_time}")
+        if return_list:
+            return wavs.tolist()
         return wavs
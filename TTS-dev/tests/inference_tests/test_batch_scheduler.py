@@ -0,0 +1,144 @@
+import threading
+import time
+import unittest
+
+from TTS.server.batch_scheduler import BatchScheduler
+from TTS.server.worker_pool import PoolUnavailableError, SynthesizerPool
+
+
+class _Replica:
+    def __init__(self):
+        self.batches = []
+
+    def tts_batch(self, texts, speaker_name="", language_name=""):
+        self.batches.append((list(texts), speaker_name))
+        return [f"{speaker_name}:{text}" for text in texts]
+
+
+def _run_concurrently(scheduler, requests):
+    results = [None] * len(requests)
+
+    def run(idx, text, speaker):
+        results[idx] = scheduler.run(text, speaker_name=speaker)
+
+    threads = [threading.Thread(target=run, args=(idx, *request)) for idx, request in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class BatchSchedulerTest(unittest.TestCase):
+    def test_concurrent_requests_share_a_batch(self):
+        pool = SynthesizerPool(_Replica, replicas=1, max_queue=4, timeout=5, threads_per_replica=1)
+        scheduler = BatchScheduler(pool, window=0.2, max_batch_size=4)
+        requests = [(f"text {idx}", "") for idx in range(5)]
+        results = _run_concurrently(scheduler, requests)
+        # every caller gets its own result back
+        self.assertEqual(results, [f":text {idx}" for idx in range(5)])
+        batch_sizes = sorted(len(texts) for texts, _ in pool.replicas[0].batches)
+        self.assertEqual(batch_sizes, [1, 4])
+        metrics = scheduler.metrics()
+        self.assertEqual(metrics["batches"], 2)
+        self.assertEqual(metrics["requests"], 5)
+        self.assertAlmostEqual(metrics["batch_fill_ratio"], (1.0 + 0.25) / 2)
+        self.assertGreaterEqual(metrics["queue_delay_ms"]["max"], 0)
+        scheduler.close()
+        pool.close()
+
+    def test_batches_split_by_speaker_and_tokens(self):
+        pool = SynthesizerPool(_Replica, replicas=1, max_queue=4, timeout=5, threads_per_replica=1)
+        scheduler = BatchScheduler(pool, window=0.2, max_batch_size=8, max_batch_tokens=10)
+        requests = [("aaaa", "a"), ("bbbb", "b"), ("cccc", "a"), ("dddd", "a")]
+        results = _run_concurrently(scheduler, requests)
+        self.assertEqual(results, ["a:aaaa", "b:bbbb", "a:cccc", "a:dddd"])
+        speakers = dict(requests)
+        batches = pool.replicas[0].batches
+        for texts, speaker in batches:
+            self.assertTrue(all(speakers[text] == speaker for text in texts))
+            self.assertLessEqual(sum(len(text) for text in texts), 10)
+        self.assertEqual(sorted(len(texts) for texts, _ in batches), [1, 1, 2])
+        scheduler.close()
+        pool.close()
+
+    def test_errors_reach_every_caller(self):
+        class _Failing(_Replica):
+            def tts_batch(self, texts, speaker_name="", language_name=""):
+                raise ValueError("bad input")
+
+        pool = SynthesizerPool(_Failing, replicas=1, max_queue=4, timeout=5, threads_per_replica=1)
+        scheduler = BatchScheduler(pool, window=0.01)
+        with self.assertRaises(ValueError):
+            scheduler.run("text")
+        scheduler.close()
+        with self.assertRaises(PoolUnavailableError):
+            scheduler.run("closed")
+        pool.close()
+
+    def test_bad_text_fails_only_its_request(self):
+        class _Picky(_Replica):
+            def tts_batch(self, texts, speaker_name="", language_name=""):
+                if "bad" in texts:
+                    raise ValueError("bad input")
+                return super().tts_batch(texts, speaker_name, language_name)
+
+        pool = SynthesizerPool(_Picky, replicas=1, max_queue=4, timeout=5, threads_per_replica=1)
+        scheduler = BatchScheduler(pool, window=0.2, max_batch_size=3)
+        futures = [scheduler.submit(text) for text in ("good", "bad", "fine")]
+        self.assertEqual(futures[0].result(timeout=5), ":good")
+        with self.assertRaises(ValueError):
+            futures[1].result(timeout=5)
+        self.assertEqual(futures[2].result(timeout=5), ":fine")
+        self.assertEqual(scheduler.metrics()["retried_batches"], 1)
+        scheduler.close()
+        pool.close()
+
+    def test_missing_outputs_fail_their_requests(self):
+        class _Short(_Replica):
+            def tts_batch(self, texts, speaker_name="", language_name=""):
+                return super().tts_batch(texts, speaker_name, language_name)[:1]
+
+        pool = SynthesizerPool(_Short, replicas=1, max_queue=4, timeout=5, threads_per_replica=1)
+        scheduler = BatchScheduler(pool, window=0.2, max_batch_size=2)
+        futures = [scheduler.submit(text) for text in ("first", "second")]
+        self.assertEqual(futures[0].result(timeout=5), ":first")
+        with self.assertRaises(RuntimeError):
+            futures[1].result(timeout=5)
+        scheduler.close()
+        pool.close()
+
+    def test_timed_out_requests_leave_the_queue(self):
+        pool = SynthesizerPool(_Replica, replicas=1, max_queue=1, timeout=5, threads_per_replica=1)
+        scheduler = BatchScheduler(pool, window=0.2, max_batch_size=8, max_queue=1)
+        # the request is cancelled while its batch is still open and no longer counts against `max_queue`
+        with self.assertRaises(PoolUnavailableError):
+            scheduler.run("abandoned", timeout=0.05)
+        self.assertEqual(scheduler.queued, 0)
+        self.assertEqual(scheduler.run("next"), ":next")
+        self.assertEqual(scheduler.queued, 0)
+        scheduler.close()
+        pool.close()
+
+    def test_queue_delay_includes_waiting_for_a_replica(self):
+        class _Slow(_Replica):
+            def tts_batch(self, texts, speaker_name="", language_name=""):
+                time.sleep(0.2)
+                return super().tts_batch(texts, speaker_name, language_name)
+
+        pool = SynthesizerPool(_Slow, replicas=1, max_queue=4, timeout=5, threads_per_replica=1)
+        scheduler = BatchScheduler(pool, window=0.0, max_batch_size=1)
+        _run_concurrently(scheduler, [("first", ""), ("second", "")])
+        # the second request waited for the replica to finish the first one
+        self.assertGreaterEqual(scheduler.metrics()["queue_delay_ms"]["max"], 150)
+        scheduler.close()
+        pool.close()
+
+    def test_window_bounds_the_wait(self):
+        pool = SynthesizerPool(_Replica, replicas=1, max_queue=4, timeout=5, threads_per_replica=1)
+        scheduler = BatchScheduler(pool, window=0.05, max_batch_size=8)
+        start = time.monotonic()
+        self.assertEqual(scheduler.run("alone"), ":alone")
+        self.assertLess(time.monotonic() - start, 0.5)
+        scheduler.close()
+        pool.close()
@@ -1,12 +1,17 @@
 import os
 import unittest
 
+import numpy as np
+import torch
 from trainer.io import save_checkpoint
 
 from tests import get_tests_input_path
 from TTS.config import load_config
+from TTS.tts.configs.vits_config import VitsArgs, VitsConfig
 from TTS.tts.models import setup_model
-from TTS.utils.synthesizer import Synthesizer
+from TTS.tts.models.vits import Vits
+from TTS.tts.utils.synthesis import length_buckets, synthesis, synthesis_batch
+from TTS.utils.synthesizer import Synthesizer, concat_with_silence, crossfade_chunks, float_to_int16
 
 
 class SynthesizerTest(unittest.TestCase):
@@ -24,7 +29,69 @@ class SynthesizerTest(unittest.TestCase):
         tts_checkpoint = os.path.join(tts_root_path, "checkpoint_10.pth")
         tts_config = os.path.join(tts_root_path, "dummy_model_config.json")
         synthesizer = Synthesizer(tts_checkpoint, tts_config, None, None)
-        synthesizer.tts("Better this test works!!")
+        wav = synthesizer.tts("Better this test works!!")
+        self.assertIsInstance(wav, np.ndarray)
+        self.assertEqual(wav.dtype, np.float32)
+        self.assertEqual(wav.ndim, 1)
+
+        # two sentences with a configurable pause after each
+        wav = synthesizer.tts("Better this test works. It really does.", sentence_silence=0)
+        self.assertIsInstance(wav, np.ndarray)
+        wav_list = synthesizer.tts("Better this test works!!", return_list=True)
+        self.assertIsInstance(wav_list, list)
+
+    def test_tts_stream(self):
+        self._create_random_model()
+        tts_root_path = get_tests_input_path()
+        tts_checkpoint = os.path.join(tts_root_path, "checkpoint_10.pth")
+        tts_config = os.path.join(tts_root_path, "dummy_model_config.json")
+        synthesizer = Synthesizer(tts_checkpoint, tts_config, None, None)
+        chunks = list(synthesizer.tts_stream("Better this test works. It really does."))
+        self.assertEqual(len(chunks), 2)
+        for chunk in chunks:
+            self.assertEqual(chunk.dtype, np.float32)
+        chunks = list(synthesizer.tts_stream("Better this test works.", dtype="int16"))
+        self.assertEqual(chunks[0].dtype, np.int16)
+
+    def test_concat_with_silence(self):
+        chunks = [np.ones(3, dtype=np.float32), np.full((1, 2), 2.0, dtype=np.float64)]
+        wav = concat_with_silence(chunks, 2)
+        self.assertEqual(wav.dtype, np.float32)
+        np.testing.assert_array_equal(wav, [1, 1, 1, 0, 0, 2, 2, 0, 0])
+        self.assertEqual(len(concat_with_silence([], 5)), 0)
+
+    def test_crossfade_chunks(self):
+        chunks = [np.ones(5), np.full(5, 3.0), np.ones(2)]
+        passthrough = list(crossfade_chunks(chunks, 0))
+        self.assertEqual([len(c) for c in passthrough], [5, 5, 2])
+        blended = np.concatenate(list(crossfade_chunks(chunks, 2)))
+        # each join overlaps two samples
+        self.assertEqual(len(blended), 12 - 2 * 2)
+        np.testing.assert_allclose(blended, [1, 1, 1, 1, 3, 3, 3, 1])
+        np.testing.assert_array_equal(float_to_int16(np.array([-2.0, 0.0, 1.0])), [-32767, 0, 32767])
+
+    def test_length_buckets(self):
+        lengths = [30, 5, 12, 6, 31, 11]
+        buckets = length_buckets(lengths, batch_size=2)
+        self.assertEqual(buckets, [[1, 3], [5, 2], [0, 4]])
+        self.assertEqual(sorted(idx for bucket in buckets for idx in bucket), list(range(len(lengths))))
+        # the padded size limit closes a bucket early
+        self.assertEqual(length_buckets(lengths, batch_size=6, max_tokens=24), [[1, 3], [5, 2], [0], [4]])
+
+    def test_synthesis_batch(self):
+        config = VitsConfig(model_args=VitsArgs(use_sdp=False))
+        model = Vits.init_from_config(config)
+        model.eval()
+        # no sampling noise, so a sentence decodes to the same length alone and in a batch
+        model.inference_noise_scale = 0.0
+        texts = ["Hi.", "This is a somewhat longer sentence.", "Another one."]
+        with torch.no_grad():
+            wavs = synthesis_batch(model, texts, config, use_cuda=False)
+            self.assertEqual(len(wavs), len(texts))
+            for text, wav in zip(texts, wavs):
+                single = synthesis(model, text, config, use_cuda=False)["wav"]
+                self.assertEqual(wav.ndim, 1)
+                self.assertEqual(len(wav), len(single))
 
     def test_split_into_sentences(self):
         """Check demo server sentences split as expected"""
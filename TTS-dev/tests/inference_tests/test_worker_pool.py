@@ -0,0 +1,91 @@
+import threading
+import time
+import unittest
+
+from TTS.server.worker_pool import PoolFullError, PoolUnavailableError, SynthesizerPool
+
+
+class _Replica:
+    def __init__(self):
+        self.calls = 0
+
+    def tts(self, text, delay=0.0):
+        time.sleep(delay)
+        self.calls += 1
+        return text.upper()
+
+
+class SynthesizerPoolTest(unittest.TestCase):
+    def test_replicas_run_in_parallel(self):
+        pool = SynthesizerPool(_Replica, replicas=2, max_queue=4, timeout=5, threads_per_replica=1)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(pool.run(lambda r: r.tts("hi", delay=0.2))))
+            for _ in range(2)
+        ]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLess(time.monotonic() - start, 0.38)
+        self.assertEqual(results, ["HI", "HI"])
+        self.assertEqual([replica.calls for replica in pool.replicas], [1, 1])
+        self.assertEqual(pool.metrics()["completed"], 2)
+        pool.close()
+
+    def test_admission_control(self):
+        pool = SynthesizerPool(_Replica, replicas=1, max_queue=1, timeout=5, threads_per_replica=1)
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking(replica):
+            started.set()
+            release.wait()
+            return replica.tts("done")
+
+        running = pool.submit(blocking)
+        started.wait()
+        queued = pool.submit(lambda r: r.tts("queued"))
+        with self.assertRaises(PoolFullError) as error:
+            pool.submit(lambda r: r.tts("rejected"))
+        self.assertGreaterEqual(error.exception.retry_after, 1)
+        release.set()
+        self.assertEqual(running.result(timeout=5), "DONE")
+        self.assertEqual(queued.result(timeout=5), "QUEUED")
+        self.assertEqual(pool.metrics()["rejected"], 1)
+        pool.close()
+
+    def test_timeout(self):
+        pool = SynthesizerPool(_Replica, replicas=1, max_queue=4, timeout=0.1, threads_per_replica=1)
+        with self.assertRaises(PoolUnavailableError):
+            pool.run(lambda r: r.tts("slow", delay=0.3))
+        # errors raised by the replica reach the caller
+        with self.assertRaises(ZeroDivisionError):
+            pool.run(lambda r: 1 / 0, timeout=1)
+        pool.close()
+        with self.assertRaises(PoolUnavailableError):
+            pool.run(lambda r: r.tts("closed"))
+
+    def test_timed_out_requests_leave_the_queue(self):
+        pool = SynthesizerPool(_Replica, replicas=1, max_queue=1, timeout=5, threads_per_replica=1)
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking(replica):
+            started.set()
+            release.wait()
+            return replica.tts("done")
+
+        running = pool.submit(blocking)
+        started.wait()
+        # the queued request is cancelled and no longer counts against `max_queue`
+        with self.assertRaises(PoolUnavailableError):
+            pool.run(lambda r: r.tts("abandoned"), timeout=0.05)
+        self.assertEqual(pool.queued, 0)
+        queued = pool.submit(lambda r: r.tts("queued"))
+        release.set()
+        self.assertEqual(running.result(timeout=5), "DONE")
+        self.assertEqual(queued.result(timeout=5), "QUEUED")
+        self.assertEqual(pool.queued, 0)
+        pool.close()
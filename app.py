@@ -1,33 +1,175 @@
 # app.py
 import streamlit as st
 import time
-import numpy as np
-import cv2
-from PIL import Image
-from extract_text import extract_text
-from text_to_speech import text_to_speech
+from extract_text import get_ocr_cache, get_ocr_engine
+from ocr_postprocess import get_spell_check_stage
+from audio_server import MIME_TYPES, audio_extension, get_audio_server
+from reading_job import DONE, FAILED, FINISHED_STATES, NO_TEXT, ReadingJob
+from text_to_speech import LocalTTSEngine, get_tts_engine, text_to_speech, warm_up
 import os
-import base64
+
+# --- Fixed voice prompts ---
+WELCOME_TEXT = "ಚಿತ್ರವಾಚಕ ಅಪ್ಲಿಕೇಶನ್‌ಗೆ ಸ್ವಾಗತ. ಚಿತ್ರವನ್ನು ಸೆರೆಹಿಡಿಯಲು ದಯವಿಟ್ಟು ಕೆಳಗಿನ ದೊಡ್ಡ ಕ್ಯಾಮೆರಾ ಬಟನ್ ಒತ್ತಿರಿ."
+PROCESSING_TEXT = "ಚಿತ್ರವನ್ನು ಸೆರೆಹಿಡಿಯಲಾಗಿದೆ, ಈಗ ಪ್ರಕ್ರಿಯೆಗೊಳಿಸಲಾಗುತ್ತಿದೆ."
+NO_TEXT_MESSAGE = "ಕ್ಷಮಿಸಿ, ಚಿತ್ರದಲ್ಲಿ ಯಾವುದೇ ಪಠ್ಯ ಕಂಡುಬಂದಿಲ್ಲ. ದಯವಿಟ್ಟು ಮತ್ತೆ ಪ್ರಯತ್ನಿಸಿ."
+ERROR_TEXT = "ಕ್ಷಮಿಸಿ, ಪ್ರಕ್ರಿಯೆಗೊಳಿಸುವಾಗ ದೋಷ ಕಂಡುಬಂದಿದೆ."
+RESULT_INTRO_TEXT = "ಪಠ್ಯವನ್ನು ಗುರುತಿಸಲಾಗಿದೆ."
+CAMERA_OPEN_TEXT = "ಕ್ಯಾಮೆರಾ ತೆರೆಯಲಾಗುತ್ತಿದೆ. ಚಿತ್ರವನ್ನು ಸೆರೆಹಿಡಿಯಲು ಸಿದ್ಧರಾಗಿ."
+STATIC_PROMPTS = [WELCOME_TEXT, PROCESSING_TEXT, NO_TEXT_MESSAGE, ERROR_TEXT, CAMERA_OPEN_TEXT]
+
+@st.cache_resource(show_spinner=False)
+def warm_up_prompts():
+    """
+    Pre-renders the fixed prompts into the audio cache once per server process.
+    The welcome message is rendered first because it is played immediately;
+    the rest are rendered in the background.
+    """
+    warm_up(STATIC_PROMPTS[:1], lang='kn')
+    return warm_up(STATIC_PROMPTS[1:], lang='kn', background=True)
+
+# Captures larger than this (longer side, in pixels) are decoded at reduced size.
+CAPTURE_MAX_SIDE = 2000
+
+# --- Process-wide resources ---
+# Streamlit re-executes this script on every interaction. The heavy objects
+# below are created once per server process and shared by all sessions; each
+# is re-checked on access and rebuilt if its health check fails.
+
+@st.cache_resource(show_spinner=False)
+def startup_stats():
+    """Load time of each resource and the latency of the first request, per process."""
+    return {"started": time.perf_counter(), "resources": {}, "first_request": None}
+
+def _timed_load(name, loader):
+    start = time.perf_counter()
+    resource = loader()
+    elapsed = time.perf_counter() - start
+    startup_stats()["resources"][name] = elapsed
+    print(f"[INFO] Loaded {name} in {elapsed:.2f}s")
+    return resource
+
+@st.cache_resource(show_spinner=False, validate=lambda engine: engine.is_healthy())
+def load_ocr_engine():
+    """Starts the warm Tesseract worker pool; `ocr_engine` closes it when the process exits."""
+    return _timed_load("OCR engine", get_ocr_engine)
+
+@st.cache_resource(show_spinner=False)
+def load_spell_checker():
+    """Loads the shared SymSpell index once per server process."""
+    return _timed_load("SymSpell index", get_spell_check_stage().preload)
+
+@st.cache_resource(show_spinner=False, validate=lambda engine: engine.is_healthy())
+def load_tts_engine():
+    """Creates the speech engine; a local model is loaded into memory now rather than on first use."""
+    def _load():
+        engine = get_tts_engine()
+        if isinstance(engine, LocalTTSEngine):
+            engine.load()
+        return engine
+    return _timed_load("TTS engine", _load)
+
+@st.cache_resource(show_spinner=False, validate=lambda server: server.is_healthy())
+def load_audio_server():
+    """Adds the routes the browser streams result audio from to the Streamlit server."""
+    return _timed_load("Audio server", get_audio_server)
+
+def load_resources():
+    """Makes sure every shared resource is loaded and healthy; cheap after the first call."""
+    return {
+        "OCR engine": load_ocr_engine(),
+        "SymSpell index": load_spell_checker(),
+        "TTS engine": load_tts_engine(),
+        "Audio server": load_audio_server(),
+    }
+
+def record_request_latency(seconds: float):
+    """Logs the time from capture to audio; the first request after start-up is reported separately."""
+    stats = startup_stats()
+    if stats["first_request"] is None:
+        stats["first_request"] = seconds
+        print(f"[INFO] First interaction latency: {seconds:.2f}s "
+              f"({time.perf_counter() - stats['started']:.1f}s after start-up)")
+    else:
+        print(f"[INFO] Request latency: {seconds:.2f}s")
+
+def show_status(resources):
+    """Resource health and start-up timings, in the (collapsed) sidebar."""
+    stats = startup_stats()
+    with st.sidebar:
+        st.markdown("#### ⚙️ System status")
+        for name, resource in resources.items():
+            healthy = resource.is_healthy() if hasattr(resource, "is_healthy") else resource is not None
+            load_time = stats["resources"].get(name)
+            timing = f" (loaded in {load_time:.2f}s)" if load_time is not None else ""
+            st.caption(f"{'✅' if healthy else '❌'} {name}{timing}")
+        if stats["first_request"] is not None:
+            st.caption(f"⏱️ First request: {stats['first_request']:.2f}s")
+        ocr_cache = get_ocr_cache()
+        if ocr_cache is not None:
+            metrics = ocr_cache.metrics
+            st.caption(f"🗂️ OCR cache: {metrics['hits']} hits, {metrics['misses']} misses, {len(ocr_cache)} pages")
 
 # Helper function to generate and autoplay audio
 def autoplay_audio(audio_bytes: bytes, hidden: bool = False):
     """
-    Generates an HTML audio player that autoplays.
+    Autoplays a finished clip. The bytes are published on the app's own
+    server under their content hash, so the page only carries a URL and a clip
+    the browser has already fetched (such as a fixed prompt) comes from its cache.
     If hidden, the player controls are not shown.
     """
-    b64 = base64.b64encode(audio_bytes).decode()
+    mime_type = MIME_TYPES[audio_extension(audio_bytes)]
+    play_audio_url(load_audio_server().publish(audio_bytes), mime_type, hidden=hidden)
 
-    # Determine style for visibility
+def play_audio_url(url: str, mime_type: str = "audio/mpeg", hidden: bool = False):
+    """
+    Audio player that autoplays from a URL. The browser fetches the audio
+    itself and can start playing before the whole file exists.
+    """
     style = "display:none;" if hidden else "width:100%;"
-
     audio_html = f"""
-        <audio controls autoplay style="{style}">
-          <source src="data:audio/mp3;base64,{b64}" type="audio/mp3">
+        <audio controls autoplay preload="auto" style="{style}">
+          <source src="{url}" type="{mime_type}">
           Your browser does not support the audio element.
         </audio>
         """
     st.components.v1.html(audio_html, height=None if hidden else 50)
 
+@st.fragment(run_every=1.0)
+def job_progress(job: ReadingJob):
+    """
+    Polls the background job once a second and shows the text recognized so
+    far. When the job finishes, the whole page reruns to show the result.
+    """
+    progress = job.progress()
+    if progress["status"] in FINISHED_STATES:
+        st.rerun()
+    st.caption(f"🔄 ಪ್ರಕ್ರಿಯೆಗೊಳಿಸಲಾಗುತ್ತಿದೆ... (Processing: {progress['status']}, {progress['blocks']} block(s) read)")
+    if progress["lines"]:
+        st.info("\n\n".join(progress["lines"]))
+
+def show_job_result(job: ReadingJob):
+    """Final state of a finished job; shown once, then the job is dropped."""
+    progress = job.progress()
+    if progress["first_audio"] is not None:
+        record_request_latency(progress["first_audio"])
+    if progress["status"] == DONE:
+        st.success("✅ ಪಠ್ಯವನ್ನು ಯಶಸ್ವಿಯಾಗಿ ಓದಲಾಗಿದೆ! (Text read successfully!)")
+        if progress["cached"]:
+            st.caption("🗂️ Same page as before; text reused from the OCR cache.")
+        st.download_button(
+            label="📥 ಆಡಿಯೋ ಡೌನ್‌ಲೋಡ್ ಮಾಡಿ (Download Audio)",
+            data=job.audio.getvalue(),
+            file_name=f"kannada_speech.{job.audio_format}",
+            mime=job.audio.mime_type
+        )
+        st.info(f"**ಗುರುತಿಸಲಾದ ಪಠ್ಯ (Recognized Text):**\n\n{job.text}")
+    elif progress["status"] == NO_TEXT:
+        st.warning("⚠️ " + NO_TEXT_MESSAGE)
+        autoplay_audio(text_to_speech(NO_TEXT_MESSAGE, lang='kn'), hidden=True)
+    else:
+        st.error(f"ಒಂದು ದೋಷ ಸಂಭವಿಸಿದೆ: {progress['error']}")
+        autoplay_audio(text_to_speech(ERROR_TEXT, lang='kn'), hidden=True)
+
 def main():
     st.set_page_config(
         page_title="ಚಿತ್ರವಾಚಕ (Chitravachaka)",
@@ -95,6 +237,10 @@ def main():
         unsafe_allow_html=True
     )
 
+    resources = load_resources()
+    warm_up_prompts()
+    show_status(resources)
+
     # --- State Management ---
     if 'view' not in st.session_state:
         st.session_state.view = 'home'  # Can be 'home' or 'camera'
@@ -103,9 +249,8 @@ def main():
 
     # 1. Welcome message on first load
     if 'welcome_played' not in st.session_state:
-        welcome_text = "ಚಿತ್ರವಾಚಕ ಅಪ್ಲಿಕೇಶನ್‌ಗೆ ಸ್ವಾಗತ. ಚಿತ್ರವನ್ನು ಸೆರೆಹಿಡಿಯಲು ದಯವಿಟ್ಟು ಕೆಳಗಿನ ದೊಡ್ಡ ಕ್ಯಾಮೆರಾ ಬಟನ್ ಒತ್ತಿರಿ."
         try:
-            audio_bytes = text_to_speech(welcome_text, lang='kn')
+            audio_bytes = text_to_speech(WELCOME_TEXT, lang='kn')
             autoplay_audio(audio_bytes, hidden=True)
         except Exception as e:
             st.warning(f"Could not play welcome message: {e}")
@@ -138,55 +283,44 @@ def main():
             st.session_state.captured_image = None # Clear the state to avoid reprocessing
 
             # Announce processing
-            processing_text = "ಚಿತ್ರವನ್ನು ಸೆರೆಹಿಡಿಯಲಾಗಿದೆ, ಈಗ ಪ್ರಕ್ರಿಯೆಗೊಳಿಸಲಾಗುತ್ತಿದೆ."
             try:
-                audio_bytes = text_to_speech(processing_text, lang='kn')
+                audio_bytes = text_to_speech(PROCESSING_TEXT, lang='kn')
                 autoplay_audio(audio_bytes, hidden=True)
             except Exception as e:
                 st.warning(f"Could not play processing message: {e}")
 
-            with st.spinner("🔄 ಪ್ರಕ್ರಿಯೆಗೊಳಿಸಲಾಗುತ್ತಿದೆ... (Processing...)"):
-                try:
-                    image = Image.open(image_to_process)
-                    if image.mode != 'RGB':
-                        image = image.convert('RGB')
-                    image_np = np.array(image)
-
-                    # Extract text
-                    extracted_text = extract_text(image_np)
-
-                    if not extracted_text or not extracted_text.strip():
-                        no_text_message = "ಕ್ಷಮಿಸಿ, ಚಿತ್ರದಲ್ಲಿ ಯಾವುದೇ ಪಠ್ಯ ಕಂಡುಬಂದಿಲ್ಲ. ದಯವಿಟ್ಟು ಮತ್ತೆ ಪ್ರಯತ್ನಿಸಿ."
-                        st.warning("⚠️ " + no_text_message)
-                        audio_bytes = text_to_speech(no_text_message, lang='kn')
-                        autoplay_audio(audio_bytes, hidden=True)
-                    else:
-                        st.success("✅ ಪಠ್ಯವನ್ನು ಯಶಸ್ವಿಯಾಗಿ ಓದಲಾಗಿದೆ! (Text read successfully!)")
-                        result_announcement = f"ಪಠ್ಯವನ್ನು ಗುರುತಿಸಲಾಗಿದೆ. {extracted_text}"
-                        audio_bytes = text_to_speech(result_announcement, lang='kn')
-                        
-                        st.markdown("### 🔊 ಫಲಿತಾಂಶವನ್ನು ಆಲಿಸಿ (Listen to the Result)")
-                        autoplay_audio(audio_bytes, hidden=False)
-
-                        st.download_button(
-                            label="📥 ಆಡಿಯೋ ಡೌನ್‌ಲೋಡ್ ಮಾಡಿ (Download Audio)",
-                            data=audio_bytes,
-                            file_name="kannada_speech.mp3",
-                            mime="audio/mpeg"
-                        )
-                        st.info(f"**ಗುರುತಿಸಲಾದ ಪಠ್ಯ (Recognized Text):**\n\n{extracted_text}")
-
-                except Exception as e:
-                    error_message = f"ಒಂದು ದೋಷ ಸಂಭವಿಸಿದೆ: {str(e)}"
-                    st.error(error_message)
-                    audio_bytes = text_to_speech("ಕ್ಷಮಿಸಿ, ಪ್ರಕ್ರಿಯೆಗೊಳಿಸುವಾಗ ದೋಷ ಕಂಡುಬಂದಿದೆ.", lang='kn')
-                    autoplay_audio(audio_bytes, hidden=True)
+            try:
+                # The encoded capture is decoded straight to one grayscale
+                # array in the background job. OCR and speech run there too;
+                # the result is spoken block by block while the rest of the
+                # page is still being read.
+                st.session_state.job = ReadingJob(
+                    image_to_process.getvalue(), spell_check=True, intro_text=RESULT_INTRO_TEXT,
+                    max_side=CAPTURE_MAX_SIDE,
+                ).start()
+            except Exception as e:
+                error_message = f"ಒಂದು ದೋಷ ಸಂಭವಿಸಿದೆ: {str(e)}"
+                st.error(error_message)
+                audio_bytes = text_to_speech(ERROR_TEXT, lang='kn')
+                autoplay_audio(audio_bytes, hidden=True)
+
+        job = st.session_state.get('job')
+        if job is not None:
+            # The player is rendered the same way on every rerun, so it keeps
+            # playing while the progress below updates.
+            if job.progress()["status"] not in (NO_TEXT, FAILED):
+                st.markdown("### 🔊 ಫಲಿತಾಂಶವನ್ನು ಆಲಿಸಿ (Listen to the Result)")
+                play_audio_url(job.audio_url, job.audio.mime_type)
+            if job.finished:
+                show_job_result(job)
+                st.session_state.job = None
+            else:
+                job_progress(job)
 
         # Show the button to open the camera
         if st.button("ಕ್ಯಾಮೆರಾ ತೆರೆಯಿರಿ (Open Camera)", key="open_camera_btn"):
-            camera_open_text = "ಕ್ಯಾಮೆರಾ ತೆರೆಯಲಾಗುತ್ತಿದೆ. ಚಿತ್ರವನ್ನು ಸೆರೆಹಿಡಿಯಲು ಸಿದ್ಧರಾಗಿ."
             try:
-                audio_bytes = text_to_speech(camera_open_text, lang='kn')
+                audio_bytes = text_to_speech(CAMERA_OPEN_TEXT, lang='kn')
                 autoplay_audio(audio_bytes, hidden=True)
             except Exception as e:
                 st.warning(f"Could not play camera open message: {e}")
@@ -0,0 +1,348 @@
+# audio_server.py
+import asyncio
+import gc
+import hashlib
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import streamlit as st
+import tornado.iostream
+import tornado.web
+
+from audio_cache import MemoryLRU
+
+# Audio is served by the Streamlit server itself, under this path below the
+# app's base URL, so the browser fetches it from the same host, port and
+# scheme as the page: it works for remote browsers, phones and HTTPS alike.
+ROUTE_PREFIX = "_audio"
+
+# Finished streams kept around for replays before the oldest are dropped.
+MAX_STREAMS = 64
+
+# Memory for published clips, least recently used dropped first.
+MAX_PUBLISHED_BYTES = 64 * 1024 * 1024
+
+# Published clips never change under their URL, so browsers may keep them for a year.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+MIME_TYPES = {"mp3": "audio/mpeg", "wav": "audio/wav"}
+
+_RANGE = re.compile(r"\s*bytes=(\d*)-(\d*)\s*")
+
+
+def audio_extension(data: bytes) -> str:
+    """File extension for audio bytes: WAV files start with a RIFF header, everything else here is MP3."""
+    return "wav" if data[:4] == b"RIFF" else "mp3"
+
+
+def _parse_range(header: str, length: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single-range `Range: bytes=...` header into an inclusive
+    (start, end) pair. Returns None when the header should be ignored (absent,
+    malformed, or invalid such as `bytes=5-3`; RFC 9110 says to send the whole
+    content then) and (length, length) when the range cannot be satisfied.
+    """
+    match = _RANGE.fullmatch(header)
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes.
+        if int(last) == 0:
+            return length, length
+        start, end = max(0, length - int(last)), length - 1
+    else:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), length - 1) if last else length - 1
+    if start >= length:
+        return length, length
+    return start, end
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class AudioStream:
+    """
+    Audio that is still being produced. A writer thread appends bytes as they
+    are synthesized; every reader gets the data from the start and then waits
+    for more until `finish` is called, so playback can begin with the first
+    chunk. Readers wait on the server's event loop without holding a thread.
+    """
+
+    def __init__(self, mime_type: str = "audio/mpeg"):
+        self.mime_type = mime_type
+        self._chunks = []
+        self._size = 0
+        self._finished = False
+        self._lock = threading.Lock()
+        self._waiters = []  # (event loop, future) of readers waiting for more data
+
+    def _notify(self):
+        for loop, waiter in self._waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                pass  # That reader's event loop is closed.
+        self._waiters = []
+
+    def write(self, data: bytes):
+        if not data:
+            return
+        with self._lock:
+            if self._finished:
+                raise ValueError("❌ Cannot write to a finished audio stream")
+            self._chunks.append(data)
+            self._size += len(data)
+            self._notify()
+
+    def finish(self):
+        with self._lock:
+            self._finished = True
+            self._notify()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return self._size
+
+    async def wait_for(self, size: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until at least `size` bytes are written (or, without `size`,
+        until the stream is finished). Returns False if the timeout ran out.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            with self._lock:
+                if self._finished or (size is not None and self._size >= size):
+                    return True
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                return False
+
+    def chunks(self, start: int = 0) -> List[bytes]:
+        """The chunks written so far, from the `start`-th one on."""
+        with self._lock:
+            return self._chunks[start:]
+
+    def getvalue(self) -> bytes:
+        with self._lock:
+            return b"".join(self._chunks)
+
+
+class _AudioHandler(tornado.web.RequestHandler):
+    """Serves published clips and live streams for `AudioServer`."""
+
+    def initialize(self, owner: "AudioServer", kind: str):
+        self.owner = owner
+        self.kind = kind
+
+    def compute_etag(self) -> Optional[str]:
+        return None  # Clips carry their content hash as ETag; streams must not be cached.
+
+    async def get(self, name: str):
+        if self.kind == "stream":
+            await self._send_stream(name)
+        else:
+            self._send_audio(name)
+
+    head = get  # Tornado drops the body of HEAD responses.
+
+    def _send_audio(self, name: str):
+        data = self.owner.get_published(name)
+        if data is None:
+            raise tornado.web.HTTPError(404)
+        digest, extension = name.split(".")
+        etag = f'"{digest}"'
+        self.set_header("ETag", etag)
+        self.set_header("Cache-Control", IMMUTABLE_CACHE_CONTROL)
+        if etag in self.request.headers.get("If-None-Match", ""):
+            self.set_status(304)
+            self.finish()
+            return
+        self._send_bytes(data, MIME_TYPES[extension])
+
+    def _send_bytes(self, data: bytes, mime_type: str):
+        """Sends complete audio, honouring a `Range` header with a 206 (or 416) response."""
+        length = len(data)
+        byte_range = _parse_range(self.request.headers.get("Range", ""), length)
+        self.set_header("Accept-Ranges", "bytes")
+        if byte_range == (length, length):
+            self.set_status(416)
+            self.clear_header("Cache-Control")
+            self.set_header("Content-Range", f"bytes */{length}")
+            self.finish()
+            return
+        start, end = byte_range or (0, length - 1)
+        self.set_header("Content-Type", mime_type)
+        if byte_range:
+            self.set_status(206)
+            self.set_header("Content-Range", f"bytes {start}-{end}/{length}")
+        self.finish(data[start:end + 1])
+
+    async def _send_stream(self, stream_id: str):
+        """
+        Plays a stream. Without a `Range` header (or with `bytes=0-`) the audio
+        is sent live with chunked encoding while it is written. Players that
+        probe with a bounded range first (iOS Safari asks for `bytes=0-1`) get
+        those bytes as soon as they exist, with the total length still unknown
+        (`*`); any other range is served once the stream is finished.
+        """
+        stream = self.owner.get_stream(stream_id)
+        if stream is None:
+            raise tornado.web.HTTPError(404)
+        timeout = self.owner.stall_timeout
+        self.set_header("Cache-Control", "no-store")
+        match = _RANGE.fullmatch(self.request.headers.get("Range", ""))
+        first, last = match.groups() if match else ("", "")
+        live = not match or (first in ("", "0") and last == "")
+        if match and not live and first and last and not stream.finished:
+            start, end = int(first), int(last)
+            if start <= end:
+                await stream.wait_for(end + 1, timeout=timeout)
+                data = stream.getvalue()
+                if not stream.finished and start < len(data):
+                    end = min(end, len(data) - 1)
+                    self.set_status(206)
+                    self.set_header("Content-Type", stream.mime_type)
+                    self.set_header("Accept-Ranges", "bytes")
+                    self.set_header("Content-Range", f"bytes {start}-{end}/*")
+                    self.finish(data[start:end + 1])
+                    return
+        if stream.finished or (not live and await stream.wait_for(timeout=timeout)):
+            self._send_bytes(stream.getvalue(), stream.mime_type)
+            return
+
+        # No Content-Length: Tornado sends the body with chunked encoding.
+        self.set_header("Content-Type", stream.mime_type)
+        self.set_header("Accept-Ranges", "bytes")
+        if self.request.method == "HEAD":
+            self.finish()
+            return
+        index = sent = 0
+        try:
+            while True:
+                # Read the flag first, so the chunks read after it include everything written before `finish`.
+                finished = stream.finished
+                for chunk in stream.chunks(index):
+                    self.write(chunk)
+                    index += 1
+                    sent += len(chunk)
+                await self.flush()
+                if finished or not await stream.wait_for(sent + 1, timeout=timeout):
+                    break  # Done, or the writer stalled; end the response rather than hang.
+            self.finish()
+        except tornado.iostream.StreamClosedError:
+            pass  # The listener stopped or skipped ahead.
+
+
+def _streamlit_app() -> Optional[tornado.web.Application]:
+    """The Tornado application of the Streamlit server running this process, if any."""
+    for obj in gc.get_referrers(tornado.web.Application):
+        if isinstance(obj, tornado.web.Application):
+            return obj
+    return None
+
+
+class AudioServer:
+    """
+    Lets the browser fetch audio by URL instead of receiving it inlined in the
+    page, from the Streamlit server itself (same origin as the app).
+
+    `<base>/_audio/<sha256>.<ext>` serves finished clips under the hash of their
+    content, with immutable caching headers, ETags and byte ranges, so a clip
+    the browser has seen once (e.g. a fixed prompt) is never downloaded again.
+    `<base>/_audio/stream/<id>` plays an `AudioStream` while it is still being
+    written, using chunked transfer encoding. `start` adds these routes to the
+    running Streamlit server; `publish` and `add_stream` return the URLs.
+    """
+
+    def __init__(self, stall_timeout: float = 120.0):
+        self.stall_timeout = stall_timeout
+        self._streams = OrderedDict()
+        self._published = MemoryLRU(MAX_PUBLISHED_BYTES)
+        self._lock = threading.Lock()
+        self._app = None
+        base = st.get_option("server.baseUrlPath").strip("/")
+        self.base_path = f"/{base}/{ROUTE_PREFIX}" if base else f"/{ROUTE_PREFIX}"
+
+    def start(self, app: Optional[tornado.web.Application] = None) -> "AudioServer":
+        """Adds the audio routes to `app`, by default the running Streamlit server's."""
+        if self._app is not None:
+            return self
+        app = app or _streamlit_app()
+        if app is None:
+            raise RuntimeError("❌ Audio is served by the Streamlit server; start the app with `streamlit run app.py`")
+        # Host rules added later are matched before Streamlit's own routes,
+        # whose catch-all would otherwise answer these paths with index.html.
+        prefix = re.escape(self.base_path)
+        app.add_handlers(r".*", [
+            (rf"{prefix}/stream/([0-9a-f]{{32}})", _AudioHandler, {"owner": self, "kind": "stream"}),
+            (rf"{prefix}/([0-9a-f]{{64}}\.(?:mp3|wav))", _AudioHandler, {"owner": self, "kind": "clip"}),
+        ])
+        self._app = app
+        print(f"[INFO] Serving audio from the Streamlit server under {self.base_path}/")
+        return self
+
+    def is_healthy(self) -> bool:
+        return self._app is not None
+
+    def publish(self, data: bytes, extension: Optional[str] = None) -> str:
+        """Makes a finished clip available under a content-hashed URL and returns the URL."""
+        extension = extension or audio_extension(data)
+        name = f"{hashlib.sha256(data).hexdigest()}.{extension}"
+        if self._published.get(name) is None:
+            self._published.put(name, data)
+        return f"{self.base_path}/{name}"
+
+    def get_published(self, name: str) -> Optional[bytes]:
+        return self._published.get(name)
+
+    def add_stream(self, stream: AudioStream, stream_id: Optional[str] = None) -> str:
+        """Registers a stream and returns the URL it can be played from."""
+        stream_id = stream_id or uuid.uuid4().hex
+        with self._lock:
+            self._streams[stream_id] = stream
+            # Drop the oldest finished streams; ones still being written stay.
+            for old_id in list(self._streams):
+                if len(self._streams) <= MAX_STREAMS:
+                    break
+                if self._streams[old_id].finished:
+                    del self._streams[old_id]
+        return f"{self.base_path}/stream/{stream_id}"
+
+    def get_stream(self, stream_id: str) -> Optional[AudioStream]:
+        with self._lock:
+            return self._streams.get(stream_id)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_audio_server() -> AudioServer:
+    """Process-wide audio server, added to the Streamlit server on first use."""
+    global _server
+    if _server is None:
+        with _server_lock:
+            if _server is None:
+                _server = AudioServer().start()
+    return _server
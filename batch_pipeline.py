@@ -0,0 +1,253 @@
+# batch_pipeline.py
+import glob
+import hashlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from extract_text import get_ocr_engine, ocr_image, preprocess_image
+from ocr_postprocess import get_spell_check_stage
+from text_to_speech import text_to_speech
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp")
+DEFAULT_MANIFEST_NAME = "manifest.jsonl"
+
+_STOP = object()
+
+
+def collect_inputs(source: str) -> List[str]:
+    """
+    Expands a batch source into a sorted list of image paths.
+    The source may be a directory, a glob pattern, or a manifest file listing
+    one image per line (plain text, or JSONL objects with an "image" key).
+    """
+    if os.path.isdir(source):
+        paths = [
+            os.path.join(source, name)
+            for name in os.listdir(source)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        ]
+    elif os.path.isfile(source) and not source.lower().endswith(IMAGE_EXTENSIONS):
+        paths = []
+        base_dir = os.path.dirname(os.path.abspath(source))
+        with open(source, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                path = json.loads(line)["image"] if line.startswith("{") else line
+                if not os.path.isabs(path):
+                    path = os.path.join(base_dir, path)
+                paths.append(path)
+    else:
+        paths = [p for p in glob.glob(source, recursive=True) if p.lower().endswith(IMAGE_EXTENSIONS)]
+
+    if not paths:
+        raise FileNotFoundError(f"❌ No images found for batch source: {source}")
+    return sorted(os.path.abspath(p) for p in paths)
+
+
+def _output_names(paths: List[str]) -> Dict[str, str]:
+    """
+    Maps each input path to a stable output basename. Stems that appear more
+    than once get a short hash of the full path so outputs never collide.
+    """
+    stems = {}
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        stems.setdefault(stem, []).append(path)
+
+    names = {}
+    for stem, group in stems.items():
+        for path in group:
+            if len(group) == 1:
+                names[path] = stem
+            else:
+                digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:8]
+                names[path] = f"{stem}_{digest}"
+    return names
+
+
+class Manifest:
+    """
+    Append-only JSONL log of finished pages. Each line records one image and
+    its outcome, so an interrupted run can skip everything already done.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.completed = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A crash mid-write can leave a partial last line.
+                    if record.get("status") == "done":
+                        self.completed.add(record["image"])
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, entry: dict):
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        if entry.get("status") == "done":
+            self.completed.add(entry["image"])
+
+    def close(self):
+        self._file.close()
+
+
+class _Stage:
+    """
+    A pool of worker threads reading from one bounded queue and writing to the next.
+    Items that already carry an error are passed through untouched.
+    """
+
+    def __init__(self, name: str, func: Callable[[dict], None], workers: int, inbox: queue.Queue, outbox: queue.Queue):
+        self.name = name
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self._remaining = workers
+        self._lock = threading.Lock()
+        self.threads = [
+            threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True) for i in range(workers)
+        ]
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def _run(self):
+        while True:
+            item = self.inbox.get()
+            if item is _STOP:
+                # Put the sentinel back for sibling workers; the last one forwards it.
+                self.inbox.put(_STOP)
+                with self._lock:
+                    self._remaining -= 1
+                    last = self._remaining == 0
+                if last:
+                    self.outbox.put(_STOP)
+                return
+            if "error" not in item:
+                start = time.perf_counter()
+                try:
+                    self.func(item)
+                except Exception as e:
+                    item["error"] = f"{self.name}: {e}"
+                    item.pop("image_data", None)
+                item["timings"][self.name] = round(time.perf_counter() - start, 4)
+            self.outbox.put(item)
+
+
+def run_batch(
+    source: str,
+    output_dir: str,
+    manifest_path: Optional[str] = None,
+    lang: str = "kan",
+    tts_lang: str = "kn",
+    preprocess_workers: int = 2,
+    ocr_workers: int = 2,
+    tts_workers: int = 4,
+    queue_size: int = 8,
+    spell_check: bool = False,
+    ocr_backend: Optional[str] = None,
+    on_result: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Runs preprocessing, OCR and speech synthesis over many images as three
+    pipelined stages connected by bounded queues.
+
+    For every image the recognized text and the MP3 are written to `output_dir`,
+    and a line is appended to the JSONL manifest. Images already marked as done
+    in the manifest are skipped, so rerunning the same command resumes the batch.
+    `ocr_backend` picks the OCR engine ("tesseract" or "surya").
+    Returns a summary with counts of processed, skipped and failed images.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = Manifest(manifest_path or os.path.join(output_dir, DEFAULT_MANIFEST_NAME))
+
+    paths = collect_inputs(source)
+    names = _output_names(paths)
+    pending = [p for p in paths if p not in manifest.completed]
+    summary = {"total": len(paths), "skipped": len(paths) - len(pending), "done": 0, "failed": 0}
+    if not pending:
+        manifest.close()
+        return summary
+
+    # Start the OCR workers once, sized to the stage, before any page arrives.
+    get_ocr_engine(lang, num_workers=ocr_workers, backend=ocr_backend)
+    if spell_check:
+        get_spell_check_stage().preload()
+
+    def preprocess(item):
+        item["image_data"] = preprocess_image(item["image"])
+
+    def ocr(item):
+        item["text"] = ocr_image(item.pop("image_data"), lang=lang, spell_check=spell_check, backend=ocr_backend)
+        with open(item["text_file"], "w", encoding="utf-8") as f:
+            f.write(item["text"])
+
+    def synthesize(item):
+        if item["text"]:
+            text_to_speech(item["text"], lang=tts_lang, filename=item["audio_file"])
+        else:
+            item["audio_file"] = None
+
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(4)]
+    stages = [
+        _Stage("preprocess", preprocess, preprocess_workers, queues[0], queues[1]),
+        _Stage("ocr", ocr, ocr_workers, queues[1], queues[2]),
+        _Stage("tts", synthesize, tts_workers, queues[2], queues[3]),
+    ]
+    for stage in stages:
+        stage.start()
+
+    def feed(items: Iterable[str]):
+        for path in items:
+            base = os.path.join(output_dir, names[path])
+            queues[0].put({
+                "image": path,
+                "text_file": base + ".txt",
+                "audio_file": base + ".mp3",
+                "timings": {},
+            })
+        queues[0].put(_STOP)
+
+    feeder = threading.Thread(target=feed, args=(pending,), name="batch-feeder", daemon=True)
+    feeder.start()
+
+    try:
+        while True:
+            item = queues[3].get()
+            if item is _STOP:
+                break
+            entry = {
+                "image": item["image"],
+                "status": "failed" if "error" in item else "done",
+                "text_file": item["text_file"] if "text" in item else None,
+                "audio_file": item.get("audio_file") if "error" not in item else None,
+                "timings": item["timings"],
+            }
+            if "error" in item:
+                entry["error"] = item["error"]
+                summary["failed"] += 1
+                print(f"[ERROR] ❌ {item['image']}: {item['error']}", file=sys.stderr)
+            else:
+                summary["done"] += 1
+            manifest.record(entry)
+            if on_result:
+                on_result(entry)
+    finally:
+        manifest.close()
+
+    return summary
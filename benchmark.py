@@ -0,0 +1,292 @@
+# benchmark.py
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+BASE_PATH = os.path.dirname(os.path.abspath(__file__))
+
+# Fixed corpus, so runs on different commits measure the same work.
+BENCH_IMAGES = [os.path.join(BASE_PATH, "image.png"), os.path.join(BASE_PATH, "image2.jpg")]
+BENCH_TEXTS = [
+    "ಒಂದಾನೊಂದು ಕಾಲದಲ್ಲಿ, ಎತ್ತರವಾದ ಮರವೊಂದರ ತುದಿಯಲ್ಲಿ, ಒಂದು ಸುಂದರವಾದ ಹೆಣ್ಣು ಗಿಳಿ ತನ್ನ ಅವಳಿ ಜವಳಿ ಮರಿಗಳೊಂದಿಗೆ ವಾಸವಾಗಿತ್ತು.",
+    "ಒಮ್ಮೆ ತಾಯಿ ಗಿಳಿ ಆಹಾರವನ್ನು ಹುಡುಕಿಕೊಂಡು ಆಚೆ ಹೋಗಿದ್ದಾಗ, ಒಬ್ಬ ಬೇಟೆಗಾರ ಮರ ಹತ್ತಿ ಗಿಳಿ ಮರಿಗಳನ್ನು ಹಿಡಿದುಕೊಂಡನು.",
+    "ಕನ್ನಡ ಭಾಷೆಯು ದಕ್ಷಿಣ ಭಾರತದ ಪ್ರಮುಖ ಭಾಷೆಗಳಲ್ಲಿ ಒಂದಾಗಿದೆ.",
+    # Raw OCR output with the kind of errors spell correction has to fix.
+    "ಒ 🔾 ದಾನೊಂದು ಕಾಲದಲ್ಲಿ, ಎತ್ತರವಾದ ಮರವೊಂದರ ತುದಿಯಲ್ಲಿ, ಒಂದು ಸುಂದರವಾದ ಹೆಣ್ಣು ಗಿಳಿ ತನ್ನ ಅವಳಿ",
+]
+
+DEFAULT_OUTPUT = os.path.join(BASE_PATH, "benchmark_results.json")
+
+
+def _current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, or None if it cannot be read."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+
+class _PeakRSS:
+    """Samples the process RSS on a background thread and keeps the maximum seen."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = _current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = _current_rss()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+    def __enter__(self):
+        if self.peak is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        rss = _current_rss()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+
+def measure(func: Callable, inputs: List, repeat: int = 5, warmup: int = 1) -> dict:
+    """
+    Calls `func` on every input `repeat` times (after `warmup` untimed rounds)
+    and returns latency percentiles in milliseconds, throughput in items per
+    second and the peak RSS seen while it ran.
+    """
+    for _ in range(warmup):
+        for item in inputs:
+            func(item)
+    gc.collect()
+
+    latencies = []
+    with _PeakRSS() as rss:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for item in inputs:
+                t0 = time.perf_counter()
+                func(item)
+                latencies.append(time.perf_counter() - t0)
+        total = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    return {
+        "runs": len(latencies),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "throughput_per_s": round(len(latencies) / total, 3) if total else None,
+        "peak_rss_mb": round(rss.peak / 2**20, 1) if rss.peak is not None else None,
+    }
+
+
+def _stages(images: List[str], texts: List[str], spell_check: bool, ocr_backend: Optional[str]) -> Dict[str, tuple]:
+    """
+    The benchmarked stages as name → (setup, inputs). `setup` imports what the
+    stage needs and returns the function to time; it may raise ImportError or
+    OSError, in which case the stage is reported as skipped.
+    """
+    def setup_preprocess():
+        from preprocess import default_pipeline, load_gray
+        pipeline = default_pipeline()
+        return lambda path: pipeline(load_gray(path))
+
+    def setup_ocr():
+        from extract_text import get_ocr_engine, ocr_image, preprocess_image
+        get_ocr_engine(backend=ocr_backend)
+        pages = {path: preprocess_image(path) for path in images}
+        return lambda path: ocr_image(pages[path], backend=ocr_backend)
+
+    def setup_spell():
+        from spell_checker import SpellCorrector, get_symspell
+        sym_spell = get_symspell()
+        # A fresh corrector per call, so repeats measure lookups rather than
+        # hits in the memo that `correct_spelling` keeps.
+        return lambda text: SpellCorrector(sym_spell).correct(text)
+
+    def setup_transliterate():
+        from word_roman_mod import to_roman, to_uni
+        return lambda text: [to_uni(to_roman(word)) for word in text.split()]
+
+    def setup_tts():
+        from text_to_speech import text_to_speech
+        return lambda text: text_to_speech(text, lang="kn", cache=None)
+
+    def setup_end_to_end():
+        from extract_text import extract_text
+        from text_to_speech import text_to_speech
+
+        def run(path):
+            text = extract_text(path, spell_check=spell_check, cache=False, backend=ocr_backend)
+            if text:
+                text_to_speech(text, lang="kn", cache=None)
+        return run
+
+    return {
+        "preprocess": (setup_preprocess, images),
+        "ocr": (setup_ocr, images),
+        "spell_check": (setup_spell, texts),
+        "transliterate": (setup_transliterate, texts),
+        "tts": (setup_tts, texts),
+        "end_to_end": (setup_end_to_end, images),
+    }
+
+
+def _environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_PATH, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def run_benchmarks(
+    stages: Optional[List[str]] = None,
+    images: Optional[List[str]] = None,
+    texts: Optional[List[str]] = None,
+    repeat: int = 5,
+    warmup: int = 1,
+    tts_engine: str = "silent",
+    spell_check: bool = True,
+    ocr_backend: Optional[str] = None,
+) -> dict:
+    """
+    Runs the selected stages (all by default) over the fixed corpus and returns
+    the results as a JSON-serializable dict. With tts_engine="silent" speech is
+    replaced by the offline stub, so the run needs no network or model.
+    """
+    from text_to_speech import configure_tts
+
+    images = images or BENCH_IMAGES
+    texts = texts or BENCH_TEXTS
+    missing = [path for path in images if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(f"❌ Benchmark image not found: {missing[0]}")
+    if tts_engine != "env":
+        configure_tts(tts_engine)
+
+    available = _stages(images, texts, spell_check, ocr_backend)
+    unknown = set(stages or []) - set(available)
+    if unknown:
+        raise ValueError(f"❌ Unknown benchmark stage(s): {', '.join(sorted(unknown))}. Choose from: {', '.join(available)}")
+
+    results = {}
+    for name, (setup, inputs) in available.items():
+        if stages and name not in stages:
+            continue
+        try:
+            func = setup()
+        except (ImportError, OSError) as e:
+            print(f"[WARN] Skipping '{name}': {e}", file=sys.stderr)
+            results[name] = {"skipped": str(e)}
+            continue
+        print(f"[INFO] Benchmarking '{name}' ({len(inputs)} inputs x {repeat})...")
+        results[name] = measure(func, inputs, repeat=repeat, warmup=warmup)
+
+    return {
+        "environment": _environment(),
+        "config": {
+            "repeat": repeat,
+            "warmup": warmup,
+            "tts_engine": tts_engine,
+            "spell_check": spell_check,
+            "ocr_backend": ocr_backend,
+            "images": [os.path.relpath(path, BASE_PATH) for path in images],
+            "texts": len(texts),
+        },
+        "stages": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.2) -> List[str]:
+    """Stages whose p50 or p95 latency grew by more than `threshold` (a fraction) over the baseline."""
+    regressions = []
+    for name, current in results["stages"].items():
+        before = baseline.get("stages", {}).get(name, {})
+        for metric in ("p50_ms", "p95_ms"):
+            if metric in current and before.get(metric):
+                change = current[metric] / before[metric] - 1
+                if change > threshold:
+                    regressions.append(f"{name} {metric}: {before[metric]} → {current[metric]} (+{change:.0%})")
+    return regressions
+
+
+def _print_table(results: dict):
+    print(f"{'stage':<14} {'p50 ms':>10} {'p95 ms':>10} {'items/s':>10} {'peak RSS MB':>12}")
+    for name, stats in results["stages"].items():
+        if "skipped" in stats:
+            print(f"{name:<14} {'skipped':>10}")
+            continue
+        print(f"{name:<14} {stats['p50_ms']:>10.2f} {stats['p95_ms']:>10.2f} "
+              f"{stats['throughput_per_s']:>10.2f} {stats['peak_rss_mb'] or 0:>12.1f}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure latency, throughput and memory of the image → speech pipeline.")
+    parser.add_argument("--stage", action="append", dest="stages", help="Stage to run (repeatable; default: all).")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed rounds over the corpus (default: 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed rounds before measuring (default: 1)")
+    parser.add_argument("--tts", default="silent", help='TTS engine: "silent" (offline stub, default), "gtts", "local", or "env" for TTS_ENGINE.')
+    parser.add_argument("--no-spell-check", action="store_true", help="Run end-to-end without spell correction.")
+    parser.add_argument("--ocr-backend", help="OCR engine for the OCR and end-to-end stages.")
+    parser.add_argument("--output", "-o", default=DEFAULT_OUTPUT, help="Where to write the JSON results.")
+    parser.add_argument("--baseline", help="Earlier results to compare against; exits with 1 on a regression.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed latency growth over the baseline (default: 0.2)")
+    args = parser.parse_args()
+
+    try:
+        results = run_benchmarks(
+            stages=args.stages,
+            repeat=args.repeat,
+            warmup=args.warmup,
+            tts_engine=args.tts,
+            spell_check=not args.no_spell_check,
+            ocr_backend=args.ocr_backend,
+        )
+    except (FileNotFoundError, ValueError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    _print_table(results)
+    print(f"[SUCCESS] ✅ Results written to '{args.output}'")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"[WARN] Regression: {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
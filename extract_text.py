@@ -1,11 +1,17 @@
 import pytesseract
-from PIL import Image
 import os
 import shutil
 import sys
-import cv2
+import threading
 import numpy as np
-from typing import Union
+from typing import Iterator
+from lexicon import USER_WORDS_PATH, ensure_lexicon
+from ocr_cache import OCRCache
+from ocr_document import OCRDocument
+from ocr_engine import DEFAULT_BACKEND, get_engine
+from preprocess import ImageSource, default_pipeline, load_gray
+from text_regions import crop_regions, detect_text_regions, region_origin
+from ocr_postprocess import get_spell_check_stage, words_to_text
 
 
 # --- Tesseract Configuration ---
@@ -32,74 +38,144 @@ def configure_tesseract(tesseract_cmd_path=None):
         )
     _TESSERACT_CONFIGURED = True
 
-# --- Wordlist Preparation for Kannada ---
-WORDLIST_SOURCE = "kannada_wordList_with_freq.txt"
-TESSERACT_WORDLIST = "kannada_words.txt"
-
-if not os.path.exists(TESSERACT_WORDLIST) and os.path.exists(WORDLIST_SOURCE):
-    print(f"[INFO] One-time setup: Preparing Tesseract wordlist from '{WORDLIST_SOURCE}'...")
-    try:
-        with open(WORDLIST_SOURCE, "r", encoding="utf-8") as f_in, \
-             open(TESSERACT_WORDLIST, "w", encoding="utf-8") as f_out:
-            for line in f_in:
-                word = line.strip().split(" ")[0]
-                if word:
-                    f_out.write(word + "\n")
-        print(f"[INFO] Wordlist '{TESSERACT_WORDLIST}' created successfully.")
-    except Exception as e:
-        print(f"[ERROR] Failed to create Tesseract wordlist: {e}", file=sys.stderr)
-
-def extract_text(image_source: Union[str, np.ndarray, Image.Image], lang: str = "kan") -> str:
-    """
-    Extract text from an image using Tesseract OCR.
-    Accepts a file path, a NumPy array, or a PIL Image object.
-    Uses a custom wordlist for Kannada to improve accuracy.
-    """
-    configure_tesseract()  # Ensure Tesseract is configured before use
-
-    img = None
-    if isinstance(image_source, str):
-        if not os.path.exists(image_source):
-            raise FileNotFoundError(f"❌ Image not found: {image_source}")
-        img = Image.open(image_source)
-    elif isinstance(image_source, np.ndarray):
-        # pytesseract can handle numpy arrays, but let's ensure it's a PIL Image
-        # for consistent preprocessing.
-        img = Image.fromarray(image_source)
-    elif isinstance(image_source, Image.Image):
-        # It's already a PIL Image
-        img = image_source
-    else:
-        raise TypeError(f"Unsupported image source type: {type(image_source)}")
+# Tesseract user-words file, produced by `python lexicon.py` (or on first use).
+TESSERACT_WORDLIST = USER_WORDS_PATH
 
-    # --- Robust Image Pre-processing for better OCR ---
-    # 1. Convert to grayscale PIL image, then to numpy array for OpenCV processing.
-    img_gray = img.convert('L')
-    img_np = np.array(img_gray)
-
-    # 2. Denoise the image. This is particularly useful for camera-captured images
-    #    which may have digital noise. A median blur is effective at removing
-    #    salt-and-pepper noise while preserving edges, which is crucial for OCR.
-    #    A kernel size of 3 is a safe choice.
-    img_denoised = cv2.medianBlur(img_np, 3)
-
-    # 3. Binarize the image using adaptive thresholding. This is more robust
-    #    to varying lighting conditions than a fixed global threshold, which is
-    #    especially important for camera-captured images.
-    img_binary = cv2.adaptiveThreshold(
-        img_denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+_PREPROCESS = default_pipeline()
+
+# --- OCR Result Cache ---
+# Results are cached by a thumbnail of the grayscale page, so the same page
+# read again (even from a new capture) returns the earlier text without
+# preprocessing or OCR.
+OCR_CACHE_PATH = os.environ.get(
+    "OCR_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".ocr_cache.jsonl")
+)
+_ocr_cache = None
+_ocr_cache_configured = False
+_ocr_cache_lock = threading.Lock()
+
+def set_ocr_cache(cache):
+    """
+    Replace the process-wide OCR cache. Pass None to disable caching.
+    Any object with the `OCRCache` interface can be used.
+    """
+    global _ocr_cache, _ocr_cache_configured
+    with _ocr_cache_lock:
+        _ocr_cache = cache
+        _ocr_cache_configured = True
+
+def get_ocr_cache():
+    """Return the process-wide OCR cache, loading it from disk on first use (None when disabled)."""
+    global _ocr_cache, _ocr_cache_configured
+    if not _ocr_cache_configured:
+        with _ocr_cache_lock:
+            if not _ocr_cache_configured:
+                _ocr_cache = OCRCache(path=OCR_CACHE_PATH)
+                _ocr_cache_configured = True
+    return _ocr_cache
+
+def ocr_cache_options(spell_check: bool, backend: str = None) -> str:
+    """Part of the OCR cache key for settings that change the recognized text."""
+    backend = backend or DEFAULT_BACKEND
+    options = [] if backend == "tesseract" else [backend]
+    if spell_check:
+        options.append("spell")
+    return ",".join(options)
+
+def get_ocr_engine(lang: str = "kan", num_workers: int = None, backend: str = None):
+    """
+    Returns the warm OCR engine shared by the CLI and the Streamlit app.
+    The engine is created on first use and configured for the given language;
+    `num_workers` only takes effect on that first call.
+    `backend` picks the engine ("tesseract" or "surya"); it defaults to the
+    OCR_BACKEND environment variable, or Tesseract.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend != "tesseract":
+        return get_engine(lang=lang, backend=backend)
+    configure_tesseract()
+    if lang == "kan":
+        try:
+            ensure_lexicon(TESSERACT_WORDLIST)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Could not build '{TESSERACT_WORDLIST}': {e}", file=sys.stderr)
+    return get_engine(
+        lang=lang,
+        backend=backend,
+        num_workers=num_workers,
+        oem=3,
+        psm=4,
+        user_words=TESSERACT_WORDLIST if lang == "kan" else None,
+        tesseract_cmd=pytesseract.pytesseract.tesseract_cmd,
     )
 
-    # --- Tesseract Configuration for better accuracy ---
-    # --psm 4: Assume a single column of text of variable sizes. This is often
-    # more robust than psm 6 for images with paragraph or line breaks, and can
-    # help prevent the last line from being skipped.
-    custom_config = r'--oem 3 --psm 4'
-    if lang == "kan" and os.path.exists(TESSERACT_WORDLIST):
-        custom_config += f' --user-words "{TESSERACT_WORDLIST}"'
+def preprocess_image(image_source: ImageSource, max_side: int = None) -> np.ndarray:
+    """
+    Load an image and binarize it for OCR.
+    Accepts a file path, encoded image bytes, a NumPy array, or a PIL Image
+    object and returns the binarized grayscale image as a NumPy array.
+    Paths and bytes are decoded straight to grayscale; with max_side, large
+    images are decoded at reduced size (see `preprocess.decode_gray`).
+    """
+    # --- Robust Image Pre-processing for better OCR ---
+    # The image is loaded straight into one grayscale NumPy buffer, scaled so the
+    # text is about the size Tesseract works best at, median-blurred to remove
+    # camera noise and binarized with an adaptive threshold that copes with
+    # uneven lighting. Large images are processed in parallel tiles.
+    return _PREPROCESS(load_gray(image_source, max_side))
 
-    # OCR
-    text = pytesseract.image_to_string(img_binary, lang=lang, config=custom_config)
+def _recognize_words(engine, img_binary: np.ndarray, regions):
+    """
+    Word-level OCR of the page or of each region, with region words moved back
+    to page coordinates and given block numbers unique across regions.
+    """
+    if not regions:
+        return engine.recognize_words(img_binary, psm=4)
+    crops = crop_regions(img_binary, regions)
+    results = engine.recognize_words_many(crops, psm=[r.psm for r in regions])
+    words = []
+    for index, (region, region_words) in enumerate(zip(regions, results)):
+        dx, dy = region_origin(region)
+        for word in region_words:
+            words.append(word._replace(
+                left=word.left + dx, top=word.top + dy, block=(index + 1) * 1000 + word.block
+            ))
+    return words
+
+def ocr_image(img_binary: np.ndarray, lang: str = "kan", use_regions: bool = True, spell_check: bool = False,
+              backend: str = None) -> str:
+    """
+    Run OCR on an image that has already been through `preprocess_image`.
+    With use_regions, text blocks are detected first and each block is OCR'd
+    on its own, in parallel, so Tesseract skips backgrounds and pictures.
+    With spell_check, words Tesseract is not confident about are corrected
+    against the Kannada dictionary.
+    `backend` selects the OCR engine; engines that find text lines themselves
+    (Surya) always get the whole page.
+    Returns the stripped text, or an empty string if nothing was recognized.
+    """
+    # OCR runs on the shared engine, whose workers already have the language
+    # model and the wordlist loaded.
+    engine = get_ocr_engine(lang, backend=backend)
+
+    regions = detect_text_regions(img_binary) if use_regions and engine.uses_regions else []
+    if spell_check:
+        # Word-level results carry Tesseract's confidences, so the corrector
+        # only has to look at the uncertain words.
+        words = get_spell_check_stage()(_recognize_words(engine, img_binary, regions))
+        text = words_to_text(words)
+    elif regions:
+        # Each block uses its own page segmentation mode (single line or
+        # uniform block); results are joined back in reading order.
+        crops = crop_regions(img_binary, regions)
+        texts = engine.recognize_many(crops, psm=[r.psm for r in regions])
+        text = "\n".join(t.strip() for t in texts if t.strip())
+    else:
+        # --- Tesseract Configuration for better accuracy ---
+        # --psm 4: Assume a single column of text of variable sizes. This is often
+        # more robust than psm 6 for images with paragraph or line breaks, and can
+        # help prevent the last line from being skipped.
+        text = engine.recognize(img_binary, psm=4)
 
     text = text.strip()
     if not text:
@@ -107,3 +183,80 @@ def extract_text(image_source: Union[str, np.ndarray, Image.Image], lang: str =
         return ""
 
     return text
+
+def ocr_document(img_binary: np.ndarray, lang: str = "kan", use_regions: bool = True, spell_check: bool = False,
+                 backend: str = None) -> OCRDocument:
+    """
+    Structured variant of `ocr_image`: returns the page as blocks, lines and
+    words with bounding boxes and confidences, from the same single OCR pass
+    (Tesseract's word-level `image_to_data` output). Its `.text` is the plain
+    text `ocr_image` would return with spell_check.
+    """
+    engine = get_ocr_engine(lang, backend=backend)
+    regions = detect_text_regions(img_binary) if use_regions and engine.uses_regions else []
+    words = _recognize_words(engine, img_binary, regions)
+    if spell_check:
+        words = get_spell_check_stage()(words)
+    return OCRDocument.from_words(words)
+
+def ocr_image_iter(img_binary: np.ndarray, lang: str = "kan", spell_check: bool = False,
+                   backend: str = None) -> Iterator[str]:
+    """
+    Progressive variant of `ocr_image` for callers that want to use the text
+    before the whole page is done (e.g. to start speaking it).
+    All detected blocks are queued on the OCR engine at once; the text of each
+    block is yielded in reading order as soon as it and the blocks before it
+    are recognized. Pages without detectable blocks are OCR'd in one piece.
+    """
+    engine = get_ocr_engine(lang, backend=backend)
+    regions = detect_text_regions(img_binary) if engine.uses_regions else []
+    if not regions:
+        text = ocr_image(img_binary, lang=lang, use_regions=False, spell_check=spell_check, backend=backend)
+        if text:
+            yield text
+        return
+
+    crops = crop_regions(img_binary, regions)
+    for words in engine.recognize_words_iter(crops, psm=[r.psm for r in regions]):
+        if spell_check:
+            words = get_spell_check_stage()(words)
+        text = words_to_text(words).strip()
+        if text:
+            yield text
+
+def extract_text(image_source: ImageSource, lang: str = "kan", spell_check: bool = False, cache=False,
+                 backend: str = None) -> str:
+    """
+    Extract text from an image using Tesseract OCR (or another `backend`).
+    Accepts a file path, encoded image bytes, a NumPy array, or a PIL Image object.
+    Uses a custom wordlist for Kannada to improve accuracy, and optionally
+    spell-corrects low-confidence words (Kannada only).
+    With cache=True, a page read before is answered from the OCR cache,
+    looked up before the image is preprocessed.
+    """
+    spell_check = spell_check and lang == "kan"
+    gray = load_gray(image_source)
+    ocr_cache = get_ocr_cache() if cache else None
+    if ocr_cache is None:
+        return ocr_image(preprocess_image(gray), lang=lang, spell_check=spell_check, backend=backend)
+
+    options = ocr_cache_options(spell_check, backend)
+    signature = ocr_cache.signature(gray)
+    cached = ocr_cache.get(signature, lang, options)
+    if cached is not None:
+        print(f"[INFO] OCR cache hit (difference {cached.difference:.2f})")
+        return cached.text
+    text = ocr_image(preprocess_image(gray), lang=lang, spell_check=spell_check, backend=backend)
+    if text:
+        ocr_cache.put(signature, lang, [text], options)
+    return text
+
+def extract_document(image_source: ImageSource, lang: str = "kan", spell_check: bool = False,
+                     backend: str = None) -> OCRDocument:
+    """
+    Like `extract_text`, but returns an `OCRDocument` with every word's box and
+    confidence, so callers can skip uncertain lines or work line by line.
+    The OCR cache holds text only, so this always runs OCR.
+    """
+    spell_check = spell_check and lang == "kan"
+    return ocr_document(preprocess_image(image_source), lang=lang, spell_check=spell_check, backend=backend)
@@ -0,0 +1,218 @@
+# lexicon.py
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+BASE_PATH = os.path.dirname(os.path.abspath(__file__))
+SOURCE_PATH = os.path.join(BASE_PATH, "kannada_wordList_with_freq.txt")
+
+# Artifacts derived from the frequency list.
+USER_WORDS_PATH = os.path.join(BASE_PATH, "kannada_words.txt")          # Tesseract --user-words
+CLEANED_DICT_PATH = os.path.join(BASE_PATH, "cleaned_kannada_dict.txt")  # SymSpell "word count" list
+TRANSLITERATION_PATH = os.path.join(BASE_PATH, "kannada_roman.tsv")      # word <TAB> roman form
+MANIFEST_PATH = os.path.join(BASE_PATH, "lexicon_manifest.json")
+
+# Bump when the way any artifact is derived changes, so existing ones are rebuilt.
+_BUILD_VERSION = 2
+
+_ZWNJ = "\u200c"
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_entries(source_path: str = SOURCE_PATH) -> List[Tuple[str, str]]:
+    """
+    Parses the frequency list into (word, count) pairs. Lines may separate the
+    two with a comma, a dash or whitespace; lines without a numeric count are
+    skipped. Words are kept exactly as written, ZWNJ included.
+    """
+    entries = []
+    with open(source_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if "," in line:
+                word, freq = line.split(",", 1)
+            elif "-" in line:
+                word, freq = line.split("-", 1)
+            else:
+                parts = line.split(None, 1)
+                if len(parts) != 2:
+                    continue
+                word, freq = parts
+            word = word.strip()
+            freq = freq.strip()
+            if word and freq.isdigit():
+                entries.append((word, freq))
+    return entries
+
+
+def _write_lines(path: str, lines):
+    """Writes lines to `path` atomically, so readers never see a half-written file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+        for line in lines:
+            f.write(line + "\n")
+    os.replace(tmp_path, path)
+
+
+def _build_user_words(entries, path):
+    _write_lines(path, (word for word, _ in entries))
+
+
+def _build_cleaned_dict(entries, path):
+    # SymSpell matches OCR output, which rarely keeps the invisible ZWNJ.
+    _write_lines(path, (f"{word.replace(_ZWNJ, '')} {freq}" for word, freq in entries))
+
+
+def _build_transliterations(entries, path):
+    from word_roman_mod import to_roman
+
+    words = [word for word, _ in entries]
+    _write_lines(path, (f"{word}\t{roman}" for word, roman in zip(words, map(to_roman, words))))
+
+
+def _build_symspell_index(entries, path):
+    # The index is built from the cleaned dictionary, which is written first.
+    from spell_checker import build_index
+
+    build_index(CLEANED_DICT_PATH, path)
+
+
+def _artifacts() -> Dict[str, Tuple[str, object]]:
+    from spell_checker import INDEX_PATH
+
+    # Order matters: the SymSpell index reads the cleaned dictionary.
+    return {
+        "user_words": (USER_WORDS_PATH, _build_user_words),
+        "cleaned_dict": (CLEANED_DICT_PATH, _build_cleaned_dict),
+        "transliterations": (TRANSLITERATION_PATH, _build_transliterations),
+        "symspell_index": (INDEX_PATH, _build_symspell_index),
+    }
+
+
+def _relative(path: str) -> str:
+    """Path as stored in the manifest: relative to the repository, so it matches on any checkout."""
+    return os.path.relpath(os.path.abspath(path), BASE_PATH).replace(os.sep, "/")
+
+
+def _load_manifest(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_lexicon(source_path: str = SOURCE_PATH, manifest_path: str = MANIFEST_PATH, force: bool = False) -> Dict[str, str]:
+    """
+    Builds every artifact derived from the frequency list: the Tesseract
+    user-words file, the cleaned SymSpell dictionary and its prebuilt index,
+    and the transliteration cache.
+
+    The manifest records the SHA-256 of the source and of each artifact. An
+    artifact is rebuilt only when the source changed, the build version changed,
+    or the file on disk is missing or no longer matches its recorded hash.
+    Returns a mapping of artifact name to "built" or "unchanged".
+    """
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(f"❌ Word list not found: {source_path}")
+
+    source_sha = file_hash(source_path)
+    manifest = _load_manifest(manifest_path)
+    same_source = (
+        not force
+        and manifest.get("version") == _BUILD_VERSION
+        and manifest.get("source_sha256") == source_sha
+    )
+    recorded = manifest.get("artifacts", {}) if same_source else {}
+
+    entries = None
+    status = {}
+    artifacts = {}
+    for name, (path, build) in _artifacts().items():
+        previous = recorded.get(name)
+        if (
+            previous
+            and previous["path"] == _relative(path)
+            and os.path.exists(path)
+            and file_hash(path) == previous["sha256"]
+        ):
+            artifacts[name] = previous
+            status[name] = "unchanged"
+            continue
+        if entries is None:
+            entries = read_entries(source_path)
+        start = time.time()
+        build(entries, path)
+        artifacts[name] = {"path": _relative(path), "sha256": file_hash(path)}
+        status[name] = "built"
+        print(f"[INFO] Built {name} → '{path}' in {time.time() - start:.1f}s")
+
+    _write_lines(manifest_path, [json.dumps({
+        "version": _BUILD_VERSION,
+        "source": _relative(source_path),
+        "source_sha256": source_sha,
+        "artifacts": artifacts,
+    }, ensure_ascii=False, indent=2)])
+    return status
+
+
+_ensure_lock = threading.Lock()
+
+
+def ensure_lexicon(*paths: str):
+    """
+    Builds the lexicon if any of `paths` (every artifact by default) is missing,
+    as on a fresh checkout; the artifacts themselves are not committed.
+    """
+    paths = paths or [path for path, _ in _artifacts().values()]
+    if all(os.path.exists(path) for path in paths):
+        return
+    with _ensure_lock:
+        if not all(os.path.exists(path) for path in paths):
+            print("[INFO] Lexicon not built yet; building it from the word list...")
+            build_lexicon()
+
+
+def load_transliterations(path: str = TRANSLITERATION_PATH) -> Optional[Dict[str, str]]:
+    """Reads the transliteration cache as a word → roman dict, or None if it has not been built."""
+    if not os.path.exists(path):
+        return None
+    table = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            word, _, roman = line.rstrip("\n").partition("\t")
+            table[word] = roman
+    return table
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the OCR, spell-check and transliteration lexicons from the word list.")
+    parser.add_argument("--source", default=SOURCE_PATH, help="Frequency list to build from.")
+    parser.add_argument("--force", action="store_true", help="Rebuild every artifact even if nothing changed.")
+    args = parser.parse_args()
+
+    try:
+        start = time.time()
+        status = build_lexicon(args.source, force=args.force)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(1)
+    built = [name for name, state in status.items() if state == "built"]
+    if built:
+        print(f"[SUCCESS] ✅ Lexicon updated ({', '.join(built)}) in {time.time() - start:.1f}s")
+    else:
+        print("[SUCCESS] ✅ Lexicon is up to date; nothing to do.")
@@ -1,5 +1,6 @@
 import argparse
 from extract_text import extract_text
+from ocr_engine import BACKENDS, DEFAULT_BACKEND
 from text_to_speech import text_to_speech
 import time
 import os
@@ -18,15 +19,63 @@ def play_audio(filename: str):
     except Exception as e:
         print(f"⚠️ Could not auto-play. Please open '{filename}' manually. Error: {e}")
 
+def run_batch_mode(args):
+    """Runs the pipelined batch mode and prints a summary."""
+    from batch_pipeline import run_batch
+
+    def report(entry):
+        status = "✅" if entry["status"] == "done" else "❌"
+        print(f"[BATCH] {status} {entry['image']}")
+
+    try:
+        start = time.time()
+        summary = run_batch(
+            args.batch,
+            output_dir=args.output_dir,
+            manifest_path=args.manifest,
+            preprocess_workers=args.preprocess_workers,
+            ocr_workers=args.ocr_workers,
+            tts_workers=args.tts_workers,
+            queue_size=args.queue_size,
+            spell_check=args.spell_check,
+            ocr_backend=args.ocr_backend,
+            on_result=report,
+        )
+    except (FileNotFoundError, ImportError, OSError) as e:
+        print(f"[ERROR] ❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    elapsed = time.time() - start
+    print(
+        f"[SUCCESS] Processed {summary['done']} of {summary['total']} images in {elapsed:.1f}s "
+        f"({summary['skipped']} already done, {summary['failed']} failed)."
+    )
+    if summary["failed"]:
+        sys.exit(1)
+
 def main():
     parser = argparse.ArgumentParser(description="Extract Kannada text from an image and convert it to speech.")
     parser.add_argument("image_path", nargs="?", default="image.png", help="Path to the input image file (default: image.png)")
     parser.add_argument("--output", "-o", help="Path to save the output MP3 file.")
+    parser.add_argument("--spell-check", action="store_true", help="Correct low-confidence OCR words with the Kannada dictionary.")
+    parser.add_argument("--ocr-backend", choices=BACKENDS, default=DEFAULT_BACKEND, help=f"OCR engine to use (default: {DEFAULT_BACKEND})")
+    batch = parser.add_argument_group("batch mode")
+    batch.add_argument("--batch", metavar="SOURCE", help="Process a directory, a glob pattern, or a manifest file of images.")
+    batch.add_argument("--output-dir", default="batch_output", help="Directory for batch text and MP3 outputs (default: batch_output)")
+    batch.add_argument("--manifest", help="JSONL progress manifest used to resume a batch (default: <output-dir>/manifest.jsonl)")
+    batch.add_argument("--preprocess-workers", type=int, default=2, help="Worker threads for image preprocessing (default: 2)")
+    batch.add_argument("--ocr-workers", type=int, default=2, help="Warm Tesseract workers (default: 2)")
+    batch.add_argument("--tts-workers", type=int, default=4, help="Worker threads for speech synthesis (default: 4)")
+    batch.add_argument("--queue-size", type=int, default=8, help="Maximum pages buffered between stages (default: 8)")
     args = parser.parse_args()
 
+    if args.batch:
+        run_batch_mode(args)
+        return
+
     try:
         # Step 1: Extract text from the image
-        text = extract_text(args.image_path)
+        text = extract_text(args.image_path, spell_check=args.spell_check, backend=args.ocr_backend)
         print("------------------------------")
         print(text)
         print("------------------------------")
@@ -38,7 +87,7 @@ def main():
         print(f"[SUCCESS] ✅ Audio saved to '{output_file}'")
         play_audio(output_file)
 
-    except (FileNotFoundError, ValueError, ConnectionError, OSError) as e:
+    except (FileNotFoundError, ImportError, ValueError, ConnectionError, OSError) as e:
         print(f"[ERROR] ❌ {e}", file=sys.stderr)
         sys.exit(1)
 
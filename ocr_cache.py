@@ -0,0 +1,305 @@
+# ocr_cache.py
+import base64
+import hashlib
+import json
+import math
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional
+
+import cv2
+import numpy as np
+
+# Longest side of the thumbnail a page is remembered by (the shortest side is
+# kept at 32 pixels or more, for long strips).
+DEFAULT_THUMBNAIL_SIZE = 256
+# Side of the coarse grid that picks which cached pages are compared in full.
+COARSE_SIZE = 16
+# Cached pages whose coarse grids differ by more than this (mean absolute
+# difference, in units of the page's contrast) are not compared at all.
+# Recaptures shifted by a tenth of the page stay below 0.5.
+DEFAULT_MAX_COARSE_DISTANCE = 0.6
+# A capture matches a cached page when, once the two thumbnails are aligned,
+# no 8x8 area of them differs by more than this on average (in units of the
+# page's contrast). New captures of a page with some shift, zoom, rotation,
+# exposure change and noise stay below 1.0; signs that differ in one word
+# score 1.8 or more. Edits far smaller than a thumbnail pixel cannot be seen.
+DEFAULT_MAX_DIFFERENCE = 1.3
+# Cached pages compared in full per lookup, closest coarse grid first.
+DEFAULT_MAX_CANDIDATES = 4
+_TILE = 8
+# Contrast below this is treated as sensor noise and not amplified.
+_MIN_CONTRAST = 8.0
+# Alignments that zoom, shear or move the page more than this are not a recapture.
+_MAX_WARP = 0.15
+_ECC_CRITERIA = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 50, 1e-4)
+
+# Bumped when pages are remembered differently; older cache files are ignored.
+CACHE_VERSION = 3
+
+
+def page_thumbnail(image: np.ndarray, size: int = DEFAULT_THUMBNAIL_SIZE) -> np.ndarray:
+    """Area-averaged thumbnail of a grayscale page, `size` pixels on its longest side."""
+    height, width = image.shape[:2]
+    scale = min(1.0, max(size / max(height, width), 32 / min(height, width)))
+    if scale == 1.0:
+        return np.ascontiguousarray(image)
+    new_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(image, new_size, interpolation=cv2.INTER_AREA)
+
+
+def _normalize(image: np.ndarray) -> np.ndarray:
+    image = image.astype(np.float32)
+    return (image - image.mean()) / max(float(image.std()), _MIN_CONTRAST)
+
+
+def coarse_grid(thumbnail: np.ndarray, size: int = COARSE_SIZE) -> np.ndarray:
+    """The thumbnail shrunk to `size`×`size` and normalized for brightness and contrast, flattened."""
+    small = cv2.resize(thumbnail, (size, size), interpolation=cv2.INTER_AREA)
+    return _normalize(small).ravel()
+
+
+def page_difference(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    How different two page thumbnails are once aligned: the largest mean
+    absolute difference over any 8x8 area, in units of the page's contrast.
+    Camera movement is undone first (phase correlation for the shift, then an
+    affine ECC refinement); contrast and brightness are normalized. Returns
+    0.0 for identical thumbnails and infinity for pages that cannot be aligned.
+    """
+    if a.shape != b.shape:
+        if abs(a.shape[0] / a.shape[1] - b.shape[0] / b.shape[1]) > 0.05 * b.shape[0] / b.shape[1]:
+            return math.inf
+        a = cv2.resize(a, (b.shape[1], b.shape[0]), interpolation=cv2.INTER_AREA)
+    if np.array_equal(a, b):
+        return 0.0
+    a = cv2.GaussianBlur(_normalize(a), (3, 3), 0)
+    b = cv2.GaussianBlur(_normalize(b), (3, 3), 0)
+    height, width = b.shape
+
+    (dx, dy), _ = cv2.phaseCorrelate(a, b, cv2.createHanningWindow((width, height), cv2.CV_32F))
+    if abs(dx) > width / 4 or abs(dy) > height / 4:
+        dx = dy = 0.0  # no dominant shift (e.g. a flat page)
+    warp = np.float32([[1, 0, -dx], [0, 1, -dy]])
+    try:
+        _, warp = cv2.findTransformECC(b, a, warp, cv2.MOTION_AFFINE, _ECC_CRITERIA, None, 1)
+    except cv2.error:
+        pass  # did not converge; keep the shift
+    moved = abs(warp[0, 2]) > width / 4 or abs(warp[1, 2]) > height / 4
+    if moved or np.abs(warp[:, :2] - np.eye(2)).max() > _MAX_WARP:
+        return math.inf
+    flags = cv2.INTER_LINEAR + cv2.WARP_INVERSE_MAP
+    aligned = cv2.warpAffine(a, warp, (width, height), flags=flags)
+    inside = cv2.warpAffine(np.ones_like(a), warp, (width, height), flags=cv2.INTER_NEAREST + cv2.WARP_INVERSE_MAP)
+
+    # Only areas that are inside both pages after the alignment count.
+    tile_diff = cv2.blur(np.abs(aligned - b) * inside, (_TILE, _TILE), borderType=cv2.BORDER_CONSTANT)
+    tile_inside = cv2.blur(inside, (_TILE, _TILE), borderType=cv2.BORDER_CONSTANT)
+    full = tile_inside > 0.999
+    if not full.any():
+        return math.inf
+    return float(tile_diff[full].max())
+
+
+class PageSignature(NamedTuple):
+    """What a page is looked up by: its thumbnail, the coarse grid of it and a digest for exact repeats."""
+    thumbnail: np.ndarray
+    coarse: np.ndarray
+    digest: str
+
+    @classmethod
+    def from_thumbnail(cls, thumbnail: np.ndarray) -> "PageSignature":
+        digest = hashlib.sha256(np.ascontiguousarray(thumbnail).tobytes())
+        digest.update(repr(thumbnail.shape).encode())
+        return cls(thumbnail, coarse_grid(thumbnail), digest.hexdigest())
+
+
+class CachedOCR(NamedTuple):
+    """A cache hit: the recognized text blocks and how different the capture was from the cached one."""
+    blocks: List[str]
+    difference: float
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.blocks)
+
+
+class OCRCache:
+    """
+    OCR results for pages read before, so capturing or uploading the same
+    page again skips OCR, even when the new capture is slightly shifted,
+    zoomed, rotated or lit differently.
+
+    Pages are remembered by a thumbnail of the grayscale image (before
+    binarization). A lookup considers entries for the same language and
+    options, picks the `max_candidates` whose coarse grids are closest (and
+    within `max_coarse_distance`), aligns each with the capture and returns the
+    one that differs least, if no area of it differs by more than
+    `max_difference` (see `page_difference`). Entries are evicted least
+    recently used first beyond `max_entries`.
+
+    With `path`, entries are appended to a JSON Lines file as they are added,
+    so the cache survives restarts; the file is compacted once it holds twice
+    `max_entries` records. Hit and miss counts are kept in `metrics`;
+    `rejected` counts lookups where similar pages were compared but none
+    matched.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: int = 512,
+        max_difference: float = DEFAULT_MAX_DIFFERENCE,
+        max_coarse_distance: float = DEFAULT_MAX_COARSE_DISTANCE,
+        max_candidates: int = DEFAULT_MAX_CANDIDATES,
+        thumbnail_size: int = DEFAULT_THUMBNAIL_SIZE,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_difference = max_difference
+        self.max_coarse_distance = max_coarse_distance
+        self.max_candidates = max_candidates
+        self.thumbnail_size = thumbnail_size
+        self._entries = OrderedDict()  # (lang, options, digest) -> (signature, blocks)
+        self._lock = threading.Lock()
+        # Records in the file, or None when it has to be rewritten before appending.
+        self._file_records = None
+        self.metrics = {"hits": 0, "exact_hits": 0, "misses": 0, "rejected": 0}
+        if path and os.path.exists(path):
+            self._load()
+
+    def signature(self, image: np.ndarray) -> PageSignature:
+        """Lookup key for a grayscale page; pass the image before it is binarized."""
+        return PageSignature.from_thumbnail(page_thumbnail(image, self.thumbnail_size))
+
+    def get(self, signature: PageSignature, lang: str, options: str = "") -> Optional[CachedOCR]:
+        with self._lock:
+            exact = self._entries.get((lang, options, signature.digest))
+            candidates = [] if exact else [
+                (key, entry) for key, entry in self._entries.items() if key[0] == lang and key[1] == options
+            ]
+        best_key, best_difference = None, math.inf
+        compared = False
+        if exact:
+            best_key, best_difference = (lang, options, signature.digest), 0.0
+        elif candidates:
+            coarse = np.stack([cached.coarse for _, (cached, _) in candidates])
+            distances = np.abs(coarse - signature.coarse).mean(axis=1)
+            for index in np.argsort(distances, kind="stable")[:self.max_candidates]:
+                if distances[index] > self.max_coarse_distance:
+                    break
+                key, (cached, _) = candidates[index]
+                compared = True
+                difference = page_difference(cached.thumbnail, signature.thumbnail)
+                if difference <= self.max_difference and difference < best_difference:
+                    best_key, best_difference = key, difference
+
+        with self._lock:
+            entry = self._entries.get(best_key) if best_key is not None else None
+            if entry is None:
+                self.metrics["misses"] += 1
+                if compared and best_key is None:
+                    self.metrics["rejected"] += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.metrics["hits"] += 1
+            if best_difference == 0.0:
+                self.metrics["exact_hits"] += 1
+            return CachedOCR(list(entry[1]), best_difference)
+
+    def put(self, signature: PageSignature, lang: str, blocks: List[str], options: str = ""):
+        with self._lock:
+            key = (lang, options, signature.digest)
+            self._entries.pop(key, None)
+            self._entries[key] = (signature, list(blocks))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self.path:
+                self._append(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self.path:
+                self._rewrite()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return self.metrics["hits"] / lookups if lookups else 0.0
+
+    # --- Persistence: a header line, then one line per added entry ---
+
+    def _header(self) -> str:
+        return json.dumps({"version": CACHE_VERSION, "thumbnail_size": self.thumbnail_size})
+
+    @staticmethod
+    def _record(key, entry) -> str:
+        (lang, options, _), (signature, blocks) = key, entry
+        ok, png = cv2.imencode(".png", signature.thumbnail)
+        if not ok:
+            raise ValueError("❌ Could not encode the page thumbnail")
+        thumbnail = base64.b64encode(png.tobytes()).decode("ascii")
+        return json.dumps({"lang": lang, "options": options, "thumbnail": thumbnail, "blocks": blocks},
+                          ensure_ascii=False)
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline() or "{}")
+                if (header.get("version"), header.get("thumbnail_size")) != (CACHE_VERSION, self.thumbnail_size):
+                    return  # Remembered another way; rewritten on the next put.
+                records, damaged = 0, False
+                for line in f:
+                    records += 1
+                    try:
+                        record = json.loads(line)
+                        png = np.frombuffer(base64.b64decode(record["thumbnail"]), np.uint8)
+                        thumbnail = cv2.imdecode(png, cv2.IMREAD_GRAYSCALE)
+                        if thumbnail is None:
+                            raise ValueError("undecodable thumbnail")
+                    except (ValueError, KeyError, TypeError) as e:
+                        # A record cut short by a crash; the rest of the file is still good.
+                        print(f"[WARN] Skipping a damaged OCR cache record: {e}", file=sys.stderr)
+                        damaged = True
+                        continue
+                    signature = PageSignature.from_thumbnail(thumbnail)
+                    key = (record["lang"], record["options"], signature.digest)
+                    self._entries.pop(key, None)
+                    self._entries[key] = (signature, record["blocks"])
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            # Appending after a damaged record would corrupt the next one too.
+            self._file_records = None if damaged else records
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Ignoring unreadable OCR cache '{self.path}': {e}", file=sys.stderr)
+            self._entries.clear()
+
+    def _append(self, key):
+        if self._file_records is None or self._file_records >= 2 * self.max_entries:
+            self._rewrite()
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(self._record(key, self._entries[key]) + "\n")
+            self._file_records += 1
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Could not save OCR cache: {e}", file=sys.stderr)
+
+    def _rewrite(self):
+        # Least recently used first, so reloading restores the same order.
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self._header() + "\n")
+                for key, entry in self._entries.items():
+                    f.write(self._record(key, entry) + "\n")
+            os.replace(tmp_path, self.path)
+            self._file_records = len(self._entries)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Could not save OCR cache: {e}", file=sys.stderr)
@@ -0,0 +1,228 @@
+# ocr_document.py
+from typing import Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from ocr_engine import OCRWord
+
+# (left, top, width, height) in page pixels.
+BBox = Tuple[int, int, int, int]
+
+
+def _union_bbox(boxes: np.ndarray) -> BBox:
+    if not len(boxes):
+        return (0, 0, 0, 0)
+    left = int(boxes[:, 0].min())
+    top = int(boxes[:, 1].min())
+    right = int((boxes[:, 0] + boxes[:, 2]).max())
+    bottom = int((boxes[:, 1] + boxes[:, 3]).max())
+    return (left, top, right - left, bottom - top)
+
+
+class OCRLine:
+    """View of one line of an `OCRDocument`; holds no data of its own."""
+
+    __slots__ = ("document", "index")
+
+    def __init__(self, document: "OCRDocument", index: int):
+        self.document = document
+        self.index = index
+
+    @property
+    def _span(self) -> slice:
+        starts = self.document.line_starts
+        return slice(int(starts[self.index]), int(starts[self.index + 1]))
+
+    @property
+    def words(self) -> List[OCRWord]:
+        span = self._span
+        return [self.document.word(i) for i in range(span.start, span.stop)]
+
+    @property
+    def text(self) -> str:
+        return self.document.line_text(self.index)
+
+    @property
+    def bbox(self) -> BBox:
+        return _union_bbox(self.document.boxes[self._span])
+
+    @property
+    def conf(self) -> float:
+        """Mean word confidence (0-100)."""
+        return float(self.document.conf[self._span].mean())
+
+    def __repr__(self):
+        return f"OCRLine({self.text!r}, conf={self.conf:.1f})"
+
+
+class OCRBlock:
+    """View of one text block of an `OCRDocument`; holds no data of its own."""
+
+    __slots__ = ("document", "index")
+
+    def __init__(self, document: "OCRDocument", index: int):
+        self.document = document
+        self.index = index
+
+    @property
+    def _line_span(self) -> range:
+        starts = self.document.block_starts
+        return range(int(starts[self.index]), int(starts[self.index + 1]))
+
+    @property
+    def _span(self) -> slice:
+        lines = self._line_span
+        starts = self.document.line_starts
+        return slice(int(starts[lines.start]), int(starts[lines.stop]))
+
+    @property
+    def lines(self) -> List[OCRLine]:
+        return [OCRLine(self.document, i) for i in self._line_span]
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.document.line_text(i) for i in self._line_span)
+
+    @property
+    def bbox(self) -> BBox:
+        return _union_bbox(self.document.boxes[self._span])
+
+    @property
+    def conf(self) -> float:
+        """Mean word confidence (0-100)."""
+        return float(self.document.conf[self._span].mean())
+
+    def __repr__(self):
+        return f"OCRBlock({len(self._line_span)} lines, conf={self.conf:.1f})"
+
+
+class OCRDocument:
+    """
+    OCR result of one page as blocks → lines → words, each word with its
+    bounding box and confidence.
+
+    The data is held in a few flat arrays rather than an object per word:
+    the word texts are concatenated into one string with an offset array,
+    boxes are an (n, 4) int32 array of (left, top, width, height) and
+    confidences an (n,) float32 array. Lines and blocks are runs of
+    consecutive words, given by `line_starts` (word index where each line
+    starts) and `block_starts` (line index where each block starts).
+    `blocks`, `lines` and `word(i)` build light views on demand; `text` is
+    the plain text existing callers use, computed once.
+    """
+
+    __slots__ = ("_chars", "_offsets", "boxes", "conf", "line_starts", "block_starts", "_text")
+
+    def __init__(self, chars: str, offsets: np.ndarray, boxes: np.ndarray, conf: np.ndarray,
+                 line_starts: np.ndarray, block_starts: np.ndarray):
+        self._chars = chars
+        self._offsets = offsets
+        self.boxes = boxes
+        self.conf = conf
+        self.line_starts = line_starts
+        self.block_starts = block_starts
+        self._text = None
+
+    @classmethod
+    def from_words(cls, words: Sequence[OCRWord]) -> "OCRDocument":
+        """
+        Builds a document from word rows in reading order, as the OCR engines
+        return them. Words with the same block/paragraph/line numbers form a
+        line and lines with the same block number form a block.
+        """
+        n = len(words)
+        offsets = np.zeros(n + 1, dtype=np.int32)
+        boxes = np.empty((n, 4), dtype=np.int32)
+        conf = np.empty(n, dtype=np.float32)
+        line_starts = []
+        block_starts = []
+        line_key = block_key = None
+        for i, word in enumerate(words):
+            offsets[i + 1] = offsets[i] + len(word.text)
+            boxes[i] = (word.left, word.top, word.width, word.height)
+            conf[i] = word.conf
+            if (word.block, word.par, word.line) != line_key:
+                line_key = (word.block, word.par, word.line)
+                if word.block != block_key:
+                    block_key = word.block
+                    block_starts.append(len(line_starts))
+                line_starts.append(i)
+        line_starts.append(n)
+        block_starts.append(len(line_starts) - 1)
+        return cls(
+            "".join(word.text for word in words),
+            offsets,
+            boxes,
+            conf,
+            np.asarray(line_starts, dtype=np.int32),
+            np.asarray(block_starts, dtype=np.int32),
+        )
+
+    def __len__(self) -> int:
+        """Number of words."""
+        return len(self.conf)
+
+    @property
+    def num_lines(self) -> int:
+        return len(self.line_starts) - 1
+
+    @property
+    def num_blocks(self) -> int:
+        return len(self.block_starts) - 1
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the document's arrays and text."""
+        arrays = (self._offsets, self.boxes, self.conf, self.line_starts, self.block_starts)
+        return sum(a.nbytes for a in arrays) + len(self._chars.encode("utf-8"))
+
+    def word_text(self, index: int) -> str:
+        return self._chars[self._offsets[index]:self._offsets[index + 1]]
+
+    def word(self, index: int) -> OCRWord:
+        """The word at `index` as an `OCRWord`; block/line are this document's 1-based numbers."""
+        line = int(np.searchsorted(self.line_starts, index, side="right")) - 1
+        block = int(np.searchsorted(self.block_starts, line, side="right"))
+        left, top, width, height = (int(v) for v in self.boxes[index])
+        return OCRWord(self.word_text(index), float(self.conf[index]), left, top, width, height, block, 1, line + 1)
+
+    def words(self) -> Iterator[OCRWord]:
+        return (self.word(i) for i in range(len(self)))
+
+    def line_text(self, index: int) -> str:
+        start, stop = int(self.line_starts[index]), int(self.line_starts[index + 1])
+        return " ".join(self.word_text(i) for i in range(start, stop))
+
+    @property
+    def lines(self) -> List[OCRLine]:
+        return [OCRLine(self, i) for i in range(self.num_lines)]
+
+    @property
+    def blocks(self) -> List[OCRBlock]:
+        return [OCRBlock(self, i) for i in range(self.num_blocks)]
+
+    @property
+    def text(self) -> str:
+        """Plain text: words joined by spaces, lines by newlines."""
+        if self._text is None:
+            self._text = "\n".join(self.line_text(i) for i in range(self.num_lines))
+        return self._text
+
+    def line_conf(self) -> np.ndarray:
+        """Mean word confidence of every line, as one array."""
+        if not self.num_lines:
+            return np.zeros(0, dtype=np.float32)
+        sums = np.add.reduceat(self.conf, self.line_starts[:-1])
+        return (sums / np.diff(self.line_starts)).astype(np.float32)
+
+    def drop_low_confidence(self, min_conf: float) -> "OCRDocument":
+        """A new document without the lines whose mean confidence is below `min_conf`."""
+        keep = np.flatnonzero(self.line_conf() >= min_conf)
+        words = []
+        for line in keep:
+            start, stop = int(self.line_starts[line]), int(self.line_starts[line + 1])
+            words.extend(self.word(i) for i in range(start, stop))
+        return OCRDocument.from_words(words)
+
+    def __repr__(self):
+        return f"OCRDocument({self.num_blocks} blocks, {self.num_lines} lines, {len(self)} words)"
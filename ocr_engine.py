@@ -0,0 +1,470 @@
+# ocr_engine.py
+import asyncio
+import atexit
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+try:
+    # tesserocr binds the Tesseract C++ API directly, so a worker can keep the
+    # traineddata and the user-words list loaded between images.
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+
+ImageInput = Union[np.ndarray, Image.Image, bytes]
+
+DEFAULT_OEM = 3
+DEFAULT_PSM = 4
+
+
+class OCRWord(NamedTuple):
+    """One recognized word, as in a row of Tesseract's TSV (image_to_data) output."""
+    text: str
+    conf: float
+    left: int
+    top: int
+    width: int
+    height: int
+    block: int
+    par: int
+    line: int
+
+
+def parse_tsv(tsv: str) -> List[OCRWord]:
+    """Parses Tesseract TSV output into word rows, dropping empty and non-word rows."""
+    words = []
+    for row in tsv.splitlines()[1:]:
+        cols = row.split("\t")
+        if len(cols) < 12 or cols[0] != "5" or not cols[11].strip():
+            continue
+        words.append(OCRWord(
+            text=cols[11].strip(),
+            conf=float(cols[10]),
+            left=int(cols[6]),
+            top=int(cols[7]),
+            width=int(cols[8]),
+            height=int(cols[9]),
+            block=int(cols[2]),
+            par=int(cols[3]),
+            line=int(cols[4]),
+        ))
+    return words
+
+
+def words_to_text(words: Sequence[OCRWord]) -> str:
+    """
+    Rebuilds plain text from word rows: words on the same line are joined with
+    spaces, lines with newlines, in the order the engine produced them.
+    """
+    lines = []
+    current_key = None
+    for word in words:
+        key = (word.block, word.par, word.line)
+        if key != current_key:
+            lines.append([])
+            current_key = key
+        lines[-1].append(word.text)
+    return "\n".join(" ".join(line) for line in lines)
+
+
+def _default_num_workers() -> int:
+    env_value = os.environ.get("OCR_WORKERS")
+    if env_value:
+        return max(1, int(env_value))
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def _to_gray_array(image: ImageInput) -> np.ndarray:
+    """
+    Normalizes the supported in-memory inputs to a contiguous 8-bit grayscale array.
+    Encoded image bytes are decoded with OpenCV; nothing touches the filesystem.
+    """
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        buffer = np.frombuffer(image, dtype=np.uint8)
+        array = cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE)
+        if array is None:
+            raise ValueError("❌ Could not decode the image bytes")
+        return array
+    if isinstance(image, Image.Image):
+        image = np.asarray(image.convert("L"))
+    if not isinstance(image, np.ndarray):
+        raise TypeError(f"Unsupported image type for OCR: {type(image)}")
+
+    if image.ndim == 3:
+        code = cv2.COLOR_RGBA2GRAY if image.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+        image = cv2.cvtColor(image, code)
+    if image.dtype != np.uint8:
+        image = np.clip(image, 0, 255).astype(np.uint8)
+    return np.ascontiguousarray(image)
+
+
+class OCRBackend:
+    """
+    Interface shared by the OCR engines, so callers can pick one per request.
+
+    Every engine returns the same structured result: for each image a list of
+    `OCRWord` rows with text, confidence (0-100), bounding box and
+    block/paragraph/line numbers. Engines implement `recognize_words_many`,
+    which should process the images together where the engine can batch;
+    the other methods are derived from it. `psm` is a Tesseract page
+    segmentation hint that other engines ignore. `uses_regions` tells callers
+    whether cropping the page into text blocks first helps this engine.
+    """
+    name = "base"
+    uses_regions = False
+
+    def recognize_words_many(
+        self, images: Iterable[ImageInput], psm: Union[int, Sequence[int], None] = None
+    ) -> List[List[OCRWord]]:
+        raise NotImplementedError
+
+    def recognize_words(self, image: ImageInput, psm: Optional[int] = None) -> List[OCRWord]:
+        return self.recognize_words_many([image], psm)[0]
+
+    def recognize_words_iter(
+        self, images: Iterable[ImageInput], psm: Union[int, Sequence[int], None] = None
+    ) -> Iterator[List[OCRWord]]:
+        return iter(self.recognize_words_many(images, psm))
+
+    def recognize(self, image: ImageInput, psm: Optional[int] = None) -> str:
+        return words_to_text(self.recognize_words(image, psm))
+
+    def recognize_many(
+        self, images: Iterable[ImageInput], psm: Union[int, Sequence[int], None] = None
+    ) -> List[str]:
+        return [words_to_text(words) for words in self.recognize_words_many(images, psm)]
+
+    async def recognize_async(self, image: ImageInput, psm: Optional[int] = None) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.recognize, image, psm)
+
+    def is_healthy(self) -> bool:
+        return True
+
+    @property
+    def closed(self) -> bool:
+        return False
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class _TesserocrWorker:
+    """
+    A warm Tesseract instance. The language model and the user-words list are
+    loaded once in the constructor and reused for every image.
+    """
+
+    def __init__(self, lang: str, oem: int, psm: int, user_words: Optional[str], tessdata_path: Optional[str]):
+        variables = {}
+        if user_words:
+            variables["user_words_file"] = user_words
+        kwargs = {"lang": lang, "oem": oem, "psm": psm, "variables": variables}
+        if tessdata_path:
+            kwargs["path"] = tessdata_path
+        self.api = tesserocr.PyTessBaseAPI(**kwargs)
+        self.default_psm = psm
+
+    def _set_image(self, image: np.ndarray, psm: Optional[int]):
+        height, width = image.shape[:2]
+        self.api.SetPageSegMode(psm if psm is not None else self.default_psm)
+        self.api.SetImageBytes(image.tobytes(), width, height, 1, width)
+
+    def recognize(self, image: np.ndarray, psm: Optional[int] = None) -> str:
+        self._set_image(image, psm)
+        try:
+            return self.api.GetUTF8Text()
+        finally:
+            self.api.Clear()
+
+    def recognize_words(self, image: np.ndarray, psm: Optional[int] = None) -> List[OCRWord]:
+        self._set_image(image, psm)
+        words = []
+        try:
+            self.api.Recognize()
+            iterator = self.api.GetIterator()
+            if iterator is None:
+                return words
+            block = par = line = 0
+            level = tesserocr.RIL.WORD
+            for word in tesserocr.iterate_level(iterator, level):
+                if word.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+                    block, par, line = block + 1, 0, 0
+                if word.IsAtBeginningOf(tesserocr.RIL.PARA):
+                    par, line = par + 1, 0
+                if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                    line += 1
+                text = word.GetUTF8Text(level)
+                box = word.BoundingBox(level)
+                if not text or not text.strip() or box is None:
+                    continue
+                x0, y0, x1, y1 = box
+                words.append(OCRWord(text.strip(), word.Confidence(level), x0, y0, x1 - x0, y1 - y0, block, par, line))
+            return words
+        finally:
+            self.api.Clear()
+
+    def is_alive(self) -> bool:
+        """True while the Tesseract instance is still initialized with its language model."""
+        try:
+            return bool(self.api.GetInitLanguagesAsString())
+        except RuntimeError:
+            return False
+
+    def close(self):
+        self.api.End()
+
+
+class _TesseractCLIWorker:
+    """
+    Fallback used when tesserocr is not installed. Each call still starts a
+    `tesseract` process, but the image is piped through stdin as an in-memory
+    PNG instead of going through a temporary file.
+    """
+
+    def __init__(self, lang: str, oem: int, psm: int, user_words: Optional[str], tesseract_cmd: Optional[str]):
+        # resolved once, so health checks do not search PATH again
+        cmd = tesseract_cmd or "tesseract"
+        self.cmd = shutil.which(cmd) or cmd
+        self.lang = lang
+        self.oem = oem
+        self.default_psm = psm
+        self.user_words = user_words
+        self.env = dict(os.environ)
+
+    def _build_args(self, psm: int) -> List[str]:
+        args = [self.cmd, "stdin", "stdout", "-l", self.lang, "--oem", str(self.oem), "--psm", str(psm)]
+        if self.user_words:
+            args += ["--user-words", self.user_words]
+        return args
+
+    def _run(self, image: np.ndarray, psm: Optional[int], extra_args: Sequence[str] = ()) -> str:
+        ok, encoded = cv2.imencode(".png", image)
+        if not ok:
+            raise ValueError("❌ Could not encode image for Tesseract")
+        args = self._build_args(psm if psm is not None else self.default_psm) + list(extra_args)
+        result = subprocess.run(args, input=encoded.tobytes(), capture_output=True, env=self.env, check=False)
+        if result.returncode != 0:
+            raise OSError(f"❌ Tesseract failed: {result.stderr.decode('utf-8', errors='replace').strip()}")
+        return result.stdout.decode("utf-8")
+
+    def recognize(self, image: np.ndarray, psm: Optional[int] = None) -> str:
+        return self._run(image, psm)
+
+    def recognize_words(self, image: np.ndarray, psm: Optional[int] = None) -> List[OCRWord]:
+        return parse_tsv(self._run(image, psm, ["tsv"]))
+
+    def is_alive(self) -> bool:
+        """True while the resolved `tesseract` executable is still there."""
+        return os.path.isfile(self.cmd) and os.access(self.cmd, os.X_OK)
+
+    def close(self):
+        pass
+
+
+class OCREngine(OCRBackend):
+    """
+    Long-lived OCR engine backed by a pool of warm Tesseract workers.
+
+    Every worker is created up front with the language model and the wordlist
+    already loaded. Callers check a worker out of the pool for the duration of a
+    single image, so up to `num_workers` images are recognized in parallel.
+    The same engine serves synchronous callers (`recognize`) and asyncio callers
+    (`recognize_async`).
+    """
+
+    name = "tesseract"
+    uses_regions = True
+
+    def __init__(
+        self,
+        lang: str = "kan",
+        num_workers: Optional[int] = None,
+        oem: int = DEFAULT_OEM,
+        psm: int = DEFAULT_PSM,
+        user_words: Optional[str] = None,
+        tesseract_cmd: Optional[str] = None,
+        tessdata_path: Optional[str] = None,
+    ):
+        self.lang = lang
+        self.num_workers = num_workers or _default_num_workers()
+        self.oem = oem
+        self.psm = psm
+        self.user_words = user_words if user_words and os.path.exists(user_words) else None
+        self.backend = "tesserocr" if tesserocr is not None else "cli"
+
+        if self.num_workers > 1:
+            # Each worker gets its own core; stop Tesseract's OpenMP threads
+            # from oversubscribing the CPU.
+            os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+        self._pool = queue.Queue()
+        self._all_workers = []
+        for _ in range(self.num_workers):
+            if tesserocr is not None:
+                worker = _TesserocrWorker(lang, oem, psm, self.user_words, tessdata_path)
+            else:
+                worker = _TesseractCLIWorker(lang, oem, psm, self.user_words, tesseract_cmd)
+            self._all_workers.append(worker)
+            self._pool.put(worker)
+
+        self._executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="ocr")
+        self._closed = False
+        # set when a worker raises; the next health check then inspects every worker
+        self._worker_failed = False
+
+    def _with_worker(self, method: str, image: ImageInput, psm: Optional[int]):
+        if self._closed:
+            raise RuntimeError("OCR engine has been closed")
+        gray = _to_gray_array(image)
+        worker = self._pool.get()
+        try:
+            return getattr(worker, method)(gray, psm)
+        except Exception:
+            self._worker_failed = True
+            raise
+        finally:
+            self._pool.put(worker)
+
+    def recognize(self, image: ImageInput, psm: Optional[int] = None) -> str:
+        """
+        Runs OCR on a single in-memory image and returns the raw recognized text.
+        Blocks until a worker is free.
+        """
+        return self._with_worker("recognize", image, psm)
+
+    def recognize_words(self, image: ImageInput, psm: Optional[int] = None) -> List[OCRWord]:
+        """
+        Runs OCR on a single image and returns its words with bounding boxes,
+        confidences and block/paragraph/line numbers (like `image_to_data`).
+        """
+        return self._with_worker("recognize_words", image, psm)
+
+    def _map(self, func, images, psm):
+        images = list(images)
+        psms = list(psm) if isinstance(psm, (list, tuple)) else [psm] * len(images)
+        return self._executor.map(func, images, psms)
+
+    def recognize_many(
+        self, images: Iterable[ImageInput], psm: Union[int, Sequence[int], None] = None
+    ) -> List[str]:
+        """
+        Recognizes several images in parallel across the worker pool.
+        `psm` is either one mode for all images or one mode per image.
+        Results are returned in input order.
+        """
+        return list(self._map(self.recognize, images, psm))
+
+    def recognize_words_many(
+        self, images: Iterable[ImageInput], psm: Union[int, Sequence[int], None] = None
+    ) -> List[List[OCRWord]]:
+        """Parallel `recognize_words` over several images, in input order."""
+        return list(self._map(self.recognize_words, images, psm))
+
+    def recognize_words_iter(
+        self, images: Iterable[ImageInput], psm: Union[int, Sequence[int], None] = None
+    ) -> Iterator[List[OCRWord]]:
+        """
+        Like `recognize_words_many`, but yields each image's words as soon as it
+        and every image before it are done, so callers can use early results
+        while later images are still being recognized.
+        """
+        return self._map(self.recognize_words, images, psm)
+
+    async def recognize_async(self, image: ImageInput, psm: Optional[int] = None) -> str:
+        """
+        Asyncio variant of `recognize`; the OCR work runs on the engine's thread pool.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.recognize, image, psm)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def is_healthy(self) -> bool:
+        """
+        True while the engine is open. The workers themselves are only checked
+        after one of them failed, so the check stays cheap on every OCR call.
+        """
+        if self._closed:
+            return False
+        if self._worker_failed:
+            if not all(worker.is_alive() for worker in self._all_workers):
+                return False
+            self._worker_failed = False
+        return True
+
+    def close(self):
+        """Shuts the pool down and releases the Tesseract instances."""
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.shutdown(wait=True)
+        for worker in self._all_workers:
+            worker.close()
+
+
+# --- Shared engines (one per backend and language) ---
+BACKENDS = ("tesseract", "surya")
+DEFAULT_BACKEND = os.environ.get("OCR_BACKEND", "tesseract")
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def _backend_class(backend: str):
+    if backend == "tesseract":
+        return OCREngine
+    if backend == "surya":
+        # Imported on demand: Surya pulls in torch and its models.
+        from surya_engine import SuryaEngine
+        return SuryaEngine
+    raise ValueError(f"❌ Unknown OCR backend '{backend}'. Choose from: {', '.join(BACKENDS)}")
+
+
+def get_engine(lang: str = "kan", backend: Optional[str] = None, **kwargs) -> OCRBackend:
+    """
+    Returns the process-wide OCR engine for `backend` and `lang`, creating it
+    on first use (or again after it was closed or failed its health check).
+    Keyword arguments are passed to the engine only when it is created.
+    """
+    key = (backend or DEFAULT_BACKEND, lang)
+    engine = _ENGINES.get(key)
+    if engine is None or not engine.is_healthy():
+        with _ENGINES_LOCK:
+            engine = _ENGINES.get(key)
+            if engine is None or not engine.is_healthy():
+                if engine is not None:
+                    engine.close()
+                engine = _backend_class(key[0])(lang=lang, **kwargs)
+                _ENGINES[key] = engine
+    return engine
+
+
+def shutdown_engines():
+    """Closes every shared engine created so far."""
+    with _ENGINES_LOCK:
+        for engine in _ENGINES.values():
+            engine.close()
+        _ENGINES.clear()
+
+
+# Registered here rather than by callers, so it happens once per process no
+# matter how often a caller (e.g. a re-executed Streamlit script) rebuilds engines.
+atexit.register(shutdown_engines)
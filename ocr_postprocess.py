@@ -0,0 +1,80 @@
+# ocr_postprocess.py
+import threading
+import time
+from typing import List, Sequence
+
+from ocr_engine import OCRWord, words_to_text  # noqa: F401 (re-exported)
+from spell_checker import SpellCorrector, get_symspell
+
+# Words Tesseract reports at or above this confidence (0-100) are left alone.
+DEFAULT_MIN_CONFIDENCE = 85
+
+
+class SpellCheckStage:
+    """
+    Post-OCR spell correction limited to words Tesseract is unsure of.
+
+    Only words with a confidence below `min_confidence` are passed to the
+    corrector; everything else is kept as recognized. The SymSpell index is the
+    process-wide one from `spell_checker.get_symspell`, loaded once and shared
+    by every request. Cumulative counts and time spent are kept in `metrics`.
+    """
+
+    def __init__(self, min_confidence: float = DEFAULT_MIN_CONFIDENCE, corrector: SpellCorrector = None):
+        self.min_confidence = min_confidence
+        self._corrector = corrector
+        self._lock = threading.Lock()
+        self.metrics = {"calls": 0, "words": 0, "checked": 0, "corrected": 0, "seconds": 0.0}
+
+    @property
+    def corrector(self) -> SpellCorrector:
+        if self._corrector is None:
+            with self._lock:
+                if self._corrector is None:
+                    self._corrector = SpellCorrector(get_symspell())
+        return self._corrector
+
+    def preload(self):
+        """Loads the SymSpell index now so the first request does not pay for it."""
+        return self.corrector
+
+    def __call__(self, words: Sequence[OCRWord]) -> List[OCRWord]:
+        start = time.perf_counter()
+        corrector = self.corrector
+        checked = corrected = 0
+        result = []
+        for word in words:
+            if word.conf < self.min_confidence:
+                checked += 1
+                fixed = corrector.correct(word.text)
+                if fixed != word.text:
+                    corrected += 1
+                    word = word._replace(text=fixed)
+            result.append(word)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.metrics["calls"] += 1
+            self.metrics["words"] += len(words)
+            self.metrics["checked"] += checked
+            self.metrics["corrected"] += corrected
+            self.metrics["seconds"] += elapsed
+        print(
+            f"[INFO] Spell check: {corrected} corrected, {checked} of {len(words)} words checked "
+            f"in {elapsed * 1000:.1f} ms"
+        )
+        return result
+
+
+_stage = None
+_stage_lock = threading.Lock()
+
+
+def get_spell_check_stage() -> SpellCheckStage:
+    """Process-wide spell-check stage, shared by the CLI, batch mode and the app."""
+    global _stage
+    if _stage is None:
+        with _stage_lock:
+            if _stage is None:
+                _stage = SpellCheckStage()
+    return _stage
@@ -0,0 +1,281 @@
+# preprocess.py
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import List, Optional, Sequence, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Tesseract is most accurate when glyphs are roughly 30 px tall; anything much
+# larger only costs time in every step that follows.
+TARGET_TEXT_HEIGHT = 32
+
+# Size of the thumbnail used to measure the page (text height, skew, margins).
+_ANALYSIS_MAX_SIDE = 1000
+
+# Reduced-size decoding; for JPEG the scaling happens inside the decoder.
+_REDUCED_GRAYSCALE = {
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+}
+
+ImageSource = Union[str, bytes, bytearray, memoryview, np.ndarray, Image.Image]
+
+
+def decode_gray(data: Union[bytes, bytearray, memoryview, np.ndarray], max_side: Optional[int] = None) -> np.ndarray:
+    """
+    Decodes an encoded image (JPEG, PNG, ...) straight to one 8-bit grayscale
+    array, without an intermediate color image.
+
+    With `max_side`, the image is decoded at 1/2, 1/4 or 1/8 scale: the
+    largest reduction that keeps its longer side at least `max_side` pixels.
+    For JPEG this skips most of the decoding work as well as the memory.
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    flags = cv2.IMREAD_GRAYSCALE
+    if max_side:
+        # Only the header is read to get the size. If PIL cannot identify the
+        # data, decode at full size and let OpenCV decide whether it is valid.
+        try:
+            with Image.open(BytesIO(buffer)) as header:
+                longest = max(header.size)
+        except (Image.UnidentifiedImageError, OSError):
+            longest = 0
+        for factor, reduced in _REDUCED_GRAYSCALE.items():
+            if longest // factor >= max_side:
+                flags = reduced
+                break
+    gray = cv2.imdecode(buffer, flags)
+    if gray is None:
+        raise ValueError("❌ Could not decode image data")
+    return gray
+
+
+def load_gray(image_source: ImageSource, max_side: Optional[int] = None) -> np.ndarray:
+    """
+    Returns the image as a single 8-bit grayscale NumPy array.
+    Paths and encoded bytes (e.g. an upload) are decoded by OpenCV straight to
+    grayscale, optionally at reduced size (see `decode_gray`); arrays are
+    converted in place with OpenCV; PIL images are converted once.
+    """
+    if isinstance(image_source, str):
+        if not os.path.exists(image_source):
+            raise FileNotFoundError(f"❌ Image not found: {image_source}")
+        # np.fromfile + imdecode also handles non-ASCII paths on Windows.
+        try:
+            return decode_gray(np.fromfile(image_source, dtype=np.uint8), max_side)
+        except ValueError:
+            raise ValueError(f"❌ Could not decode image: {image_source}")
+    if isinstance(image_source, (bytes, bytearray, memoryview)):
+        return decode_gray(image_source, max_side)
+    if isinstance(image_source, Image.Image):
+        return np.asarray(image_source.convert("L"))
+    if isinstance(image_source, np.ndarray):
+        image = image_source
+        if image.ndim == 3 and image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_RGBA2GRAY)
+        elif image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        if image.dtype != np.uint8:
+            image = np.clip(image, 0, 255).astype(np.uint8)
+        return image
+    raise TypeError(f"Unsupported image source type: {type(image_source)}")
+
+
+def _thumbnail(gray: np.ndarray):
+    """Downscaled copy for page analysis, plus the factor back to full size."""
+    height, width = gray.shape[:2]
+    scale = min(1.0, _ANALYSIS_MAX_SIDE / max(height, width))
+    if scale == 1.0:
+        return gray, 1.0
+    small = cv2.resize(gray, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    return small, scale
+
+
+def _ink_mask(gray: np.ndarray) -> np.ndarray:
+    """Otsu threshold with text as foreground (255)."""
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    return mask
+
+
+def estimate_text_height(gray: np.ndarray) -> Optional[float]:
+    """
+    Estimates the typical glyph height in pixels from the connected components
+    of a thumbnail. Returns None when there is too little text to tell.
+    """
+    small, scale = _thumbnail(gray)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(_ink_mask(small), connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    # Ignore specks, rules and pictures.
+    keep = (heights >= 4) & (heights <= small.shape[0] // 4) & (widths <= heights * 5)
+    if np.count_nonzero(keep) < 20:
+        return None
+    return float(np.median(heights[keep])) / scale
+
+
+# --- Steps ---
+# A step is any callable taking and returning a grayscale array. Steps that only
+# look at a small neighbourhood set `halo` to their radius and can run per tile.
+
+class RescaleToTextHeight:
+    """Resizes the page so the median glyph height is about `target` pixels."""
+    halo = None
+
+    def __init__(self, target: int = TARGET_TEXT_HEIGHT, allow_upscale: bool = False):
+        self.target = target
+        self.allow_upscale = allow_upscale
+
+    def __call__(self, gray: np.ndarray) -> np.ndarray:
+        text_height = estimate_text_height(gray)
+        if not text_height:
+            return gray
+        scale = self.target / text_height
+        if scale > 1.0 and not self.allow_upscale:
+            return gray
+        if abs(scale - 1.0) < 0.1:
+            return gray
+        height, width = gray.shape[:2]
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+        return cv2.resize(gray, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=interpolation)
+
+
+class CropToContent:
+    """Crops away empty margins around the text, keeping `margin` pixels of border."""
+    halo = None
+
+    def __init__(self, margin: int = 10):
+        self.margin = margin
+
+    def __call__(self, gray: np.ndarray) -> np.ndarray:
+        small, scale = _thumbnail(gray)
+        points = cv2.findNonZero(_ink_mask(small))
+        if points is None:
+            return gray
+        x, y, w, h = cv2.boundingRect(points)
+        x0 = max(0, int(x / scale) - self.margin)
+        y0 = max(0, int(y / scale) - self.margin)
+        x1 = min(gray.shape[1], int((x + w) / scale) + self.margin)
+        y1 = min(gray.shape[0], int((y + h) / scale) + self.margin)
+        return gray[y0:y1, x0:x1]
+
+
+class Deskew:
+    """Rotates the page so text lines are horizontal (up to `max_angle` degrees)."""
+    halo = None
+
+    def __init__(self, max_angle: float = 10.0, min_angle: float = 0.3):
+        self.max_angle = max_angle
+        self.min_angle = min_angle
+
+    def __call__(self, gray: np.ndarray) -> np.ndarray:
+        small, _ = _thumbnail(gray)
+        points = cv2.findNonZero(_ink_mask(small))
+        if points is None or len(points) < 100:
+            return gray
+        angle = cv2.minAreaRect(points)[-1]
+        # minAreaRect reports angles in (0, 90]; map to the smallest rotation.
+        if angle > 45:
+            angle -= 90
+        if abs(angle) < self.min_angle or abs(angle) > self.max_angle:
+            return gray
+        height, width = gray.shape[:2]
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+        return cv2.warpAffine(gray, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+class Denoise:
+    """Median blur; removes salt-and-pepper camera noise while keeping edges."""
+
+    def __init__(self, ksize: int = 3):
+        self.ksize = ksize
+        self.halo = ksize // 2
+
+    def __call__(self, gray: np.ndarray) -> np.ndarray:
+        return cv2.medianBlur(gray, self.ksize)
+
+
+class Binarize:
+    """Gaussian adaptive threshold; robust to uneven lighting."""
+
+    def __init__(self, block_size: int = 11, c: int = 2):
+        self.block_size = block_size
+        self.c = c
+        self.halo = block_size // 2
+
+    def __call__(self, gray: np.ndarray) -> np.ndarray:
+        return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, self.block_size, self.c)
+
+
+def _tiles(height: int, width: int, tile_size: int):
+    for y in range(0, height, tile_size):
+        for x in range(0, width, tile_size):
+            yield y, min(y + tile_size, height), x, min(x + tile_size, width)
+
+
+class PreprocessPipeline:
+    """
+    Runs a chain of steps over one grayscale buffer.
+
+    Consecutive steps with a `halo` are applied tile by tile when the image is
+    larger than `tile_size`: each tile is cut with enough overlap for the
+    neighbourhood operations, processed on a thread pool (OpenCV releases the
+    GIL), and its interior is written into a preallocated output buffer, so the
+    result matches processing the whole image at once.
+    """
+
+    def __init__(self, steps: Sequence, tile_size: int = 1024, workers: Optional[int] = None):
+        self.steps = list(steps)
+        self.tile_size = tile_size
+        self.workers = workers or max(1, min(4, os.cpu_count() or 1))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="preprocess") if self.workers > 1 else None
+
+    def _run_local(self, steps: List, gray: np.ndarray) -> np.ndarray:
+        height, width = gray.shape[:2]
+        if self._executor is None or max(height, width) <= self.tile_size:
+            for step in steps:
+                gray = step(gray)
+            return gray
+
+        halo = sum(step.halo for step in steps)
+        out = np.empty_like(gray)
+
+        def process(bounds):
+            y0, y1, x0, x1 = bounds
+            ty0, ty1 = max(0, y0 - halo), min(height, y1 + halo)
+            tx0, tx1 = max(0, x0 - halo), min(width, x1 + halo)
+            tile = gray[ty0:ty1, tx0:tx1]
+            for step in steps:
+                tile = step(tile)
+            out[y0:y1, x0:x1] = tile[y0 - ty0:y0 - ty0 + (y1 - y0), x0 - tx0:x0 - tx0 + (x1 - x0)]
+
+        list(self._executor.map(process, _tiles(height, width, self.tile_size)))
+        return out
+
+    def __call__(self, gray: np.ndarray) -> np.ndarray:
+        local = []
+        for step in self.steps:
+            if getattr(step, "halo", None) is not None:
+                local.append(step)
+                continue
+            if local:
+                gray = self._run_local(local, gray)
+                local = []
+            gray = step(gray)
+        if local:
+            gray = self._run_local(local, gray)
+        return gray
+
+
+def default_pipeline(deskew: bool = False, crop: bool = False) -> PreprocessPipeline:
+    """The standard OCR chain: [deskew] → [crop] → rescale → denoise → binarize."""
+    steps = []
+    if deskew:
+        steps.append(Deskew())
+    if crop:
+        steps.append(CropToContent())
+    steps += [RescaleToTextHeight(), Denoise(3), Binarize(11, 2)]
+    return PreprocessPipeline(steps)
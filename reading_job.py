@@ -0,0 +1,144 @@
+# reading_job.py
+import threading
+import time
+import uuid
+from typing import Optional
+
+from audio_server import AudioStream, get_audio_server
+from extract_text import get_ocr_cache, ocr_cache_options, ocr_image_iter, preprocess_image
+from preprocess import ImageSource, load_gray
+from text_to_speech import get_tts_engine, text_to_speech_stream
+
+# Job states, in order. A job ends in exactly one of the last three.
+QUEUED = "queued"
+PREPROCESSING = "preprocessing"
+READING = "reading"
+DONE = "done"
+NO_TEXT = "no_text"
+FAILED = "failed"
+FINISHED_STATES = (DONE, NO_TEXT, FAILED)
+
+
+class ReadingJob:
+    """
+    Reads one captured page aloud on a background thread.
+
+    Text blocks are spoken as soon as OCR returns them, into an `AudioStream`
+    that the browser plays from `audio_url` while later blocks are still being
+    recognized and synthesized. `progress()` is the channel the UI polls: it
+    returns a snapshot of the state, the text recognized so far and timings.
+    """
+
+    def __init__(
+        self,
+        image_source: ImageSource,
+        lang: str = "kan",
+        tts_lang: str = "kn",
+        spell_check: bool = True,
+        intro_text: str = "",
+        max_side: Optional[int] = None,
+        ocr_backend: Optional[str] = None,
+    ):
+        self.id = uuid.uuid4().hex
+        self.lang = lang
+        self.tts_lang = tts_lang
+        self.spell_check = spell_check
+        self.intro_text = intro_text
+        self._image_source = image_source
+        self.max_side = max_side
+        self.ocr_backend = ocr_backend
+        self._engine = get_tts_engine()
+        self.audio = AudioStream(mime_type=self._engine.mime_type)
+        self.audio_url = get_audio_server().add_stream(self.audio, self.id)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._progress = {
+            "status": QUEUED,
+            "blocks": 0,
+            "lines": [],
+            "error": None,
+            "cached": False,  # text came from the OCR cache
+            "first_audio": None,  # seconds from start to the first audio bytes
+            "elapsed": None,
+        }
+        self._started = None
+
+    @property
+    def audio_format(self) -> str:
+        return self._engine.audio_format
+
+    def start(self) -> "ReadingJob":
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name=f"reading-job-{self.id[:8]}", daemon=True)
+        self._thread.start()
+        return self
+
+    def progress(self) -> dict:
+        with self._lock:
+            snapshot = dict(self._progress)
+            snapshot["lines"] = list(snapshot["lines"])
+        return snapshot
+
+    @property
+    def finished(self) -> bool:
+        return self.progress()["status"] in FINISHED_STATES
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.progress()["lines"])
+
+    def _update(self, **changes):
+        with self._lock:
+            self._progress.update(changes)
+
+    def _write_audio(self, data: bytes):
+        with self._lock:
+            if self._progress["first_audio"] is None:
+                self._progress["first_audio"] = time.perf_counter() - self._started
+        self.audio.write(data)
+
+    def _run(self):
+        try:
+            self._update(status=PREPROCESSING)
+            gray = load_gray(self._image_source, self.max_side)
+            self._image_source = None
+
+            # A page read before replays its cached blocks without being
+            # preprocessed; the speech for them is then a hit in the audio
+            # cache as well.
+            ocr_cache = get_ocr_cache()
+            options = ocr_cache_options(self.spell_check, self.ocr_backend)
+            cached = None
+            if ocr_cache is not None:
+                signature = ocr_cache.signature(gray)
+                cached = ocr_cache.get(signature, self.lang, options)
+            if cached:
+                blocks = cached.blocks
+            else:
+                blocks = ocr_image_iter(
+                    preprocess_image(gray), lang=self.lang, spell_check=self.spell_check, backend=self.ocr_backend
+                )
+            del gray
+            self._update(status=READING, cached=cached is not None)
+
+            # Every engine returns MP3, whose pieces can be appended to one
+            # stream, so each block is spoken sentence by sentence as it arrives.
+            lines = []
+            for text in blocks:
+                lines.append(text)
+                self._update(blocks=len(lines), lines=list(lines))
+                speech = f"{self.intro_text} {text}" if self.intro_text and len(lines) == 1 else text
+                for piece in text_to_speech_stream(speech, lang=self.tts_lang, continuation=len(lines) > 1):
+                    self._write_audio(piece)
+
+            if not lines:
+                self._update(status=NO_TEXT)
+                return
+            if ocr_cache is not None and cached is None:
+                ocr_cache.put(signature, self.lang, lines, options)
+            self._update(status=DONE)
+        except Exception as e:
+            self._update(status=FAILED, error=str(e))
+        finally:
+            self.audio.finish()
+            self._update(elapsed=time.perf_counter() - self._started)
@@ -1,27 +1,387 @@
 # spell_checker.py
 from symspellpy import SymSpell, Verbosity
+from collections.abc import Mapping
+from functools import lru_cache
+import hashlib
+import json
 import os
+import re
+import sys
+import threading
+import numpy as np
 
-def load_symspell():
-    sym_spell = SymSpell(max_dictionary_edit_distance=2, prefix_length=7)
+MAX_EDIT_DISTANCE = 2
+PREFIX_LENGTH = 7
 
-    # Use absolute path relative to this script's directory
-    base_path = os.path.dirname(__file__)
-    dictionary_path = os.path.join(base_path, "kannada_wordList_with_freq.txt")
+BASE_PATH = os.path.dirname(os.path.abspath(__file__))
+# Cleaned "word count" list produced by `python lexicon.py` (or on first use).
+DICTIONARY_PATH = os.path.join(BASE_PATH, "cleaned_kannada_dict.txt")
+INDEX_PATH = os.path.join(BASE_PATH, "kannada_symspell.idx")
+
+# --- Prebuilt index file format ---
+# MAGIC | uint64 header length | JSON header | arrays (each 64-byte aligned)
+# The header records the SHA-256 of the source dictionary and the SymSpell
+# parameters, so a stale or mismatched index is detected and rebuilt.
+_MAGIC = b"KNSYMSPELL\x01"
+_INDEX_FORMAT = 1
+_ALIGN = 64
+# `load_index` fills these private SymSpell tables directly. They are checked
+# against the symspellpy version pinned in requirements.txt; if an upgrade
+# renames them, the dictionary is loaded the normal way instead.
+_SYMSPELL_TABLES = ("_words", "_deletes", "_max_length")
+
+
+def dictionary_hash(dictionary_path: str = DICTIONARY_PATH) -> str:
+    """SHA-256 of the dictionary file, used to version the prebuilt index."""
+    digest = hashlib.sha256()
+    with open(dictionary_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def index_supported() -> bool:
+    """True when the installed symspellpy keeps its tables where `load_index` fills them."""
+    sym_spell = SymSpell(max_dictionary_edit_distance=MAX_EDIT_DISTANCE, prefix_length=PREFIX_LENGTH)
+    return all(hasattr(sym_spell, name) for name in _SYMSPELL_TABLES)
+
+
+class _DeletesIndex(Mapping):
+    """
+    Read-only view of SymSpell's deletes table backed by flat arrays.
+
+    Delete keys are stored as a sorted fixed-width UTF-8 array and looked up
+    with a binary search; the suggestions for key i are
+    words[word_ids[offsets[i]:offsets[i + 1]]]. Nothing is copied out of the
+    memory-mapped file until a key is actually looked up.
+    """
+
+    def __init__(self, keys: np.ndarray, offsets: np.ndarray, word_ids: np.ndarray, words: list):
+        self._keys = keys
+        self._offsets = offsets
+        self._word_ids = word_ids
+        self._words = words
+
+    def _find(self, key):
+        if not isinstance(key, str):
+            return -1
+        encoded = key.encode("utf-8")
+        i = int(np.searchsorted(self._keys, encoded))
+        if i < len(self._keys) and self._keys[i] == encoded:
+            return i
+        return -1
+
+    def __contains__(self, key):
+        return self._find(key) >= 0
+
+    def __getitem__(self, key):
+        i = self._find(key)
+        if i < 0:
+            raise KeyError(key)
+        words = self._words
+        return [words[j] for j in self._word_ids[self._offsets[i]:self._offsets[i + 1]]]
+
+    def __iter__(self):
+        return (k.decode("utf-8") for k in self._keys)
+
+    def __len__(self):
+        return len(self._keys)
 
-    if not os.path.exists(dictionary_path):
-        raise FileNotFoundError(f"Dictionary file not found at: {dictionary_path}")
 
+def _build_from_text(dictionary_path: str) -> SymSpell:
+    sym_spell = SymSpell(max_dictionary_edit_distance=MAX_EDIT_DISTANCE, prefix_length=PREFIX_LENGTH)
+    if not os.path.exists(dictionary_path):
+        raise FileNotFoundError(f"Dictionary file not found at: {dictionary_path} (run `python lexicon.py` to build it)")
     # Use load_dictionary instead of load_dictionary_stream
     sym_spell.load_dictionary(dictionary_path, term_index=0, count_index=1, encoding='utf-8')
+    return sym_spell
+
+
+def build_index(dictionary_path: str = DICTIONARY_PATH, index_path: str = INDEX_PATH) -> str:
+    """
+    Builds the SymSpell index from the frequency list once and writes it to a
+    compact binary file that `load_index` can memory-map in milliseconds.
+    Returns the index path.
+    """
+    sym_spell = _build_from_text(dictionary_path)
+
+    words = list(sym_spell.words.keys())
+    word_ids = {word: i for i, word in enumerate(words)}
+    counts = np.array([sym_spell.words[w] for w in words], dtype=np.int64)
+    encoded_words = [w.encode("utf-8") for w in words]
+    word_offsets = np.zeros(len(words) + 1, dtype=np.int64)
+    np.cumsum([len(w) for w in encoded_words], out=word_offsets[1:])
+    word_blob = np.frombuffer(b"".join(encoded_words), dtype=np.uint8)
+
+    delete_keys = [k.encode("utf-8") for k in sym_spell.deletes.keys()]
+    width = max(1, max(len(k) for k in delete_keys))
+    keys = np.array(delete_keys, dtype=f"S{width}")
+    order = np.argsort(keys, kind="stable")
+    delete_values = list(sym_spell.deletes.values())
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum([len(delete_values[i]) for i in order], out=offsets[1:])
+    ids = np.fromiter(
+        (word_ids[w] for i in order for w in delete_values[i]), dtype=np.int32, count=int(offsets[-1])
+    )
+
+    arrays = {
+        "keys": keys[order],
+        "offsets": offsets,
+        "word_ids": ids,
+        "counts": counts,
+        "word_offsets": word_offsets,
+        "word_blob": word_blob,
+    }
+    header = {
+        "format": _INDEX_FORMAT,
+        "dictionary_sha256": dictionary_hash(dictionary_path),
+        "max_dictionary_edit_distance": MAX_EDIT_DISTANCE,
+        "prefix_length": PREFIX_LENGTH,
+        "max_length": max((len(w) for w in words), default=0),
+        "arrays": {},
+    }
+    # Lay the arrays out after the header, each aligned for direct mapping.
+    position = 0
+    for name, array in arrays.items():
+        header["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": position}
+        position += -(-array.nbytes // _ALIGN) * _ALIGN
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = -(-(len(_MAGIC) + 8 + len(header_bytes)) // _ALIGN) * _ALIGN
+
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header["arrays"][name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, index_path)
+    return index_path
 
+
+def load_index(index_path: str = INDEX_PATH, dictionary_path: str = None) -> SymSpell:
+    """
+    Maps a prebuilt index into memory and returns a ready SymSpell instance.
+    The file is opened read-only with mmap, so worker processes share the same
+    physical pages. If `dictionary_path` is given, the index must have been
+    built from that exact file; otherwise ValueError is raised. RuntimeError is
+    raised when the installed symspellpy does not support prebuilt indexes.
+    """
+    if not index_supported():
+        raise RuntimeError("❌ The installed symspellpy does not support prebuilt indexes")
+    with open(index_path, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"❌ Not a SymSpell index file: {index_path}")
+        header_len = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    if header["format"] != _INDEX_FORMAT:
+        raise ValueError(f"❌ Unsupported SymSpell index format {header['format']}")
+    if (header["max_dictionary_edit_distance"], header["prefix_length"]) != (MAX_EDIT_DISTANCE, PREFIX_LENGTH):
+        raise ValueError("❌ SymSpell index was built with different parameters")
+    if dictionary_path and header["dictionary_sha256"] != dictionary_hash(dictionary_path):
+        raise ValueError(f"❌ SymSpell index is out of date for {dictionary_path}")
+
+    data_start = -(-(len(_MAGIC) + 8 + header_len) // _ALIGN) * _ALIGN
+    mapped = np.memmap(index_path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"])) if spec["shape"] else 1
+        arrays[name] = np.frombuffer(mapped, dtype=dtype, count=count, offset=data_start + spec["offset"])
+
+    # Word offsets are byte positions into the UTF-8 blob.
+    raw = arrays["word_blob"].tobytes()
+    bounds = arrays["word_offsets"].tolist()
+    words = [raw[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
+
+    sym_spell = SymSpell(max_dictionary_edit_distance=MAX_EDIT_DISTANCE, prefix_length=PREFIX_LENGTH)
+    sym_spell._words = dict(zip(words, arrays["counts"].tolist()))
+    sym_spell._deletes = _DeletesIndex(arrays["keys"], arrays["offsets"], arrays["word_ids"], words)
+    sym_spell._max_length = header["max_length"]
     return sym_spell
 
+
+def load_symspell(dictionary_path: str = DICTIONARY_PATH, index_path: str = INDEX_PATH) -> SymSpell:
+    """
+    Returns a SymSpell instance for the Kannada dictionary.
+    Uses the prebuilt index when it matches the dictionary; otherwise builds
+    the index (once) and loads it. Falls back to an in-memory build if the
+    index cannot be written or the installed symspellpy cannot use it.
+    """
+    if dictionary_path == DICTIONARY_PATH and not os.path.exists(dictionary_path):
+        from lexicon import ensure_lexicon
+
+        ensure_lexicon(dictionary_path)
+    if not os.path.exists(dictionary_path):
+        raise FileNotFoundError(f"Dictionary file not found at: {dictionary_path} (run `python lexicon.py` to build it)")
+    if not index_supported():
+        print("[WARN] Installed symspellpy does not support the prebuilt index, building in memory", file=sys.stderr)
+        return _build_from_text(dictionary_path)
+    if os.path.exists(index_path):
+        try:
+            return load_index(index_path, dictionary_path)
+        except ValueError as e:
+            print(f"[INFO] Rebuilding SymSpell index: {e}")
+    try:
+        build_index(dictionary_path, index_path)
+    except OSError as e:
+        print(f"[WARN] Could not write SymSpell index, building in memory: {e}", file=sys.stderr)
+        return _build_from_text(dictionary_path)
+    return load_index(index_path)
+
+
+_shared_symspell = None
+_shared_lock = threading.Lock()
+
+
+def get_symspell() -> SymSpell:
+    """Process-wide SymSpell instance, loaded on first use."""
+    global _shared_symspell
+    if _shared_symspell is None:
+        with _shared_lock:
+            if _shared_symspell is None:
+                _shared_symspell = load_symspell()
+    return _shared_symspell
+
+
+# --- Correction ---
+# A token is split into leading punctuation, the word, and trailing punctuation;
+# only the word is looked up and the punctuation is put back afterwards.
+# Kannada vowel signs are combining marks, which `\w` does not match, so the
+# Kannada block and ZWJ/ZWNJ are listed explicitly as word characters.
+_TOKEN = re.compile(r"\S+")
+_PUNCT = r"[^\w\u0C80-\u0CFF\u200C\u200D]*"
+_TOKEN_PARTS = re.compile(rf"^({_PUNCT})(.*?)({_PUNCT})$", re.DOTALL)
+_KANNADA = re.compile(r"[\u0C80-\u0CFF]")
+
+
+class SpellCorrector:
+    """
+    Memoized SymSpell corrector.
+
+    Token corrections are kept in a bounded LRU, tokens already in the
+    dictionary (or with no Kannada letters at all) skip the lookup entirely,
+    and `correct_many` corrects every distinct document of a batch once.
+    With `compound=True`, an unknown word is first joined with the next word
+    when together they form a dictionary word (OCR split it), then segmented
+    into dictionary words (OCR ran words together), and only then corrected.
+    symspellpy's own `lookup_compound` is not used because its tokenizer
+    breaks Kannada words apart at every vowel sign.
+    """
+
+    def __init__(self, sym_spell: SymSpell = None, max_edit_distance: int = MAX_EDIT_DISTANCE,
+                 cache_size: int = 50000, compound: bool = False):
+        self.sym_spell = sym_spell or get_symspell()
+        self.max_edit_distance = max_edit_distance
+        self.compound = compound
+        self._words = self.sym_spell.words
+        self._lookup_word = lru_cache(maxsize=cache_size)(self._lookup_word_uncached)
+        self._segment = lru_cache(maxsize=cache_size)(self._segment_uncached)
+
+    def _lookup_word_uncached(self, word: str) -> str:
+        suggestions = self.sym_spell.lookup(word, Verbosity.CLOSEST, max_edit_distance=self.max_edit_distance)
+        return suggestions[0].term if suggestions else word
+
+    def _segment_uncached(self, word: str):
+        """Splits a run-together word into dictionary words, or returns None."""
+        parts = self.sym_spell.word_segmentation(word, max_edit_distance=0).corrected_string.split()
+        if len(parts) > 1 and all(part in self._words for part in parts):
+            return " ".join(parts)
+        return None
+
+    def _needs_lookup(self, word: str) -> bool:
+        return bool(word) and word not in self._words and _KANNADA.search(word) is not None
+
+    def correct_word(self, word: str) -> str:
+        """Corrects a single word (no surrounding punctuation)."""
+        if not self._needs_lookup(word):
+            return word
+        return self._lookup_word(word)
+
+    def _correct_token(self, match) -> str:
+        prefix, word, suffix = _TOKEN_PARTS.match(match.group(0)).groups()
+        return prefix + self.correct_word(word) + suffix
+
+    def _correct_line_compound(self, line: str) -> str:
+        tokens = [_TOKEN_PARTS.match(token).groups() for token in line.split()]
+        out = []
+        i = 0
+        while i < len(tokens):
+            prefix, word, suffix = tokens[i]
+            if self._needs_lookup(word):
+                if i + 1 < len(tokens) and not suffix:
+                    next_prefix, next_word, next_suffix = tokens[i + 1]
+                    if not next_prefix and word + next_word in self._words:
+                        out.append(prefix + word + next_word + next_suffix)
+                        i += 2
+                        continue
+                word = self._segment(word) or self._lookup_word(word)
+            out.append(prefix + word + suffix)
+            i += 1
+        return " ".join(out)
+
+    def correct(self, text: str) -> str:
+        """
+        Corrects every word in `text`, keeping the original whitespace and
+        punctuation. In compound mode lines are kept but spacing within a line
+        is normalized, since words may be joined or split.
+        """
+        if self.compound:
+            return "\n".join(self._correct_line_compound(line) for line in text.split("\n"))
+        return _TOKEN.sub(self._correct_token, text)
+
+    def correct_many(self, texts):
+        """
+        Corrects a batch of documents. Each distinct document is corrected
+        once and the result fanned back out to every position it occurs at;
+        distinct unknown words are looked up once through the LRU.
+        """
+        texts = list(texts)
+        corrected = {text: self.correct(text) for text in dict.fromkeys(texts)}
+        return [corrected[text] for text in texts]
+
+    def cache_info(self):
+        """Hit/miss statistics of the word-level LRU."""
+        return self._lookup_word.cache_info()
+
+
+# One shared corrector per SymSpell index. A corrector references its index,
+# so entries live until `clear_correctors` is called.
+_correctors = {}
+_correctors_lock = threading.Lock()
+
+
 def correct_spelling(text, sym_spell):
-    words = text.split()
-    corrected_words = []
-    for word in words:
-        suggestions = sym_spell.lookup(word, Verbosity.CLOSEST, max_edit_distance=2)
-        best_match = suggestions[0].term if suggestions else word
-        corrected_words.append(best_match)
-    return ' '.join(corrected_words)
+    """
+    Corrects each word of `text` with SymSpell, keeping spacing and punctuation.
+    Uses a memoized `SpellCorrector` shared by every call with the same index.
+    """
+    corrector = _correctors.get(sym_spell)
+    if corrector is None:
+        with _correctors_lock:
+            corrector = _correctors.get(sym_spell)
+            if corrector is None:
+                corrector = _correctors[sym_spell] = SpellCorrector(sym_spell)
+    return corrector.correct(text)
+
+
+def clear_correctors():
+    """Drops the correctors shared by `correct_spelling`, releasing their indexes and memoized corrections."""
+    with _correctors_lock:
+        _correctors.clear()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build the prebuilt SymSpell index for the Kannada dictionary.")
+    parser.add_argument("--dictionary", default=DICTIONARY_PATH, help="Frequency list to index.")
+    parser.add_argument("--output", default=INDEX_PATH, help="Where to write the index file.")
+    args = parser.parse_args()
+
+    start = time.time()
+    path = build_index(args.dictionary, args.output)
+    print(f"[SUCCESS] ✅ SymSpell index written to '{path}' in {time.time() - start:.1f}s")
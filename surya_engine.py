@@ -0,0 +1,200 @@
+# surya_engine.py
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Iterable, List, Optional, Sequence, Union
+
+from PIL import Image
+
+from ocr_engine import ImageInput, OCRBackend, OCRWord, _to_gray_array
+
+# Surya reads its device and batch sizes from the environment when imported.
+# This app runs on CPU; keep batches small enough for CPU memory.
+os.environ.setdefault("TORCH_DEVICE", "cpu")
+os.environ.setdefault("RECOGNITION_BATCH_SIZE", "32")
+os.environ.setdefault("DETECTOR_BATCH_SIZE", "4")
+
+try:
+    from surya.detection import DetectionPredictor
+    from surya.recognition import RecognitionPredictor
+except ImportError:
+    DetectionPredictor = RecognitionPredictor = None
+
+try:
+    # Newer Surya releases share one foundation model between predictors.
+    from surya.foundation import FoundationPredictor
+except ImportError:
+    FoundationPredictor = None
+
+# Tesseract language codes used by the app → Surya language codes.
+SURYA_LANGS = {"kan": "kn", "eng": "en", "hin": "hi", "tam": "ta", "tel": "te", "mal": "ml"}
+
+# How long the batching thread waits for more requests before running a batch.
+DEFAULT_BATCH_WAIT = 0.02
+DEFAULT_MAX_BATCH = 16
+
+
+def _chars_to_words(line, line_number: int) -> List[OCRWord]:
+    """
+    Splits a Surya text line into words. Character boxes (when the release
+    reports them) are merged per word; otherwise the line box is divided in
+    proportion to the word lengths.
+    """
+    words = []
+    chars = getattr(line, "chars", None) or []
+    if chars and "".join(c.text for c in chars) == line.text:
+        group = []
+        for char in chars + [None]:
+            if char is not None and not char.text.isspace():
+                group.append(char)
+                continue
+            if group:
+                left = min(c.bbox[0] for c in group)
+                top = min(c.bbox[1] for c in group)
+                right = max(c.bbox[2] for c in group)
+                bottom = max(c.bbox[3] for c in group)
+                conf = 100.0 * sum(c.confidence for c in group) / len(group)
+                words.append(OCRWord("".join(c.text for c in group), conf, int(left), int(top),
+                                     int(right - left), int(bottom - top), 1, 1, line_number))
+                group = []
+        return words
+
+    x0, y0, x1, y1 = line.bbox
+    tokens = line.text.split()
+    total = max(1, len(line.text))
+    offset = 0
+    conf = 100.0 * (line.confidence or 0.0)
+    for token in tokens:
+        start = line.text.index(token, offset)
+        offset = start + len(token)
+        left = x0 + (x1 - x0) * start / total
+        right = x0 + (x1 - x0) * offset / total
+        words.append(OCRWord(token, conf, int(left), int(y0), int(right - left), int(y1 - y0), 1, 1, line_number))
+    return words
+
+
+def result_to_words(result) -> List[OCRWord]:
+    """Converts one Surya page result into the `OCRWord` rows every engine returns."""
+    words = []
+    for i, line in enumerate(result.text_lines):
+        if line.text.strip():
+            words.extend(_chars_to_words(line, i + 1))
+    return words
+
+
+class SuryaEngine(OCRBackend):
+    """
+    OCR engine backed by Surya's transformer models, running on CPU.
+
+    The detection and recognition models are loaded once. All recognition goes
+    through a single batching thread: images from one call, and from calls
+    made concurrently by other threads within `batch_wait` seconds, are run
+    through the models together (up to `max_batch` images), so the per-call
+    overhead of a forward pass is shared. Text lines are found by Surya's own
+    detector, so callers should pass whole pages rather than cropped regions.
+    """
+
+    name = "surya"
+    uses_regions = False
+
+    def __init__(
+        self,
+        lang: str = "kan",
+        batch_wait: float = DEFAULT_BATCH_WAIT,
+        max_batch: int = DEFAULT_MAX_BATCH,
+    ):
+        if RecognitionPredictor is None:
+            raise ImportError("❌ Surya is not installed. Install it with: pip install surya-ocr")
+        self.lang = lang
+        self.batch_wait = batch_wait
+        self.max_batch = max_batch
+
+        start = time.time()
+        if FoundationPredictor is not None:
+            self._recognizer = RecognitionPredictor(FoundationPredictor())
+        else:
+            self._recognizer = RecognitionPredictor()
+        self._detector = DetectionPredictor()
+        print(f"[INFO] Surya models loaded in {time.time() - start:.1f}s")
+
+        self._requests = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="surya-batcher", daemon=True)
+        self._thread.start()
+
+    def _predict(self, images: List[Image.Image]):
+        if FoundationPredictor is not None:
+            return self._recognizer(images, det_predictor=self._detector)
+        langs = [[SURYA_LANGS.get(self.lang, self.lang)]] * len(images)
+        return self._recognizer(images, langs, self._detector)
+
+    def _run(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            batch = [request]
+            size = len(request[0])
+            deadline = time.perf_counter() + self.batch_wait
+            while size < self.max_batch:
+                try:
+                    request = self._requests.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._requests.put(None)
+                    break
+                batch.append(request)
+                size += len(request[0])
+
+            images = [image for pages, _ in batch for image in pages]
+            try:
+                results = self._predict(images)
+                offset = 0
+                for pages, future in batch:
+                    page_results = results[offset:offset + len(pages)]
+                    offset += len(pages)
+                    future.set_result([result_to_words(result) for result in page_results])
+            except Exception as e:
+                # Fail whatever is still pending, so no caller waits forever
+                # and the thread stays up for the next batch.
+                print(f"[ERROR] Surya batch of {len(images)} image(s) failed: {e}", file=sys.stderr)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def recognize_words_many(
+        self, images: Iterable[ImageInput], psm: Union[int, Sequence[int], None] = None
+    ) -> List[List[OCRWord]]:
+        """
+        Recognizes several images in one batch and returns their words in input
+        order. `psm` is accepted for compatibility with the Tesseract engine
+        and ignored.
+        """
+        if self._closed:
+            raise RuntimeError("OCR engine has been closed")
+        pages = [Image.fromarray(_to_gray_array(image)).convert("RGB") for image in images]
+        if not pages:
+            return []
+        future = Future()
+        self._requests.put((pages, future))
+        return future.result()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def is_healthy(self) -> bool:
+        """True while the engine is open and its batching thread is running."""
+        return not self._closed and self._thread.is_alive()
+
+    def close(self):
+        """Stops the batching thread after the requests already queued."""
+        if self._closed:
+            return
+        self._closed = True
+        self._requests.put(None)
+        self._thread.join()
@@ -0,0 +1,135 @@
+# text_regions.py
+from typing import List, NamedTuple, Optional
+
+import cv2
+import numpy as np
+
+from preprocess import estimate_text_height
+
+# Tesseract page segmentation modes used per region.
+PSM_SINGLE_BLOCK = 6
+PSM_SINGLE_LINE = 7
+
+# White border added around each crop, which Tesseract needs to find text edges.
+REGION_PAD = 8
+
+
+class TextRegion(NamedTuple):
+    """Axis-aligned box around a block of text, with the PSM to OCR it with."""
+    x: int
+    y: int
+    w: int
+    h: int
+    psm: int
+
+
+def _merge_overlapping(boxes: List[List[int]]) -> List[List[int]]:
+    """Unions boxes that intersect until none do, so no text is OCR'd twice."""
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for box in boxes:
+            x, y, w, h = box
+            for other in result:
+                ox, oy, ow, oh = other
+                if x < ox + ow and ox < x + w and y < oy + oh and oy < y + h:
+                    nx, ny = min(x, ox), min(y, oy)
+                    other[:] = [nx, ny, max(x + w, ox + ow) - nx, max(y + h, oy + oh) - ny]
+                    merged = True
+                    break
+            else:
+                result.append(list(box))
+        boxes = result
+    return boxes
+
+
+def detect_text_regions(binary: np.ndarray, text_height: Optional[float] = None, min_glyphs: int = 3) -> List[TextRegion]:
+    """
+    Proposes text blocks on a binarized page (dark text on a light background).
+
+    Connected components whose size is plausible for a glyph are kept; specks,
+    rules, pictures and background texture are dropped. The kept glyphs are
+    smeared together with a morphological close sized from the text height, so
+    characters merge into words, words into lines and tightly spaced lines into
+    blocks. Each block with at least `min_glyphs` glyphs becomes a region.
+    Regions are returned in reading order.
+    """
+    text_height = text_height or estimate_text_height(binary)
+    if not text_height:
+        return []
+
+    ink = cv2.bitwise_not(binary) if np.mean(binary) > 127 else binary
+    _, labels, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    heights = stats[:, cv2.CC_STAT_HEIGHT]
+    widths = stats[:, cv2.CC_STAT_WIDTH]
+    areas = stats[:, cv2.CC_STAT_AREA]
+    glyph_like = (
+        (heights >= text_height * 0.3)
+        & (heights <= text_height * 5)
+        & (widths <= text_height * 6)
+        & (areas >= text_height * text_height * 0.05)
+    )
+    glyph_like[0] = False  # Background label.
+    glyphs = np.where(glyph_like[labels], 255, 0).astype(np.uint8)
+
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, int(text_height * 1.5)), max(3, int(text_height * 0.8))))
+    smeared = cv2.morphologyEx(glyphs, cv2.MORPH_CLOSE, kernel)
+    contours, _ = cv2.findContours(smeared, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if h < text_height * 0.5 or w < text_height:
+            continue
+        boxes.append([x, y, w, h])
+
+    regions = []
+    for x, y, w, h in _merge_overlapping(boxes):
+        count, _ = cv2.connectedComponents(glyphs[y:y + h, x:x + w])
+        if count - 1 < min_glyphs:
+            continue  # Too few glyphs: leftover picture detail.
+        psm = PSM_SINGLE_LINE if h < text_height * 2 else PSM_SINGLE_BLOCK
+        regions.append(TextRegion(x, y, w, h, psm))
+    return sort_reading_order(regions)
+
+
+def sort_reading_order(regions: List[TextRegion]) -> List[TextRegion]:
+    """
+    Orders regions top-to-bottom, and left-to-right among regions that share a
+    row (their vertical extents overlap by at least half of the shorter one).
+    """
+    rows = []
+    for region in sorted(regions, key=lambda r: r.y):
+        for row in rows:
+            top = max(region.y, row["top"])
+            bottom = min(region.y + region.h, row["bottom"])
+            if bottom - top >= 0.5 * min(region.h, row["bottom"] - row["top"]):
+                row["items"].append(region)
+                row["top"] = min(row["top"], region.y)
+                row["bottom"] = max(row["bottom"], region.y + region.h)
+                break
+        else:
+            rows.append({"top": region.y, "bottom": region.y + region.h, "items": [region]})
+    ordered = []
+    for row in sorted(rows, key=lambda r: r["top"]):
+        ordered.extend(sorted(row["items"], key=lambda r: r.x))
+    return ordered
+
+
+def region_origin(region: TextRegion, pad: int = REGION_PAD):
+    """Page coordinates of the top-left pixel of the crop made for `region`."""
+    return max(0, region.x - pad) - pad, max(0, region.y - pad) - pad
+
+
+def crop_regions(binary: np.ndarray, regions: List[TextRegion], pad: int = REGION_PAD) -> List[np.ndarray]:
+    """
+    Cuts each region out of the page with a white border of `pad` pixels,
+    which Tesseract needs to find the text edges reliably.
+    """
+    page_h, page_w = binary.shape[:2]
+    crops = []
+    for r in regions:
+        crop = binary[max(0, r.y - pad):min(page_h, r.y + r.h + pad), max(0, r.x - pad):min(page_w, r.x + r.w + pad)]
+        crops.append(cv2.copyMakeBorder(crop, pad, pad, pad, pad, cv2.BORDER_CONSTANT, value=255))
+    return crops
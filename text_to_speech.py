@@ -1,25 +1,387 @@
 from gtts import gTTS
 from io import BytesIO
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List
+import numpy as np
+from audio_cache import AudioCache, make_cache_key
 
-def text_to_speech(text: str, lang: str = 'kn', filename: str = None) -> bytes:
+try:
+    import lameenc
+except ImportError:  # only needed by the offline engines
+    lameenc = None
+
+# --- Audio Cache ---
+# Synthesized clips are cached by content, so repeated prompts and repeated
+# OCR results skip the network round-trip.
+AUDIO_CACHE_DIR = os.environ.get(
+    "AUDIO_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".audio_cache")
+)
+_audio_cache = AudioCache(cache_dir=AUDIO_CACHE_DIR)
+
+_USE_DEFAULT = object()
+
+def set_audio_cache(cache):
+    """
+    Replace the process-wide audio cache. Pass None to disable caching.
+    Any object with `get(key)` and `put(key, data)` methods can be used.
+    """
+    global _audio_cache
+    _audio_cache = cache
+
+def get_audio_cache():
+    """Return the process-wide audio cache (None when caching is disabled)."""
+    return _audio_cache
+
+# --- MP3 encoding for the offline engines ---
+MP3_BIT_RATE = 64  # kbit/s; plenty for mono speech
+
+def encode_mp3(samples: np.ndarray, sample_rate: int) -> bytes:
+    """
+    Encode mono audio (float samples in [-1, 1], or int16) as MP3, so every
+    engine returns the same format. The output has no header tags, so clips
+    can be concatenated into one stream like gTTS clips.
+    """
+    if lameenc is None:
+        raise RuntimeError("❌ MP3 encoding for offline TTS needs the 'lameenc' package (pip install lameenc)")
+    samples = np.asarray(samples)
+    if samples.dtype != np.int16:
+        samples = samples.astype(np.float32)
+        peak = float(np.max(np.abs(samples))) if samples.size else 0.0
+        if peak > 1.0:
+            samples = samples / peak  # only scale down, so sentences keep the same loudness
+        samples = (samples * 32767).astype(np.int16)
+    encoder = lameenc.Encoder()
+    encoder.set_bit_rate(MP3_BIT_RATE)
+    encoder.set_in_sample_rate(int(sample_rate))
+    encoder.set_channels(1)
+    encoder.set_quality(2)
+    return bytes(encoder.encode(samples.tobytes()) + encoder.flush())
+
+# --- TTS Engines ---
+class TTSEngine:
+    """
+    Interface for speech engines. `synthesize` returns the bytes of a complete
+    MP3 file; `voice_params` returns everything besides the text and language
+    that changes the output, and is part of the cache key.
+    """
+    name = "base"
+    audio_format = "mp3"
+    mime_type = "audio/mpeg"
+    concurrent = True  # False when calls are serialized anyway, so sentences are synthesized in order
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        raise NotImplementedError
+
+    def voice_params(self) -> dict:
+        return {}
+
+    def is_healthy(self) -> bool:
+        return True
+
+class GTTSEngine(TTSEngine):
+    """Google Text-to-Speech over the network (MP3 output)."""
+    name = "gtts"
+
+    def __init__(self, slow: bool = False):
+        self.slow = slow
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        try:
+            tts = gTTS(text=text, lang=lang, slow=self.slow)
+            fp = BytesIO()
+            tts.write_to_fp(fp)
+            fp.seek(0)
+            return fp.read()
+        except Exception as e:
+            raise ConnectionError(f"❌ Failed to generate audio with gTTS: {e}")
+
+    def voice_params(self) -> dict:
+        return {"slow": self.slow}
+
+# The vendored Coqui TTS checkout, used when the `TTS` package is not installed.
+TTS_DEV_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "TTS-dev")
+
+class LocalTTSEngine(TTSEngine):
+    """
+    Offline synthesis with the vendored `TTS.utils.synthesizer.Synthesizer`,
+    encoded to MP3 like the gTTS output.
+    The model is loaded on first use and stays resident for the life of the
+    process; calls are serialized because the model is not thread-safe.
+    """
+    name = "local"
+    concurrent = False
+
+    def __init__(
+        self,
+        model_path: str = "",
+        config_path: str = "",
+        vocoder_path: str = "",
+        vocoder_config_path: str = "",
+        model_dir: str = "",
+        speaker: str = "",
+        use_cuda: bool = False,
+    ):
+        if not (model_path and config_path) and not model_dir:
+            raise ValueError("❌ The local TTS engine needs a model and config path, or a model directory")
+        self.model_path = model_path
+        self.config_path = config_path
+        self.vocoder_path = vocoder_path
+        self.vocoder_config_path = vocoder_config_path
+        self.model_dir = model_dir
+        self.speaker = speaker
+        self.use_cuda = use_cuda
+        self._synthesizer = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            from TTS.utils.synthesizer import Synthesizer
+        except ImportError:
+            sys.path.insert(0, TTS_DEV_DIR)
+            from TTS.utils.synthesizer import Synthesizer
+
+        print("[INFO] Loading local TTS model...")
+        return Synthesizer(
+            tts_checkpoint=self.model_path,
+            tts_config_path=self.config_path,
+            vocoder_checkpoint=self.vocoder_path,
+            vocoder_config=self.vocoder_config_path,
+            model_dir=self.model_dir,
+            use_cuda=self.use_cuda,
+        )
+
+    def load(self):
+        """Load the model now instead of on the first request."""
+        with self._lock:
+            if self._synthesizer is None:
+                self._synthesizer = self._load()
+        return self._synthesizer
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        synthesizer = self.load()
+        with self._lock:
+            wav = synthesizer.tts(text, speaker_name=self.speaker)
+        return encode_mp3(wav, synthesizer.output_sample_rate)
+
+    def is_healthy(self) -> bool:
+        """True once the model is loaded and resident."""
+        return self._synthesizer is not None
+
+    def voice_params(self) -> dict:
+        model = self.model_dir or self.model_path
+        return {"model": os.path.abspath(model), "vocoder": self.vocoder_path, "speaker": self.speaker}
+
+class SilentTTSEngine(TTSEngine):
     """
-    Convert text into speech using the gTTS API.
+    Offline stand-in that returns silent MP3 audio as long as the text would
+    take to speak, optionally after a simulated synthesis delay. Used by the
+    benchmarks and for running the pipeline without network or a model.
+    """
+    name = "silent"
+
+    def __init__(self, seconds_per_char: float = 0.06, delay_per_char: float = 0.0, sample_rate: int = 16000):
+        self.seconds_per_char = seconds_per_char
+        self.delay_per_char = delay_per_char
+        self.sample_rate = sample_rate
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        if self.delay_per_char:
+            time.sleep(self.delay_per_char * len(text))
+        frames = int(self.sample_rate * self.seconds_per_char * len(text))
+        return encode_mp3(np.zeros(frames, dtype=np.int16), self.sample_rate)
+
+    def voice_params(self) -> dict:
+        return {"seconds_per_char": self.seconds_per_char, "sample_rate": self.sample_rate}
+
+_ENGINES = {"gtts": GTTSEngine, "local": LocalTTSEngine, "silent": SilentTTSEngine}
+_engine = None
+_engine_lock = threading.Lock()
+
+def configure_tts(engine: str = "gtts", **options) -> TTSEngine:
+    """
+    Select the speech engine used by `text_to_speech`.
+    `engine` is "gtts", "local" or "silent"; `options` are passed to the engine constructor.
+    Without options, the local engine takes its model paths from the TTS_* environment variables.
+    """
+    global _engine
+    if engine not in _ENGINES:
+        raise ValueError(f"❌ Unknown TTS engine '{engine}'. Choose from: {', '.join(_ENGINES)}")
+    new_engine = _ENGINES[engine](**options) if options else _engine_from_env(engine)
+    with _engine_lock:
+        _engine = new_engine
+    return _engine
+
+def _engine_from_env(engine: str = None) -> TTSEngine:
+    """Build the engine (by default TTS_ENGINE, else gTTS) from TTS_* environment variables."""
+    engine = engine or os.environ.get("TTS_ENGINE", "gtts")
+    if engine == "local":
+        return LocalTTSEngine(
+            model_path=os.environ.get("TTS_MODEL_PATH", ""),
+            config_path=os.environ.get("TTS_CONFIG_PATH", ""),
+            vocoder_path=os.environ.get("TTS_VOCODER_PATH", ""),
+            vocoder_config_path=os.environ.get("TTS_VOCODER_CONFIG_PATH", ""),
+            model_dir=os.environ.get("TTS_MODEL_DIR", ""),
+            speaker=os.environ.get("TTS_SPEAKER", ""),
+            use_cuda=os.environ.get("TTS_USE_CUDA", "") == "1",
+        )
+    if engine not in _ENGINES:
+        raise ValueError(f"❌ Unknown TTS engine '{engine}'. Choose from: {', '.join(_ENGINES)}")
+    return _ENGINES[engine]()
+
+def get_tts_engine() -> TTSEngine:
+    """Return the configured speech engine, creating it from the environment on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _engine_from_env()
+    return _engine
+
+def text_to_speech(text: str, lang: str = 'kn', filename: str = None, cache=_USE_DEFAULT) -> bytes:
+    """
+    Convert text into speech with the configured engine (gTTS by default).
     Returns the audio bytes. If a filename is provided, it also saves the audio.
+    Results are looked up in, and stored to, the audio cache; pass cache=None to bypass it.
     """
     if not text.strip():
         raise ValueError("❌ No text provided for TTS")
 
-    try:
-        tts = gTTS(text=text, lang=lang, slow=False)
-        fp = BytesIO()
-        tts.write_to_fp(fp)
-        fp.seek(0)
-        audio_bytes = fp.read()
-    except Exception as e:
-        raise ConnectionError(f"❌ Failed to generate audio with gTTS: {e}")
+    if cache is _USE_DEFAULT:
+        cache = get_audio_cache()
+
+    engine = get_tts_engine()
+    key = make_cache_key(text, lang, engine.name, **engine.voice_params())
+    audio_bytes = cache.get(key) if cache is not None else None
+    if audio_bytes is None:
+        audio_bytes = engine.synthesize(text, lang)
+        if cache is not None:
+            cache.put(key, audio_bytes)
 
     if filename:
         with open(filename, 'wb') as f:
             f.write(audio_bytes)
 
     return audio_bytes
+
+def warm_up(texts: Iterable[str], lang: str = 'kn', background: bool = False):
+    """
+    Pre-render fixed prompts into the audio cache so their first playback is a cache hit.
+    With background=True the rendering runs in a daemon thread and the thread is returned.
+    Failures (e.g. no network) are reported and otherwise ignored.
+    """
+    texts = list(texts)
+
+    def _render():
+        for text in texts:
+            try:
+                text_to_speech(text, lang=lang)
+            except (ValueError, ConnectionError) as e:
+                print(f"[WARN] Could not pre-render prompt: {e}")
+
+    if background:
+        thread = threading.Thread(target=_render, name="tts-warm-up", daemon=True)
+        thread.start()
+        return thread
+    _render()
+    return None
+
+# --- Sentence-chunked streaming synthesis ---
+# gTTS sends at most 100 characters per request, so chunks are kept under that limit.
+MAX_CHUNK_CHARS = 100
+
+# Sentence ends: danda / double danda and the usual Latin terminators, or a line break.
+_SENTENCE_END = re.compile(r'(?<=[।॥.?!])\s+|\n+')
+_CLAUSE_END = re.compile(r'(?<=[,;:])\s+')
+
+def _pack(pieces: List[str], max_chars: int, sep: str = " ") -> List[str]:
+    """Greedily join pieces into chunks of at most max_chars, splitting any piece that is still too long."""
+    chunks = []
+    current = ""
+    for piece in pieces:
+        while len(piece) > max_chars:
+            cut = piece.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(piece[:cut].strip())
+            piece = piece[cut:].strip()
+        if not piece:
+            continue
+        candidate = f"{current}{sep}{piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+        else:
+            chunks.append(current)
+            current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def split_sentences(text: str, max_chars: int = MAX_CHUNK_CHARS) -> List[str]:
+    """
+    Split Kannada text into TTS chunks at sentence and danda boundaries.
+    Sentences longer than max_chars are split further at clause punctuation,
+    then at spaces; short neighbouring sentences are not merged so the first
+    chunk stays small and comes back quickly.
+    """
+    chunks = []
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            chunks.append(sentence)
+        else:
+            chunks.extend(_pack(_CLAUSE_END.split(sentence), max_chars))
+    return chunks
+
+def _strip_id3(audio_bytes: bytes) -> bytes:
+    """Drop a leading ID3v2 tag so clips can be concatenated as one MP3 stream."""
+    if len(audio_bytes) > 10 and audio_bytes[:3] == b"ID3":
+        size = 0
+        for b in audio_bytes[6:10]:
+            size = (size << 7) | (b & 0x7F)
+        return audio_bytes[10 + size:]
+    return audio_bytes
+
+def text_to_speech_stream(text: str, lang: str = 'kn', max_workers: int = 4, cache=_USE_DEFAULT,
+                          continuation: bool = False) -> Iterator[bytes]:
+    """
+    Synthesize long text chunk by chunk, yielding MP3 data in reading order.
+    Chunks are fetched concurrently through a pool of max_workers threads (one
+    for engines that run a single call at a time, such as the local model), and
+    each chunk is yielded as soon as it and every chunk before it are ready, so
+    playback of the first sentence can start while the rest are still fetched.
+    Concatenating the yielded pieces gives a single playable MP3. With
+    continuation, the first piece is stripped of its header as well, for
+    appending to an MP3 stream that has already started.
+    """
+    if not text.strip():
+        raise ValueError("❌ No text provided for TTS")
+
+    chunks = split_sentences(text)
+    if not get_tts_engine().concurrent:
+        max_workers = 1
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts") as pool:
+        # Keep only a bounded window of chunks in flight ahead of the consumer.
+        window = deque()
+        pending = iter(chunks)
+        for chunk in pending:
+            window.append(pool.submit(text_to_speech, chunk, lang, None, cache))
+            if len(window) >= max_workers * 2:
+                break
+        first = not continuation
+        while window:
+            audio_bytes = window.popleft().result()
+            next_chunk = next(pending, None)
+            if next_chunk is not None:
+                window.append(pool.submit(text_to_speech, next_chunk, lang, None, cache))
+            yield audio_bytes if first else _strip_id3(audio_bytes)
+            first = False
@@ -17,87 +17,175 @@ uni_conso={ 'ka' : u'\u0C95', 'kha' : u'\u0C96', 'ga' : u'\u0C97', 'gha' : u'\u0
 
 #'$' : u'\u0CBE', '$' : u'\u0CC1' , '$' : u'\u0CCD', '$': u'\u0CBF', '$':u'\u0CC0', '$' : u'\u0CC2', '$': u'\u0CC3', '$': u'\u0CC6', '$': u'\u0CC7', '$':u'\u0CC8', '$': u'\u0CCA', '$':u'\u0CCB', '$':u'\u0CCC', '$':u'\u0CEF'}
 
-def to_roman(word):
-	r=""
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator, List
+
+
+# --- Precompiled tables ---
+# Built once from the mappings above so that every call is a table lookup.
+
+#vowel signs (maatras, virama) that replace the inherent 'a' of the letter before them
+_SIGNS=''.join(c for c in roman if roman[c]=='$')
+#kannada consonants, i.e. letters whose roman form is a key of uni_conso
+_CONSONANTS=''.join(c for c in roman if roman[c] in uni_conso)
+
+
+class _DropUnmapped(dict):
+	#str.translate deletes characters that map to None
+	def __missing__(self, key):
+		return None
+
+#one-to-one table for str.translate: letters to their roman form, signs to a
+#marker followed by their roman form; the marker then removes the inherent
+#'a' of the consonant in front of it
+_SIGN_MARK='\x00'
+_ROMAN_TABLE=_DropUnmapped({ord(c): roman[c] for c in roman if roman[c]!='$'})
+_ROMAN_TABLE.update({ord(c): _SIGN_MARK+roman_kaagunita[c] for c in _SIGNS})
+
+#a sign that does not directly follow a consonant needs the character-by-character walk
+_LONE_SIGN=re.compile('(?<![%s])[%s]' % (_CONSONANTS, _SIGNS))
+
+#roman consonant bases without the inherent 'a': 'k', 'kh', 'nG', ...
+_CONSO_BASE={k[:-1]: v for k, v in uni_conso.items()}
+_VIRAMA=u'\u0CCD'
+
+#runs of text each direction transliterates in document mode; everything else is kept
+_KANNADA_RUN=re.compile(u'[\u0C80-\u0CFF]+')
+_ROMAN_RUN=re.compile('[A-Za-z]+')
+
+
+def _to_roman_walk(word):
+	#general case: a sign drops the last roman character written so far,
+	#whatever produced it; the output is kept as a list of non-empty pieces
+	out=[]
 	for c in word:
-		#print(c)
-		if c not in roman:
-			c=""
+		r=roman.get(c)
+		if r is None:
 			continue
-		if roman[c]=='$':
-			u2=r[0:-1]
-			r=u2
-			r+=roman_kaagunita[c]
-		else:	
-			r+=roman[c]
-		prev=c
-	return(r)
+		if r=='$':
+			if out:
+				last=out.pop()
+				if len(last)>1:
+					out.append(last[:-1])
+			r=roman_kaagunita[c]
+		if r:
+			out.append(r)
+	return ''.join(out)
+
+
+def to_roman(word):
+	"""
+	Kannada to roman. Characters outside the mapping are dropped, so `word`
+	should be a single word; use `transliterate` for running text.
+	"""
+	if _LONE_SIGN.search(word) is None:
+		return word.translate(_ROMAN_TABLE).replace('a'+_SIGN_MARK, '')
+	return _to_roman_walk(word)
 
 
 def to_uni(word):
+	"""
+	Roman to Kannada, the inverse of `to_roman`. Spaces are skipped, so `word`
+	should be a single word; use `transliterate` for running text. Characters
+	that cannot start a letter are skipped as well.
+	"""
 	word_len=len(word)
+	out=[]
 	i=0
-	r=""
-	prev=1
-	count=0
 	while i<word_len:
-		
-		prev=i
-		
 		c=word[i]
 		if c==" ":
 			i=i+1
-		c1=""
-		c2=""
-		c3=""
-		
-		if i<word_len-3:
-			c3=word[i+3]
-		if i<word_len-2:
-			c2=word[i+2]
-		if i<word_len-1:
-			c1=word[i+1]
-		
+			continue
+
+		pair=word[i:i+2]
 		#first two letters are vowels ex au ai
-		if i<2 and c+c1 in uni_vowel:
-			r=r+uni_vowel[c+c1]
+		if i<2 and pair in uni_vowel:
+			out.append(uni_vowel[pair])
 			i=i+2
 			continue
-			
-		#first letter is a swara ex a	
+
+		#first letter is a swara ex a
 		if i==0 and c in uni_vowel:
-			r=r+uni_vowel[c]
+			out.append(uni_vowel[c])
 			i=i+1
 			continue
-			
+
 		#anuswaara visarga
-		if c=='M' or c=='H':
-			r=r+uni_visarga[c]
+		if c in uni_visarga:
+			out.append(uni_visarga[c])
 			i=i+1
 			continue
-		
-		if c+c1+'a' in uni_conso:
-			c=c+c1
-			c1=c2
-			c2=c3
+
+		#consonant, aspirated ones (kh, Sh, nG ...) first
+		if len(pair)==2 and pair in _CONSO_BASE:
+			out.append(_CONSO_BASE[pair])
+			j=i+2
+		elif c in _CONSO_BASE:
+			out.append(_CONSO_BASE[c])
+			j=i+1
+		else:
 			i=i+1
-			
-		if c+'a' in uni_conso:
-			r=r+uni_conso[c+'a']
-			if c1 in uni_kaagunita or c1+c2 in uni_kaagunita:	
-				if c1+c2 in uni_kaagunita: 
-					r=r+uni_kaagunita[c1+c2]
-					i=i+3
-			
-				elif c1 in uni_kaagunita:
-					r=r+uni_kaagunita[c1]
-					i=i+2
-					
-			elif c1+'a' in uni_conso or c1+c2+'a' in uni_conso or i==word_len-1 or c1=="":
-				r=r+u'\u0CCD'
-				i=i+1
-			else:
-				i=i+2
-				
-
-	return r
+			continue
+
+		#what follows the consonant: a maatra, another consonant / the end (virama), or the inherent 'a'
+		sign=word[j:j+2]
+		if sign in uni_kaagunita:
+			out.append(uni_kaagunita[sign])
+			i=j+2
+		elif sign[:1] in uni_kaagunita:
+			out.append(uni_kaagunita[sign[:1]])
+			i=j+1
+		elif j==word_len or sign[:1] in _CONSO_BASE or sign in _CONSO_BASE:
+			out.append(_VIRAMA)
+			i=j
+		else:
+			i=j+1
+
+	return ''.join(out)
+
+
+_to_roman_cached=lru_cache(maxsize=65536)(to_roman)
+_to_uni_cached=lru_cache(maxsize=65536)(to_uni)
+
+_DIRECTIONS={
+	'roman': (_to_roman_cached, _KANNADA_RUN),
+	'kannada': (_to_uni_cached, _ROMAN_RUN),
+}
+
+
+def _direction(target):
+	try:
+		return _DIRECTIONS[target]
+	except KeyError:
+		raise ValueError(f"Unknown transliteration target: {target!r} (expected 'roman' or 'kannada')")
+
+
+def transliterate(text: str, target: str = 'roman') -> str:
+	"""
+	Transliterates running text. Each word in the source script is converted
+	and everything else (spaces, punctuation, digits, other scripts) is kept.
+	"""
+	convert, run=_direction(target)
+	return run.sub(lambda m: convert(m.group()), text)
+
+
+def transliterate_many(words: Iterable[str], target: str = 'roman') -> List[str]:
+	"""
+	Bulk word API: converts every word of `words`, returning results in order.
+	Repeated words are converted only once.
+	"""
+	convert, _=_direction(target)
+	return [convert(word) for word in words]
+
+
+def transliterate_stream(lines: Iterable[str], target: str = 'roman') -> Iterator[str]:
+	"""
+	Streaming document mode: yields each line of `lines` (e.g. an open file)
+	transliterated, so arbitrarily large documents run in constant memory.
+	"""
+	convert, run=_direction(target)
+	replace=lambda m: convert(m.group())
+	for line in lines:
+		yield run.sub(replace, line)